@@ -0,0 +1,69 @@
+from datetime import datetime
+from typing import List, Dict, Any
+
+import numpy as np
+import pandas as pd
+
+# Same rule as PropertyNotificationService.ts: 5% below market average per sqm
+PROFITABILITY_THRESHOLD = -0.05
+
+PROPERTY_FIELDS = ['id', 'city', 'neighborhood', 'size', 'rooms', 'condition', 'requestedPrice',
+                   'pricePerMeterActual', 'pricePerMeterAverage', 'url', 'timestamp']
+
+
+def score_deals(properties: pd.DataFrame, threshold: float = PROFITABILITY_THRESHOLD) -> pd.DataFrame:
+    """Score every property at once, mirroring PropertyNotificationService.analyzeAndNotify
+
+    Expects the Property columns (requestedPrice, size, pricePerMeterActual,
+    pricePerMeterAverage). Adds pricePerSqm, priceDifferencePercent,
+    isProfitable, totalMarketValue, totalPriceDifference and a dealRank
+    (1 = furthest below market) for profitable properties.
+    """
+    df = properties.copy()
+    price = df['requestedPrice'].to_numpy(dtype='float64')
+    size = df['size'].to_numpy(dtype='float64')
+    actual = df['pricePerMeterActual'].to_numpy(dtype='float64')
+    average = df['pricePerMeterAverage'].to_numpy(dtype='float64')
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['pricePerSqm'] = price / size
+        difference = (actual - average) / average
+    difference[~np.isfinite(difference)] = np.nan
+    df['priceDifferencePercent'] = difference
+    # NaN compares False, so unpriceable properties are never profitable
+    df['isProfitable'] = difference < threshold
+    df['totalMarketValue'] = average * size
+    df['totalPriceDifference'] = df['totalMarketValue'] - price
+
+    df['dealRank'] = pd.Series(np.nan, index=df.index)
+    profitable = df['isProfitable'].to_numpy()
+    df.loc[profitable, 'dealRank'] = df.loc[profitable, 'priceDifferencePercent'].rank(method='first').to_numpy()
+    return df
+
+
+def profitable_deals(scored: pd.DataFrame, limit: int = None) -> pd.DataFrame:
+    """Profitable properties ordered from the best deal down"""
+    deals = scored[scored['isProfitable']].sort_values('dealRank')
+    return deals.head(limit) if limit else deals
+
+
+def to_notifications(deals: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Records in the shape of the PropertyNotification interface in src/app/types/property.ts"""
+    timestamp = datetime.now().isoformat()
+    fields = [f for f in PROPERTY_FIELDS if f in deals]
+    properties = deals[fields].astype(object).where(deals[fields].notna(), None).to_dict('records')
+    notifications = []
+    for prop, per_sqm, difference, market_value, total_difference, rank in zip(
+            properties, deals['pricePerSqm'], deals['priceDifferencePercent'],
+            deals['totalMarketValue'], deals['totalPriceDifference'], deals['dealRank']):
+        notifications.append({
+            'property': prop,
+            'pricePerSqm': round(float(per_sqm), 2),
+            'priceDifferencePercent': round(float(difference), 4),
+            'isProfitable': True,
+            'totalMarketValue': round(float(market_value)),
+            'totalPriceDifference': round(float(total_difference)),
+            'dealRank': int(rank),
+            'timestamp': timestamp
+        })
+    return notifications
@@ -0,0 +1,213 @@
+import re
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+# Street prefixes and punctuation that differ between sources for the same address
+STREET_PREFIXES = re.compile(r"^(רחוב|רח'|רח׳|שדרות|שד'|שד׳|דרך)\s+")
+STREET_NUMBER = re.compile(r'\s(\d+)\s*[א-ת]?$')
+NON_WORD = re.compile(r'[^\w\s]')
+SPACES = re.compile(r'\s+')
+
+# Canonical fields, filled from the most complete record of a cluster
+CANONICAL_FIELDS = ['city', 'neighborhood', 'street', 'rooms', 'size', 'floor', 'property_type']
+
+
+class DedupConfig:
+    """Blocking granularity and match thresholds"""
+
+    def __init__(self, size_bucket: float = 10.0, price_tolerance: float = 0.05,
+                 size_tolerance: float = 0.06, min_score: float = 0.5):
+        self.size_bucket = size_bucket
+        self.price_tolerance = price_tolerance
+        self.size_tolerance = size_tolerance
+        self.min_score = min_score
+
+
+def normalize_street(street: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Split a street into a comparable name and its house number
+
+    "רח' בנימין ד'ישראלי 47" -> ("בנימין דישראלי", "47")
+    """
+    if not street:
+        return None, None
+    street = SPACES.sub(' ', street.strip())
+    street = STREET_PREFIXES.sub('', street)
+    number = None
+    match = STREET_NUMBER.search(street)
+    if match:
+        number = match.group(1)
+        street = street[:match.start()]
+    name = SPACES.sub(' ', NON_WORD.sub('', street)).strip()
+    return name or None, number
+
+
+def listing_street(row: Dict[str, Any]) -> Optional[str]:
+    """Madlan has a street field; Yad2 cards show the street as the title"""
+    return row.get('street') or row.get('title')
+
+
+class ListingKey:
+    """Pre-computed comparison fields of one listing"""
+
+    __slots__ = ('index', 'row', 'city', 'street', 'number', 'rooms', 'size', 'price', 'floor')
+
+    def __init__(self, index: int, row: Dict[str, Any]):
+        self.index = index
+        self.row = row
+        self.city = (row.get('city') or '').strip() or None
+        self.street, self.number = normalize_street(listing_street(row))
+        self.rooms = row.get('rooms')
+        self.size = row.get('size')
+        self.price = row.get('price')
+        self.floor = row.get('floor')
+
+    @property
+    def blockable(self) -> bool:
+        return bool(self.city and self.street and self.rooms and self.size)
+
+
+def block_key(key: ListingKey, size_bucket: int) -> Tuple:
+    # Rooms are compared at half room granularity
+    return (key.city, key.street, round(key.rooms * 2), size_bucket)
+
+
+def relative_gap(a: float, b: float) -> float:
+    return abs(a - b) / max(a, b)
+
+
+def match_score(a: ListingKey, b: ListingKey, config: DedupConfig) -> float:
+    """Score how likely two listings in the same block are one apartment, 0 when they cannot be"""
+    if a.number and b.number and a.number != b.number:
+        return 0.0
+    if a.floor is not None and b.floor is not None and a.floor != b.floor:
+        return 0.0
+    size_gap = relative_gap(a.size, b.size)
+    if size_gap > config.size_tolerance:
+        return 0.0
+
+    score = 0.5 * (1 - size_gap / config.size_tolerance)
+    if a.price and b.price:
+        price_gap = relative_gap(a.price, b.price)
+        if price_gap > config.price_tolerance:
+            return 0.0
+        score += 0.3 * (1 - price_gap / config.price_tolerance)
+    else:
+        # Unknown price neither confirms nor rules out a match
+        score += 0.15
+    if a.floor is not None and a.floor == b.floor:
+        score += 0.1
+    if a.number and a.number == b.number:
+        score += 0.1
+    return score
+
+
+class UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+class DedupEngine:
+    """Groups listings of the same apartment across and within sources
+
+    Listings are blocked by city, street, rooms and size bucket, and only
+    pairs inside a block (or an adjacent size bucket) are scored, so the
+    work grows with the block sizes rather than with n squared.
+    """
+
+    def __init__(self, config: DedupConfig = None):
+        self.config = config or DedupConfig()
+        self.stats = {'listings': 0, 'blocked': 0, 'blocks': 0, 'pairs_compared': 0, 'pairs_matched': 0,
+                      'exact_id_duplicates': 0, 'canonical': 0}
+
+    def build_blocks(self, keys: List[ListingKey]) -> Dict[Tuple, List[ListingKey]]:
+        blocks = defaultdict(list)
+        for key in keys:
+            if key.blockable:
+                blocks[block_key(key, int(key.size // self.config.size_bucket))].append(key)
+        self.stats['blocked'] = sum(len(members) for members in blocks.values())
+        self.stats['blocks'] = len(blocks)
+        return blocks
+
+    def candidate_pairs(self, blocks: Dict[Tuple, List[ListingKey]]) -> Iterable[Tuple[ListingKey, ListingKey]]:
+        """Pairs within each block plus pairs with the next size bucket, each pair once"""
+        for block, members in blocks.items():
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    yield a, b
+            city, street, rooms, bucket = block
+            neighbours = blocks.get((city, street, rooms, bucket + 1), [])
+            for a in members:
+                for b in neighbours:
+                    yield a, b
+
+    def cluster(self, rows: List[Dict[str, Any]]) -> List[List[int]]:
+        """Row indexes grouped per apartment"""
+        self.stats['listings'] = len(rows)
+        clusters = UnionFind(len(rows))
+
+        # The same listing id (a Yad2 king item repeated in the feed, re-scrapes) is always one listing
+        first_by_id = {}
+        for index, row in enumerate(rows):
+            id_key = (row.get('source'), row.get('listing_id'))
+            if id_key[1] is None:
+                continue
+            if id_key in first_by_id:
+                clusters.union(first_by_id[id_key], index)
+                self.stats['exact_id_duplicates'] += 1
+            else:
+                first_by_id[id_key] = index
+
+        keys = [ListingKey(index, row) for index, row in enumerate(rows)]
+        for a, b in self.candidate_pairs(self.build_blocks(keys)):
+            self.stats['pairs_compared'] += 1
+            if match_score(a, b, self.config) >= self.config.min_score:
+                self.stats['pairs_matched'] += 1
+                clusters.union(a.index, b.index)
+
+        groups = defaultdict(list)
+        for index in range(len(rows)):
+            groups[clusters.find(index)].append(index)
+        return list(groups.values())
+
+    def canonical_listing(self, members: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """One row per apartment, with a link to every source listing"""
+        # The most complete record provides the descriptive fields
+        best = max(members, key=lambda r: sum(r.get(f) is not None for f in CANONICAL_FIELDS))
+        canonical = {field: best.get(field) for field in CANONICAL_FIELDS}
+        canonical['street'] = listing_street(best)
+        prices = sorted(r['price'] for r in members if r.get('price'))
+        canonical['price'] = prices[len(prices) // 2] if prices else None
+        canonical['min_price'] = prices[0] if prices else None
+        canonical['max_price'] = prices[-1] if prices else None
+
+        links = {}
+        for row in members:
+            link_key = (row.get('source'), row.get('listing_id'))
+            if link_key not in links:
+                links[link_key] = {
+                    'source': row.get('source'),
+                    'listing_id': row.get('listing_id'),
+                    'link': row.get('link'),
+                    'price': row.get('price')
+                }
+        canonical['sources'] = sorted({row.get('source') for row in members if row.get('source')})
+        canonical['links'] = list(links.values())
+        # Named after its smallest member so the id is stable while the cluster only grows
+        canonical['canonical_id'] = min(f'{source}:{lid}' for source, lid in links)
+        return canonical
+
+    def deduplicate(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        canonical = [self.canonical_listing([rows[i] for i in group]) for group in self.cluster(rows)]
+        self.stats['canonical'] = len(canonical)
+        return canonical
@@ -0,0 +1,111 @@
+from typing import List, Dict, Any
+
+import numpy as np
+import pandas as pd
+
+# Grouping levels from most to least specific; a listing takes the first level with enough samples
+MARKET_LEVELS = [
+    ('neighborhood', ['city', 'neighborhood', 'rooms_bucket']),
+    ('city_rooms', ['city', 'rooms_bucket']),
+    ('city', ['city']),
+]
+
+PERCENTILES = [0.1, 0.25, 0.5, 0.75, 0.9]
+
+# Price per sqm outside this range is a typo or a rental listed as a sale
+MIN_PRICE_PER_SQM = 2000
+MAX_PRICE_PER_SQM = 200000
+MIN_SIZE = 15
+
+
+def prepare(listings: pd.DataFrame) -> pd.DataFrame:
+    """Add price per sqm and a rooms bucket, dropping listings that cannot be priced"""
+    df = listings.copy()
+    price = pd.to_numeric(df['price'], errors='coerce').to_numpy(dtype='float64')
+    size = pd.to_numeric(df['size'], errors='coerce').to_numpy(dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        per_sqm = np.where((price > 0) & (size >= MIN_SIZE), price / size, np.nan)
+    per_sqm[(per_sqm < MIN_PRICE_PER_SQM) | (per_sqm > MAX_PRICE_PER_SQM)] = np.nan
+    df['price_per_sqm'] = per_sqm
+    # 1, 2, 3, 4, 5 and 6+ rooms; half rooms go with the room count below
+    rooms = pd.to_numeric(df['rooms'], errors='coerce')
+    df['rooms_bucket'] = np.clip(np.floor(rooms), 1, 6).astype('Int8')
+    if 'neighborhood' not in df:
+        df['neighborhood'] = None
+    return df
+
+
+def group_stats(df: pd.DataFrame, keys: List[str], trim: float = 0.1) -> pd.DataFrame:
+    """Price per sqm count, percentiles and trimmed mean per group"""
+    priced = df.dropna(subset=['price_per_sqm'] + keys)
+    grouped = priced.groupby(keys, observed=True, sort=False)['price_per_sqm']
+    stats = grouped.quantile(PERCENTILES).unstack()
+    stats.columns = [f'p{int(q * 100)}' for q in PERCENTILES]
+    stats['count'] = grouped.size()
+
+    # Trimmed mean: drop the values outside each group's [trim, 1 - trim] quantiles
+    bounds = grouped.quantile([trim, 1 - trim]).unstack()
+    bounds.columns = ['low', 'high']
+    joined = priced[keys + ['price_per_sqm']].join(bounds, on=keys)
+    inside = joined[(joined['price_per_sqm'] >= joined['low']) & (joined['price_per_sqm'] <= joined['high'])]
+    stats['trimmed_mean'] = inside.groupby(keys, observed=True, sort=False)['price_per_sqm'].mean()
+    # Groups too small to trim keep their plain mean
+    stats['trimmed_mean'] = stats['trimmed_mean'].fillna(grouped.mean())
+    stats = stats.rename(columns={'p50': 'median'})
+    return stats.reset_index()
+
+
+def market_stats(listings: pd.DataFrame, trim: float = 0.1) -> Dict[str, pd.DataFrame]:
+    """Statistics table of every grouping level"""
+    df = prepare(listings)
+    return {level: group_stats(df, keys, trim) for level, keys in MARKET_LEVELS}
+
+
+def enrich(listings: pd.DataFrame, min_samples: int = 5, trim: float = 0.1) -> pd.DataFrame:
+    """Attach the market price per sqm to every listing
+
+    pricePerMeterAverage is the trimmed mean of the most specific group
+    (city/neighborhood/rooms, then city/rooms, then city) holding at least
+    min_samples priced listings.
+    """
+    df = prepare(listings)
+    df['pricePerMeterAverage'] = np.nan
+    df['pricePerMeterMedian'] = np.nan
+    df['marketLevel'] = None
+    df['marketSampleSize'] = 0
+
+    for level, keys in MARKET_LEVELS:
+        stats = group_stats(df, keys, trim)
+        stats = stats[stats['count'] >= min_samples]
+        matched = df[keys].merge(stats[keys + ['trimmed_mean', 'median', 'count']], on=keys, how='left')
+        # Only fill listings a more specific level did not already price
+        fill = df['pricePerMeterAverage'].isna().to_numpy() & matched['trimmed_mean'].notna().to_numpy()
+        df.loc[fill, 'pricePerMeterAverage'] = matched.loc[fill, 'trimmed_mean'].to_numpy()
+        df.loc[fill, 'pricePerMeterMedian'] = matched.loc[fill, 'median'].to_numpy()
+        df.loc[fill, 'marketLevel'] = level
+        df.loc[fill, 'marketSampleSize'] = matched.loc[fill, 'count'].to_numpy()
+
+    df['pricePerMeterActual'] = df['price_per_sqm']
+    return df
+
+
+def to_property_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Records in the shape of the Property interface in src/app/types/property.ts"""
+    priced = df.dropna(subset=['pricePerMeterActual', 'pricePerMeterAverage'])
+    out = pd.DataFrame({
+        'id': priced.get('listing_id'),
+        'city': priced['city'],
+        'neighborhood': priced['neighborhood'],
+        'size': priced['size'].astype('float64'),
+        'rooms': priced['rooms'].astype('float64'),
+        'condition': priced.get('property_type'),
+        'requestedPrice': priced['price'].astype('float64'),
+        'pricePerMeterActual': priced['pricePerMeterActual'].round(2),
+        'pricePerMeterAverage': priced['pricePerMeterAverage'].round(2),
+        'url': priced.get('link'),
+        'timestamp': pd.to_datetime(priced.get('scraped_at')).dt.strftime('%Y-%m-%dT%H:%M:%S')
+        if 'scraped_at' in priced else None,
+        'marketLevel': priced['marketLevel'],
+        'marketSampleSize': priced['marketSampleSize'],
+    })
+    return out.astype(object).where(out.notna(), None).to_dict('records')
@@ -0,0 +1,154 @@
+import asyncio
+import random
+import time
+from typing import List, Dict, Any
+
+from playwright.async_api import Page
+
+from stageTimings import PageSpans
+
+# Resolves once the number of elements matching the selector has been non-zero
+# and unchanged for quietMs, or when timeoutMs runs out
+LISTINGS_SETTLED_SCRIPT = """
+    ({ selector, quietMs, timeoutMs }) => new Promise(resolve => {
+        const started = performance.now();
+        const countNow = () => document.querySelectorAll(selector).length;
+        let count = countNow();
+        let quietTimer = null;
+        let hardTimer = null;
+        let observer = null;
+        const done = (reason) => {
+            if (observer) observer.disconnect();
+            clearTimeout(quietTimer);
+            clearTimeout(hardTimer);
+            resolve({ count: countNow(), reason, elapsedMs: performance.now() - started });
+        };
+        const arm = () => {
+            clearTimeout(quietTimer);
+            quietTimer = setTimeout(() => countNow() > 0 ? done('stable') : arm(), quietMs);
+        };
+        observer = new MutationObserver(() => {
+            const current = countNow();
+            if (current !== count) {
+                count = current;
+                arm();
+            }
+        });
+        observer.observe(document.documentElement, { childList: true, subtree: true });
+        hardTimer = setTimeout(() => done('timeout'), timeoutMs);
+        arm();
+    })
+"""
+
+
+class WaitConfig:
+    """Upper bounds and quiet periods for signal based waits"""
+
+    def __init__(self, quiet_ms: int = 400, settle_timeout: float = 5.0, response_timeout: float = 10.0):
+        self.quiet_ms = quiet_ms
+        self.settle_timeout = settle_timeout
+        self.response_timeout = response_timeout
+
+
+class PageWaits:
+    """Signal based waits for one page, timing how long the page spent waiting"""
+
+    def __init__(self, label: str, config: WaitConfig, stats: 'WaitStats' = None, spans: PageSpans = None):
+        self.label = label
+        self.config = config
+        self.stats = stats
+        # Waits also count as the 'wait' stage of the page's timing spans
+        self.spans = spans
+        self.started = time.perf_counter()
+        self.waited = 0.0
+        self.waits: Dict[str, float] = {}
+
+    def add_wait(self, kind: str, seconds: float):
+        self.waited += seconds
+        self.waits[kind] = self.waits.get(kind, 0.0) + seconds
+        if self.spans:
+            self.spans.add('wait', seconds)
+
+    async def listings_settled(self, page: Page, selector: str, quiet_ms: int = None, timeout: float = None) -> int:
+        """Wait until the listing count stops changing and return it"""
+        quiet_ms = quiet_ms if quiet_ms is not None else self.config.quiet_ms
+        timeout = timeout if timeout is not None else self.config.settle_timeout
+        started = time.perf_counter()
+        try:
+            result = await page.evaluate(LISTINGS_SETTLED_SCRIPT, {
+                'selector': selector,
+                'quietMs': quiet_ms,
+                'timeoutMs': int(timeout * 1000)
+            })
+            return result['count']
+        except Exception as e:
+            print(f"Error waiting for listings to settle: {str(e)}")
+            return 0
+        finally:
+            self.add_wait('settle', time.perf_counter() - started)
+
+    async def selector(self, page: Page, selector: str, timeout: float = None) -> bool:
+        """Wait for an element to become visible"""
+        timeout = timeout if timeout is not None else self.config.settle_timeout
+        started = time.perf_counter()
+        try:
+            await page.locator(selector).first.wait_for(state="visible", timeout=timeout * 1000)
+            return True
+        except Exception:
+            return False
+        finally:
+            self.add_wait('selector', time.perf_counter() - started)
+
+    async def load_state(self, page: Page, state: str = "load", timeout: float = None) -> bool:
+        """Wait for the page to reach a load state"""
+        timeout = timeout if timeout is not None else self.config.response_timeout
+        started = time.perf_counter()
+        try:
+            await page.wait_for_load_state(state, timeout=timeout * 1000)
+            return True
+        except Exception:
+            return False
+        finally:
+            self.add_wait('load_state', time.perf_counter() - started)
+
+    async def sleep(self, min_seconds: float, max_seconds: float):
+        """Fixed random pause, for the few places that have no signal to wait on"""
+        delay = random.uniform(min_seconds, max_seconds)
+        await asyncio.sleep(delay)
+        self.add_wait('sleep', delay)
+
+    def finish(self) -> Dict[str, Any]:
+        """Close the page's accounting and print waiting vs. working time"""
+        total = time.perf_counter() - self.started
+        summary = {
+            'page': self.label,
+            'total_seconds': round(total, 3),
+            'waiting_seconds': round(self.waited, 3),
+            'working_seconds': round(max(total - self.waited, 0.0), 3),
+            'waits': {k: round(v, 3) for k, v in self.waits.items()}
+        }
+        print(f"{self.label}: {summary['waiting_seconds']}s waiting, {summary['working_seconds']}s working")
+        if self.stats:
+            self.stats.pages.append(summary)
+        return summary
+
+
+class WaitStats:
+    """Per-run collection of page wait summaries"""
+
+    def __init__(self, config: WaitConfig = None):
+        self.config = config or WaitConfig()
+        self.pages: List[Dict[str, Any]] = []
+
+    def begin_page(self, label: str, spans: PageSpans = None) -> PageWaits:
+        return PageWaits(label, self.config, self, spans)
+
+    def summary(self) -> Dict[str, Any]:
+        waiting = sum(p['waiting_seconds'] for p in self.pages)
+        working = sum(p['working_seconds'] for p in self.pages)
+        return {
+            'pages': len(self.pages),
+            'waiting_seconds': round(waiting, 1),
+            'working_seconds': round(working, 1),
+            'waiting_share': round(waiting / (waiting + working), 3) if waiting + working else 0.0
+        }
@@ -0,0 +1,229 @@
+import asyncio
+from typing import List, Dict, Any, Optional
+
+from playwright.async_api import async_playwright, Page, Browser, BrowserContext, Playwright
+
+# Launch arguments shared by every scraper browser
+DEFAULT_LAUNCH_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--disable-features=IsolateOrigins,site-per-process',
+    '--disable-site-isolation-trials',
+    '--disable-web-security',
+    '--disable-features=BlockInsecurePrivateNetworkRequests'
+]
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+class ContextProfile:
+    """Settings used to create browser contexts for one scraper"""
+
+    def __init__(self, name: str, context_options: Dict[str, Any] = None,
+                 extra_http_headers: Dict[str, str] = None, init_scripts: List[str] = None,
+                 default_timeout: Optional[float] = None):
+        self.name = name
+        self.context_options = context_options or {}
+        self.extra_http_headers = extra_http_headers or {}
+        self.init_scripts = init_scripts or []
+        self.default_timeout = default_timeout
+
+
+class PooledContext:
+    """A browser context owned by the pool together with its usage counters"""
+
+    def __init__(self, pooled_browser: 'PooledBrowser', context: BrowserContext, profile: ContextProfile):
+        self.pooled_browser = pooled_browser
+        self.context = context
+        self.profile = profile
+        self.navigations = 0
+        self.leases = 0
+
+    def is_healthy(self) -> bool:
+        return self.pooled_browser.is_healthy()
+
+
+class PooledBrowser:
+    """A launched browser process and the number of contexts it currently holds"""
+
+    def __init__(self, browser: Browser):
+        self.browser = browser
+        self.open_contexts = 0
+
+    def is_healthy(self) -> bool:
+        return self.browser.is_connected()
+
+
+class BrowserPool:
+    """Bounded pool of N browsers x M contexts that scrapers borrow pages from"""
+
+    def __init__(self, max_browsers: int = 2, contexts_per_browser: int = 4,
+                 max_navigations_per_context: int = 50, launch_options: Dict[str, Any] = None):
+        self.max_browsers = max_browsers
+        self.contexts_per_browser = contexts_per_browser
+        self.max_navigations_per_context = max_navigations_per_context
+        self.launch_options = launch_options or {'headless': True, 'args': DEFAULT_LAUNCH_ARGS}
+
+        self._playwright: Playwright = None
+        self._browsers: List[PooledBrowser] = []
+        self._idle_contexts: Dict[str, List[PooledContext]] = {}
+        self._leased_pages: Dict[Page, PooledContext] = {}
+        self._slots = asyncio.Semaphore(max_browsers * contexts_per_browser)
+        self._lock = asyncio.Lock()
+        # Held while the driver starts, so concurrent first acquires share one driver
+        self._start_lock = asyncio.Lock()
+        self._closed = False
+
+        self.stats = {
+            'browsers_launched': 0,
+            'contexts_created': 0,
+            'contexts_recycled': 0,
+            'contexts_reused': 0,
+            'unhealthy_browsers': 0,
+            'pages_leased': 0
+        }
+
+    async def start(self):
+        """Start the playwright driver (idempotent, safe to call concurrently)"""
+        if self._playwright is not None:
+            return
+        async with self._start_lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+                self._closed = False
+
+    async def _launch_browser(self) -> PooledBrowser:
+        print(f"Launching pooled browser {len(self._browsers) + 1}/{self.max_browsers}...")
+        browser = await self._playwright.chromium.launch(**self.launch_options)
+        pooled_browser = PooledBrowser(browser)
+        self._browsers.append(pooled_browser)
+        self.stats['browsers_launched'] += 1
+        return pooled_browser
+
+    async def _drop_unhealthy_browsers(self):
+        for pooled_browser in list(self._browsers):
+            if not pooled_browser.is_healthy():
+                print("Dropping disconnected browser from pool")
+                self._browsers.remove(pooled_browser)
+                self.stats['unhealthy_browsers'] += 1
+                for name, idle in self._idle_contexts.items():
+                    self._idle_contexts[name] = [c for c in idle if c.pooled_browser is not pooled_browser]
+
+    async def _pick_browser(self) -> PooledBrowser:
+        await self._drop_unhealthy_browsers()
+        candidates = [b for b in self._browsers if b.open_contexts < self.contexts_per_browser]
+        if candidates:
+            return min(candidates, key=lambda b: b.open_contexts)
+        if len(self._browsers) < self.max_browsers:
+            return await self._launch_browser()
+        # Every browser is full of idle contexts from other profiles - evict one
+        for name, idle in self._idle_contexts.items():
+            if idle:
+                pooled_context = idle.pop(0)
+                await self._close_context(pooled_context)
+                return pooled_context.pooled_browser
+        raise RuntimeError("Browser pool exhausted")
+
+    async def _create_context(self, profile: ContextProfile) -> PooledContext:
+        pooled_browser = await self._pick_browser()
+        context = await pooled_browser.browser.new_context(**profile.context_options)
+        if profile.extra_http_headers:
+            await context.set_extra_http_headers(profile.extra_http_headers)
+        for script in profile.init_scripts:
+            await context.add_init_script(script)
+        if profile.default_timeout is not None:
+            context.set_default_timeout(profile.default_timeout)
+        pooled_browser.open_contexts += 1
+        self.stats['contexts_created'] += 1
+        return PooledContext(pooled_browser, context, profile)
+
+    async def _close_context(self, pooled_context: PooledContext):
+        pooled_context.pooled_browser.open_contexts -= 1
+        try:
+            await pooled_context.context.close()
+        except Exception as e:
+            print(f"Error closing pooled context: {str(e)}")
+
+    async def acquire_page(self, profile: ContextProfile) -> Page:
+        """Borrow a fresh page from a pooled context matching the profile"""
+        if self._closed:
+            raise RuntimeError("Browser pool is closed")
+        await self.start()
+        await self._slots.acquire()
+        try:
+            async with self._lock:
+                pooled_context = None
+                idle = self._idle_contexts.setdefault(profile.name, [])
+                while idle:
+                    candidate = idle.pop()
+                    if candidate.is_healthy():
+                        pooled_context = candidate
+                        self.stats['contexts_reused'] += 1
+                        break
+                    await self._close_context(candidate)
+                if pooled_context is None:
+                    pooled_context = await self._create_context(profile)
+
+            page = await pooled_context.context.new_page()
+        except Exception:
+            self._slots.release()
+            raise
+
+        def count_navigation(frame):
+            if frame == page.main_frame:
+                pooled_context.navigations += 1
+
+        page.on("framenavigated", count_navigation)
+        pooled_context.leases += 1
+        self._leased_pages[page] = pooled_context
+        self.stats['pages_leased'] += 1
+        return page
+
+    async def release_page(self, page: Page):
+        """Return a borrowed page; its context is recycled once it is worn out"""
+        pooled_context = self._leased_pages.pop(page, None)
+        if pooled_context is None:
+            return
+        try:
+            try:
+                await page.close()
+            except Exception as e:
+                print(f"Error closing pooled page: {str(e)}")
+
+            async with self._lock:
+                worn_out = pooled_context.navigations >= self.max_navigations_per_context
+                if self._closed or worn_out or not pooled_context.is_healthy():
+                    if worn_out:
+                        print(f"Recycling context after {pooled_context.navigations} navigations")
+                        self.stats['contexts_recycled'] += 1
+                    await self._close_context(pooled_context)
+                else:
+                    self._idle_contexts.setdefault(pooled_context.profile.name, []).append(pooled_context)
+        finally:
+            self._slots.release()
+
+    async def close(self):
+        """Close every context and browser and stop the playwright driver"""
+        self._closed = True
+        for page in list(self._leased_pages):
+            await self.release_page(page)
+        for idle in self._idle_contexts.values():
+            for pooled_context in idle:
+                await self._close_context(pooled_context)
+        self._idle_contexts = {}
+        for pooled_browser in self._browsers:
+            try:
+                await pooled_browser.browser.close()
+            except Exception as e:
+                print(f"Error closing pooled browser: {str(e)}")
+        self._browsers = []
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        print(f"Browser pool closed: {self.stats}")
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -0,0 +1,163 @@
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from typing import List, Dict, Any, Optional, Iterable, Set
+
+DEFAULT_CHECKPOINT_PATH = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data', 'crawl_checkpoints.sqlite')
+
+# Yad2 item links look like /realestate/item/<token>
+YAD2_ITEM_TOKEN = re.compile(r'/item/([A-Za-z0-9]+)')
+
+
+def listing_id(record: Dict[str, Any]) -> str:
+    """Stable id of a scraped listing
+
+    Madlan bulletin ids and Yad2 item tokens are used when present; other
+    records fall back to a hash of the fields that identify a listing. The
+    price is left out of the hash so a price change keeps the same id.
+    """
+    if record.get('bulletin_id'):
+        return str(record['bulletin_id'])
+    link = record.get('link')
+    if link:
+        match = YAD2_ITEM_TOKEN.search(link)
+        return match.group(1) if match else link
+    key = '|'.join(str(record.get(field, '')) for field in
+                   ('title', 'street', 'address', 'location', 'neighborhood', 'rooms', 'size', 'floor'))
+    return 'h:' + hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+
+class CrawlCheckpoint:
+    """SQLite store of per-source/per-city crawl progress
+
+    After every completed page the page number, the URL of the next page and
+    the ids of the listings seen so far are recorded, so a crashed or
+    rate-limited crawl can resume instead of starting again from page 1.
+    Checkpoints are cleared once a crawl finishes and ignored once they are
+    older than max_age_hours, since result pages shift over time.
+    """
+
+    def __init__(self, path: str = None, max_age_hours: float = 24.0):
+        self.path = path or DEFAULT_CHECKPOINT_PATH
+        self.max_age_hours = max_age_hours
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                source TEXT NOT NULL,
+                city TEXT NOT NULL,
+                last_page INTEGER NOT NULL,
+                next_url TEXT,
+                records INTEGER NOT NULL DEFAULT 0,
+                started_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (source, city)
+            );
+            CREATE TABLE IF NOT EXISTS seen_listings (
+                source TEXT NOT NULL,
+                city TEXT NOT NULL,
+                listing_id TEXT NOT NULL,
+                PRIMARY KEY (source, city, listing_id)
+            );
+        """)
+        self.conn.commit()
+
+    def load(self, source: str, city: str) -> Optional[Dict[str, Any]]:
+        """Return the unfinished checkpoint of a crawl, or None to start from page 1"""
+        row = self.conn.execute(
+            'SELECT last_page, next_url, records, started_at, updated_at FROM checkpoints WHERE source = ? AND city = ?',
+            (source, city)).fetchone()
+        if not row:
+            return None
+        last_page, next_url, records, started_at, updated_at = row
+        if time.time() - updated_at > self.max_age_hours * 3600:
+            print(f"Ignoring stale {source} checkpoint for {city} (page {last_page})")
+            self.clear(source, city)
+            return None
+        return {
+            'last_page': last_page,
+            'next_url': next_url,
+            'records': records,
+            'started_at': started_at,
+            'updated_at': updated_at
+        }
+
+    def seen_ids(self, source: str, city: str) -> Set[str]:
+        rows = self.conn.execute('SELECT listing_id FROM seen_listings WHERE source = ? AND city = ?', (source, city))
+        return {row[0] for row in rows}
+
+    def page_done(self, source: str, city: str, page_number: int, next_url: Optional[str], listing_ids: Iterable[str], records: int):
+        """Record a completed page in one transaction"""
+        now = time.time()
+        with self.conn:
+            self.conn.execute("""
+                INSERT INTO checkpoints (source, city, last_page, next_url, records, started_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (source, city) DO UPDATE SET
+                    last_page = excluded.last_page,
+                    next_url = excluded.next_url,
+                    records = checkpoints.records + excluded.records,
+                    updated_at = excluded.updated_at
+            """, (source, city, page_number, next_url, records, now, now))
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO seen_listings (source, city, listing_id) VALUES (?, ?, ?)',
+                ((source, city, lid) for lid in listing_ids))
+
+    def clear(self, source: str, city: str):
+        """Forget a crawl, called once it has reached its last page"""
+        with self.conn:
+            self.conn.execute('DELETE FROM checkpoints WHERE source = ? AND city = ?', (source, city))
+            self.conn.execute('DELETE FROM seen_listings WHERE source = ? AND city = ?', (source, city))
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        """Every crawl that has a checkpoint, for reporting"""
+        rows = self.conn.execute('SELECT source, city, last_page, records, updated_at FROM checkpoints ORDER BY updated_at')
+        return [{'source': s, 'city': c, 'last_page': p, 'records': r, 'updated_at': u} for s, c, p, r, u in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+class CrawlProgress:
+    """Checkpointing for one crawl: resume point, duplicate filtering and page bookkeeping"""
+
+    def __init__(self, checkpoint: Optional[CrawlCheckpoint], source: str, city: str):
+        self.checkpoint = checkpoint
+        self.source = source
+        self.city = city
+        self.resumed_from = checkpoint.load(source, city) if checkpoint else None
+        self.seen = checkpoint.seen_ids(source, city) if self.resumed_from else set()
+        if self.resumed_from:
+            print(f"Resuming {source} crawl of {city} after page {self.resumed_from['last_page']} "
+                  f"({self.resumed_from['records']} records already saved)")
+
+    @property
+    def start_page(self) -> int:
+        return self.resumed_from['last_page'] + 1 if self.resumed_from else 1
+
+    @property
+    def next_url(self) -> Optional[str]:
+        return self.resumed_from['next_url'] if self.resumed_from else None
+
+    def new_records(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop listings already saved earlier in this crawl (pages shift while we are away)"""
+        fresh = []
+        for record in records:
+            lid = listing_id(record)
+            if lid in self.seen:
+                continue
+            self.seen.add(lid)
+            fresh.append(record)
+        return fresh
+
+    def page_done(self, page_number: int, next_url: Optional[str], records: List[Dict[str, Any]]):
+        if self.checkpoint:
+            self.checkpoint.page_done(self.source, self.city, page_number, next_url,
+                                      [listing_id(r) for r in records], len(records))
+
+    def finish(self):
+        if self.checkpoint:
+            self.checkpoint.clear(self.source, self.city)
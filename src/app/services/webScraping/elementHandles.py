@@ -0,0 +1,87 @@
+from typing import List, Dict, Any, Optional
+
+from playwright.async_api import Page
+
+# Visibility the way Playwright judges it: laid out and not hidden by CSS
+VISIBLE_JS = "(el) => !!el && !!el.getClientRects().length && getComputedStyle(el).visibility !== 'hidden'"
+
+COUNT_SCRIPT = "(selector) => document.querySelectorAll(selector).length"
+
+# The first match's visibility and requested attribute, without handing an element back to the driver
+MATCH_STATE_SCRIPT = f"""
+    ({{ selector, attribute }}) => {{
+        const el = document.querySelector(selector);
+        if (!el) return null;
+        return {{
+            visible: ({VISIBLE_JS})(el),
+            attribute: attribute ? el.getAttribute(attribute) : null
+        }};
+    }}
+"""
+
+# Running totals of the handles created and disposed through HandleScope, across all scopes
+HANDLE_STATS: Dict[str, int] = {'tracked': 0, 'disposed': 0}
+
+
+async def count_elements(page: Page, selector: str) -> int:
+    """Number of elements matching the selector, counted in the page instead of through handles"""
+    return await page.evaluate(COUNT_SCRIPT, selector)
+
+
+async def match_state(page: Page, selector: str, attribute: str = None) -> Optional[Dict[str, Any]]:
+    """Whether the first match is visible and the value of one of its attributes, or None when nothing matches"""
+    return await page.evaluate(MATCH_STATE_SCRIPT, {'selector': selector, 'attribute': attribute})
+
+
+async def dispose_all(handles: List[Any]) -> int:
+    """Release element handles in the driver and the renderer, ignoring ones that are already gone"""
+    disposed = 0
+    for handle in handles:
+        try:
+            await handle.dispose()
+            disposed += 1
+        except Exception:
+            # The page navigated or closed, which released the handle already
+            pass
+    return disposed
+
+
+class HandleScope:
+    """Collects the element handles created in a block and disposes them when it exits
+
+    A handle stays alive in the driver and pins its element in the renderer
+    until it is disposed, so handles that are only dropped on the Python side
+    pile up for as long as the page is kept open.
+
+        async with HandleScope() as scope:
+            for card in scope.track(await page.query_selector_all(selector)):
+                ...
+    """
+
+    def __init__(self):
+        self.handles: List[Any] = []
+
+    def track(self, handles):
+        """Register a handle, a list of handles or None, and return it unchanged"""
+        if handles is None:
+            return handles
+        added = handles if isinstance(handles, list) else [handles]
+        self.handles.extend(added)
+        HANDLE_STATS['tracked'] += len(added)
+        return handles
+
+    async def dispose(self):
+        handles, self.handles = self.handles, []
+        HANDLE_STATS['disposed'] += await dispose_all(handles)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.dispose()
+        return False
+
+
+def handle_stats_summary() -> str:
+    leaked = HANDLE_STATS['tracked'] - HANDLE_STATS['disposed']
+    return f"Element handles: {HANDLE_STATS['tracked']} tracked, {HANDLE_STATS['disposed']} disposed, {leaked} not disposed"
@@ -0,0 +1,157 @@
+import os
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional
+
+# Backends in order of preference when none is configured
+PARSER_PREFERENCE = ['selectolax', 'lxml', 'bs4']
+
+
+class HtmlNode(ABC):
+    """Minimal element interface the extraction code is written against"""
+
+    @abstractmethod
+    def select(self, css: str) -> List['HtmlNode']:
+        ...
+
+    def select_one(self, css: str) -> Optional['HtmlNode']:
+        found = self.select(css)
+        return found[0] if found else None
+
+    @abstractmethod
+    def text(self) -> str:
+        ...
+
+    @abstractmethod
+    def attr(self, name: str) -> Optional[str]:
+        ...
+
+
+class SoupNode(HtmlNode):
+    def __init__(self, node):
+        self.node = node
+
+    def select(self, css: str) -> List[HtmlNode]:
+        return [SoupNode(n) for n in self.node.select(css)]
+
+    def select_one(self, css: str) -> Optional[HtmlNode]:
+        found = self.node.select_one(css)
+        return SoupNode(found) if found is not None else None
+
+    def text(self) -> str:
+        return self.node.get_text()
+
+    def attr(self, name: str) -> Optional[str]:
+        value = self.node.get(name)
+        if isinstance(value, list):
+            return ' '.join(value)
+        return value
+
+
+class LxmlNode(HtmlNode):
+    # Compiled CSS selectors, translating to XPath on every call dominates otherwise
+    _compiled: Dict[str, Any] = {}
+
+    def __init__(self, node):
+        self.node = node
+
+    def select(self, css: str) -> List[HtmlNode]:
+        selector = self._compiled.get(css)
+        if selector is None:
+            from lxml.cssselect import CSSSelector
+            selector = self._compiled[css] = CSSSelector(css)
+        return [LxmlNode(n) for n in selector(self.node)]
+
+    def text(self) -> str:
+        return self.node.text_content()
+
+    def attr(self, name: str) -> Optional[str]:
+        return self.node.get(name)
+
+
+class SelectolaxNode(HtmlNode):
+    def __init__(self, node):
+        self.node = node
+
+    def select(self, css: str) -> List[HtmlNode]:
+        return [SelectolaxNode(n) for n in self.node.css(css)]
+
+    def select_one(self, css: str) -> Optional[HtmlNode]:
+        found = self.node.css_first(css)
+        return SelectolaxNode(found) if found is not None else None
+
+    def text(self) -> str:
+        return self.node.text(deep=True)
+
+    def attr(self, name: str) -> Optional[str]:
+        return self.node.attributes.get(name)
+
+
+class ParserBackend(ABC):
+    """Parses an HTML document into an HtmlNode root"""
+    name = 'base'
+
+    @abstractmethod
+    def parse(self, html: str) -> HtmlNode:
+        ...
+
+
+class SoupBackend(ParserBackend):
+    name = 'bs4'
+
+    def __init__(self):
+        from bs4 import BeautifulSoup
+        self._soup = BeautifulSoup
+
+    def parse(self, html: str) -> HtmlNode:
+        return SoupNode(self._soup(html, 'html.parser'))
+
+
+class LxmlBackend(ParserBackend):
+    name = 'lxml'
+
+    def __init__(self):
+        import lxml.html
+        import cssselect  # noqa: F401 - required by lxml.cssselect
+        self._fromstring = lxml.html.document_fromstring
+
+    def parse(self, html: str) -> HtmlNode:
+        return LxmlNode(self._fromstring(html))
+
+
+class SelectolaxBackend(ParserBackend):
+    name = 'selectolax'
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser = LexborHTMLParser
+
+    def parse(self, html: str) -> HtmlNode:
+        return SelectolaxNode(self._parser(html).root)
+
+
+BACKENDS = {
+    'bs4': SoupBackend,
+    'lxml': LxmlBackend,
+    'selectolax': SelectolaxBackend
+}
+
+
+def get_parser_backend(name: str = None) -> ParserBackend:
+    """Return the configured backend, falling back to the next installed one
+
+    The name comes from the argument or the SCRAPER_HTML_PARSER environment
+    variable; without either the fastest installed backend is used.
+    """
+    name = name or os.environ.get('SCRAPER_HTML_PARSER')
+    candidates = [name] if name else []
+    candidates += [n for n in PARSER_PREFERENCE if n not in candidates]
+
+    for candidate in candidates:
+        if candidate not in BACKENDS:
+            print(f"Unknown HTML parser backend: {candidate}")
+            continue
+        try:
+            return BACKENDS[candidate]()
+        except ImportError as e:
+            print(f"HTML parser backend {candidate} not available: {str(e)}")
+    raise ImportError("No HTML parser backend is installed")
@@ -0,0 +1,99 @@
+import time
+from typing import Dict, Optional
+
+from browserPool import DEFAULT_USER_AGENT
+from rateLimiter import HostRateLimiter
+
+try:
+    import brotli  # noqa: F401 - httpx decodes br responses only when brotli is installed
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+DEFAULT_HEADERS = {
+    'User-Agent': DEFAULT_USER_AGENT,
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'he-IL,he;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Accept-Encoding': ACCEPT_ENCODING
+}
+
+# Consecutive pages without listings after which a service stops trying plain HTTP for the run
+# (the site is serving a bot check instead of the listings)
+HTTP_FALLBACK_LIMIT = 3
+
+
+class FetchedPage:
+    """A page fetched without a browser"""
+
+    def __init__(self, url: str, status: int, html: str, http_version: str, seconds: float, size_bytes: int):
+        self.url = url
+        self.status = status
+        self.html = html
+        self.http_version = http_version
+        self.seconds = seconds
+        self.size_bytes = size_bytes
+
+
+class HttpFetcher:
+    """Fetches server-rendered pages over pooled keep-alive connections, HTTP/2 when the server offers it
+
+    One client is shared by every page of a run so connections, TLS sessions
+    and cookies are reused instead of paying for a Chromium render per page.
+    """
+
+    def __init__(self, rate_limiter: HostRateLimiter = None, max_connections: int = 8, timeout: float = 20.0,
+                 http2: bool = True, headers: Dict[str, str] = None):
+        # Imported here so httpx is only needed when the HTTP path is enabled
+        import httpx
+        self.rate_limiter = rate_limiter
+        self.client = httpx.AsyncClient(
+            http2=http2,
+            headers={**DEFAULT_HEADERS, **(headers or {})},
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+            follow_redirects=True
+        )
+        self.stats = {'requests': 0, 'errors': 0, 'http2_responses': 0, 'bytes': 0, 'seconds': 0.0}
+
+    async def fetch(self, url: str) -> Optional[FetchedPage]:
+        """GET the page, or None when the request itself failed"""
+        if self.rate_limiter:
+            await self.rate_limiter.wait(url)
+        started = time.perf_counter()
+        try:
+            response = await self.client.get(url)
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"HTTP fetch of {url} failed: {str(e)}")
+            return None
+        elapsed = time.perf_counter() - started
+        self.stats['requests'] += 1
+        self.stats['bytes'] += len(response.content)
+        self.stats['seconds'] += elapsed
+        if response.http_version == 'HTTP/2':
+            self.stats['http2_responses'] += 1
+        return FetchedPage(str(response.url), response.status_code, response.text, response.http_version,
+                           elapsed, len(response.content))
+
+    def summary(self) -> str:
+        requests = self.stats['requests']
+        mean_ms = self.stats['seconds'] / requests * 1000 if requests else 0.0
+        return (f"HTTP fetcher: {requests} requests ({self.stats['http2_responses']} over HTTP/2), "
+                f"{self.stats['errors']} errors, {self.stats['bytes'] / 1024 / 1024:.1f} MB, {mean_ms:.0f} ms/request")
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+def fetch_paths_summary(fetch_paths: Dict[str, int]) -> str:
+    """Per-run breakdown of which path served the listing pages"""
+    pages = fetch_paths['http'] + fetch_paths['browser']
+    share = fetch_paths['http'] / pages if pages else 0.0
+    return (f"Pages served: {fetch_paths['http']} over HTTP, {fetch_paths['browser']} by the browser "
+            f"({fetch_paths['fallback']} after HTTP found no listings), {share:.0%} without a browser")
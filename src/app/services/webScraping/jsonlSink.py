@@ -0,0 +1,122 @@
+import glob
+import json
+import os
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Iterator, Iterable, Optional, Union
+
+
+class JsonlSink:
+    """Appends scraped records to NDJSON files page by page
+
+    Every page is flushed as soon as it is written and fsynced in batches,
+    so a crash loses at most the last unsynced batch. Files are rotated once
+    they grow past max_bytes.
+    """
+
+    def __init__(self, directory: str, prefix: str, max_bytes: int = 64 * 1024 * 1024,
+                 fsync_every_pages: int = 5, fsync_interval: float = 5.0):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.fsync_every_pages = fsync_every_pages
+        self.fsync_interval = fsync_interval
+        self.timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.files: List[str] = []
+        self.records_written = 0
+        self.pages_written = 0
+        self.first_record: Optional[Dict[str, Any]] = None
+        self._file = None
+        self._pages_since_sync = 0
+        self._last_sync = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+
+    def _open_next_file(self):
+        self._close_file()
+        part = len(self.files) + 1
+        filename = f'{self.prefix}_{self.timestamp}.jsonl' if part == 1 else f'{self.prefix}_{self.timestamp}_part{part:03d}.jsonl'
+        path = os.path.join(self.directory, filename)
+        self._file = open(path, 'a', encoding='utf-8')
+        self.files.append(path)
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pages_since_sync = 0
+        self._last_sync = time.monotonic()
+
+    def _close_file(self):
+        if self._file:
+            self._sync()
+            self._file.close()
+            self._file = None
+
+    def write_page(self, records: List[Dict[str, Any]]):
+        """Append one page of records"""
+        if not records:
+            return
+        if self._file is None:
+            self._open_next_file()
+        if self.first_record is None:
+            self.first_record = records[0]
+
+        self._file.write(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records))
+        self._file.flush()
+        self.records_written += len(records)
+        self.pages_written += 1
+        self._pages_since_sync += 1
+
+        if (self._pages_since_sync >= self.fsync_every_pages
+                or time.monotonic() - self._last_sync >= self.fsync_interval):
+            self._sync()
+        if self._file.tell() >= self.max_bytes:
+            self._open_next_file()
+
+    def close(self):
+        self._close_file()
+
+    def records(self) -> 'StreamedRecords':
+        """Lazy view of everything this sink has written"""
+        return StreamedRecords(list(self.files), self.records_written)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_jsonl(paths: Union[str, Iterable[str]]) -> Iterator[Dict[str, Any]]:
+    """Lazily yield records from NDJSON files (a path, a glob pattern or a list of paths)
+
+    A truncated last line, as left by a crashed run, is skipped.
+    """
+    if isinstance(paths, str):
+        paths = sorted(glob.glob(paths)) if glob.has_magic(paths) else [paths]
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Skipping unreadable line {line_number} in {path}")
+
+
+class StreamedRecords:
+    """List-like handle on a streamed run: supports len() and iteration without loading everything"""
+
+    def __init__(self, files: List[str], count: int):
+        self.files = files
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter_jsonl(self.files)
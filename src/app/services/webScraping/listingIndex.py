@@ -0,0 +1,113 @@
+import os
+import sqlite3
+import time
+from typing import List, Dict, Any, Optional
+
+from crawlCheckpoint import listing_id
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data', 'listing_index.sqlite')
+
+
+class PageDelta:
+    """How one scraped page compares to the listing index"""
+
+    def __init__(self):
+        self.new: List[Dict[str, Any]] = []
+        self.changed: List[Dict[str, Any]] = []
+        self.unchanged = 0
+
+    @property
+    def records(self) -> List[Dict[str, Any]]:
+        """New and changed listings, the ones an incremental crawl emits"""
+        return self.new + self.changed
+
+    @property
+    def fully_known(self) -> bool:
+        """Every listing on the page was already indexed at the same price"""
+        return self.unchanged > 0 and not self.new and not self.changed
+
+    def __str__(self) -> str:
+        return f"{len(self.new)} new, {len(self.changed)} changed, {self.unchanged} unchanged"
+
+
+class ListingIndex:
+    """Persistent index of every listing seen per source, with its last seen price
+
+    Used by incremental crawls to emit only new or re-priced listings and to
+    stop paginating once a page holds nothing new.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or DEFAULT_INDEX_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS listings (
+                source TEXT NOT NULL,
+                listing_id TEXT NOT NULL,
+                city TEXT,
+                price TEXT,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (source, listing_id)
+            )
+        """)
+        self.conn.commit()
+        self.stats = {'new': 0, 'changed': 0, 'unchanged': 0}
+
+    def lookup(self, source: str, ids: List[str]) -> Dict[str, Optional[str]]:
+        """Last seen price of each id that is already indexed"""
+        known = {}
+        # Stay well under SQLite's bound parameter limit
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f'SELECT listing_id, price FROM listings WHERE source = ? AND listing_id IN ({placeholders})',
+                [source, *chunk])
+            known.update(rows)
+        return known
+
+    def update_page(self, source: str, city: str, records: List[Dict[str, Any]]) -> PageDelta:
+        """Compare a page against the index and record what it contains
+
+        New and re-priced records are tagged with 'change' ('new' or 'price')
+        and, for re-priced ones, 'previous_price'.
+        """
+        delta = PageDelta()
+        if not records:
+            return delta
+
+        ids = [listing_id(r) for r in records]
+        known = self.lookup(source, ids)
+        now = time.time()
+        rows = []
+        for lid, record in zip(ids, records):
+            price = record.get('price')
+            price = str(price) if price is not None else None
+            if lid not in known:
+                delta.new.append({**record, 'change': 'new'})
+            elif known[lid] != price:
+                delta.changed.append({**record, 'change': 'price', 'previous_price': known[lid]})
+            else:
+                delta.unchanged += 1
+            rows.append((source, lid, city, price, now, now))
+
+        with self.conn:
+            self.conn.executemany("""
+                INSERT INTO listings (source, listing_id, city, price, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (source, listing_id) DO UPDATE SET
+                    city = excluded.city,
+                    price = excluded.price,
+                    last_seen = excluded.last_seen
+            """, rows)
+
+        self.stats['new'] += len(delta.new)
+        self.stats['changed'] += len(delta.changed)
+        self.stats['unchanged'] += delta.unchanged
+        return delta
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,149 @@
+import os
+import re
+import sys
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from htmlParsers import ParserBackend, HtmlNode, get_parser_backend
+from payloadCapture import embedded_state_from_html
+from madlanPayloadMapper import STATE_GLOBALS, map_bulletin_payloads
+
+# Listing card selectors, most specific first
+LISTING_SELECTORS = [
+    '[data-auto="listed-bulletin-clickable"]',
+    '.bulletin-card'
+]
+LISTING_SELECTOR = ', '.join(LISTING_SELECTORS)
+
+# Selectors of the fields read from each listing card
+CARD_FIELD_SELECTORS = {
+    'price': '[data-auto="property-price"]',
+    'rooms': '[data-auto="property-rooms"]',
+    'size': '[data-auto="property-size"]',
+    'floor': '[data-auto="property-floor"]',
+    'address': '[data-auto="property-address"]'
+}
+
+# Pagination button leading to the next results page
+NEXT_PAGE_SELECTOR = '[data-auto="bulletins-pagination-2"]'
+
+# Listing pages look like /listings/<bulletin id>
+BULLETIN_LINK = re.compile(r'/listings/([A-Za-z0-9_-]+)')
+
+# First decimal number in a field, the same pattern as propertyNormalizer.NUMBER ("3.5 חד'" is 3.5 rooms)
+DECIMAL_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+
+
+def build_property(fields: Dict[str, Optional[str]], city: str) -> Dict[str, Any]:
+    """Turn the raw text of a listing card's fields into a property record"""
+    property_data = {}
+    
+    # Bulletin id from the card link, the same id the JSON payloads carry
+    link = fields.get('link')
+    if link:
+        match = BULLETIN_LINK.search(link)
+        if match:
+            property_data['bulletin_id'] = match.group(1)
+    
+    # Extract price
+    price_text = fields.get('price')
+    if price_text is not None:
+        price = ''.join(filter(str.isdigit, price_text))
+        property_data['price'] = int(price) if price else None
+    
+    # Extract rooms
+    rooms_text = fields.get('rooms')
+    if rooms_text is not None:
+        rooms = DECIMAL_NUMBER.search(rooms_text)
+        property_data['rooms'] = float(rooms.group()) if rooms else None
+    
+    # Extract size
+    size_text = fields.get('size')
+    if size_text is not None:
+        size = ''.join(filter(str.isdigit, size_text))
+        property_data['size'] = int(size) if size else None
+    
+    # Extract floor
+    floor_text = fields.get('floor')
+    if floor_text is not None:
+        if 'קומת קרקע' in floor_text:
+            floor = 0
+        else:
+            floor = ''.join(filter(str.isdigit, floor_text))
+        property_data['floor'] = int(floor) if floor != '' else None
+    
+    # Extract address
+    address_text = fields.get('address')
+    if address_text is not None:
+        address_parts = address_text.split(',')
+        if len(address_parts) >= 3:
+            property_data['property_type'] = address_parts[0].strip()
+            property_data['street'] = address_parts[1].strip()
+            property_data['neighborhood'] = address_parts[2].strip()
+        elif len(address_parts) == 2:
+            property_data['property_type'] = address_parts[0].strip()
+            property_data['address'] = address_parts[1].strip()
+        else:
+            property_data['address'] = address_text
+    
+    # Add city
+    property_data['city'] = city
+    
+    # Add timestamp
+    property_data['scraped_at'] = datetime.now().isoformat()
+    
+    return property_data
+
+
+def read_card_fields(card: HtmlNode) -> Dict[str, Optional[str]]:
+    """Raw text of a card's fields, the same dict EXTRACT_CARDS_SCRIPT returns in the browser"""
+    fields = {}
+    for field, selector in CARD_FIELD_SELECTORS.items():
+        elem = card.select_one(selector)
+        if elem:
+            fields[field] = elem.text()
+    # Cards are usually the link themselves, otherwise they wrap one
+    link = card.attr('href')
+    if not link:
+        link_elem = card.select_one('a[href]')
+        link = link_elem.attr('href') if link_elem else None
+    if link:
+        fields['link'] = link
+    return fields
+
+
+def parse_cards_page(content: str, city: str, parser: ParserBackend = None) -> List[Dict[str, Any]]:
+    """Extract every listing card of a saved Madlan results page without a browser"""
+    parser = parser or get_parser_backend()
+    return parse_cards_root(parser.parse(content), city)
+
+
+def parse_cards_root(root: HtmlNode, city: str) -> List[Dict[str, Any]]:
+    """parse_cards_page on an already parsed document"""
+    cards = []
+    for selector in LISTING_SELECTORS:
+        cards = root.select(selector)
+        if cards:
+            break
+
+    properties = []
+    for card in cards:
+        try:
+            properties.append(build_property(read_card_fields(card), city))
+        except Exception as e:
+            print(f"Error processing property listing: {str(e)}")
+    return properties
+
+
+def parse_results_html(content: str, city: str, parser_name: str = None) -> Tuple[List[Dict[str, Any]], bool]:
+    """Listings of a results page fetched without the browser and whether a next page exists
+
+    The hydrated SSR state carries every bulletin of the page; the markup is
+    the fallback. Takes only picklable arguments so it can run in a worker process.
+    """
+    properties = map_bulletin_payloads(embedded_state_from_html(content, STATE_GLOBALS), city)
+    root = get_parser_backend(parser_name).parse(content)
+    if not properties:
+        properties = parse_cards_root(root, city)
+    return properties, root.select_one(NEXT_PAGE_SELECTOR) is not None
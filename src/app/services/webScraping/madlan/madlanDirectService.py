@@ -3,172 +3,277 @@ import json
 import random
 import time
 import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, Callable
 
-from playwright.async_api import async_playwright, Page, Browser, BrowserContext
+from playwright.async_api import Page, Browser, BrowserContext
 from bs4 import BeautifulSoup
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from browserPool import BrowserPool, ContextProfile, DEFAULT_LAUNCH_ARGS, DEFAULT_USER_AGENT
+from requestFilter import RequestFilter
+from modalWatcher import ModalWatcher
+from payloadCapture import PayloadCapture, read_embedded_state
+from jsonlSink import JsonlSink
+from crawlCheckpoint import CrawlCheckpoint, CrawlProgress
+from listingIndex import ListingIndex
+from pageCache import PageCache, fragment_hash
+from pageFixtures import FixtureRecorder
+from adaptiveWait import WaitStats, WaitConfig, PageWaits
+from stageTimings import RunTimings, PageSpans
+from madlanPayloadMapper import API_URL_PATTERNS, STATE_GLOBALS, map_bulletin_payloads
+from madlanCardParser import LISTING_SELECTORS, LISTING_SELECTOR, CARD_FIELD_SELECTORS, NEXT_PAGE_SELECTOR, build_property, parse_results_html
+from htmlParsers import get_parser_backend
+from httpFetcher import HttpFetcher, HTTP_FALLBACK_LIMIT, fetch_paths_summary
+from scrapePipeline import ScrapePipeline
+from elementHandles import HandleScope, match_state, handle_stats_summary
+
+# Extra attempts a results page gets after an error (timeout, navigation failure) before the city is cut short
+PAGE_ERROR_RETRIES = 1
+
+# Reads the href of a single card's link (per-element path)
+CARD_LINK_SCRIPT = """
+    card => {
+        const link = card.closest('a[href]') || card.querySelector('a[href]');
+        return link ? link.getAttribute('href') : null;
+    }
+"""
+
+# Reads the raw text of every card field and the card's link on the page in one round trip
+EXTRACT_CARDS_SCRIPT = """
+    ({ cardSelectors, fieldSelectors }) => {
+        let cards = [];
+        for (const selector of cardSelectors) {
+            cards = Array.from(document.querySelectorAll(selector));
+            if (cards.length) break;
+        }
+        return cards.map(card => {
+            const fields = {};
+            for (const [field, selector] of Object.entries(fieldSelectors)) {
+                const elem = card.querySelector(selector);
+                if (elem) fields[field] = elem.textContent;
+            }
+            const link = card.closest('a[href]') || card.querySelector('a[href]');
+            if (link) fields.link = link.getAttribute('href');
+            return fields;
+        });
+    }
+"""
+
 class MadlanDirectService:
-    def __init__(self):
-        self.browser: Browser = None
-        self.context: BrowserContext = None
-        self.page: Page = None
-        self.properties: List[Dict[str, Any]] = []
-        # Create data directory structure
-        self.data_dir = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', 'data')
-        self.search_data_dir = os.path.join(self.data_dir, 'search_data')
-        self.madlan_data_dir = os.path.join(self.search_data_dir, 'madlan')
-        os.makedirs(self.madlan_data_dir, exist_ok=True)
+    # Close buttons of the modals the watcher dismisses
+    MODAL_CLOSE_SELECTORS = [
+        'button[aria-label="סגור"]',
+        'button[aria-label="סגירה"]',
+        '.close-button',
+        '.modal-close'
+    ]
 
-    async def setup_browser(self):
-        """Set up browser with human-like settings"""
-        print("Setting up browser...")
-        playwright = await async_playwright().start()
-        
-        # Use a more realistic user agent and viewport
-        user_agent = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    def __init__(self, browser_pool: BrowserPool = None, request_filter: RequestFilter = None,
+                 extraction_mode: str = 'dom', payload_timeout: float = 5.0, wait_config: WaitConfig = None,
+                 output_format: str = 'jsonl', checkpoint: CrawlCheckpoint = None, resume: bool = True,
+                 incremental: bool = False, listing_index: ListingIndex = None, cache_pages: bool = False,
+                 page_cache: PageCache = None, record_fixtures: str = None, timings: RunTimings = None,
+                 prometheus: bool = False, fetch_mode: str = 'browser', http_fetcher: HttpFetcher = None,
+                 html_parser: str = None, pipeline_workers: int = 0, pipeline_executor: Executor = None):
+        # 'http' fetches the server-rendered results pages without a browser and only renders pages whose HTML has no listings
+        self.fetch_mode = fetch_mode
+        self.http_fetcher = http_fetcher
+        self.owns_http_fetcher = False
+        self.http_misses = 0
+        self.fetch_paths = {'http': 0, 'browser': 0, 'fallback': 0}
+        # With fetch_mode 'http', run the pages through the staged pipeline with this many parse processes
+        self.pipeline_workers = pipeline_workers
+        # Worker pool shared across runs (e.g. one per multi-city crawl), also parsing pages fetched
+        # by the HTTP walkers; started per run when none is shared
+        self.pipeline_executor = pipeline_executor
+        self.owns_pipeline_executor = False
+        # HTML parser backend for pages fetched over HTTP (selectolax, lxml or bs4)
+        self.html_parser = get_parser_backend(html_parser)
+        # Per-stage wall time of every page, written as JSON (and Prometheus text) at the end of a run
+        self.timings = timings or RunTimings('madlan', prometheus=prometheus)
+        # A shared RunTimings is written by its owner (e.g. the city crawler) once the whole run is done
+        self.owns_timings = timings is None
+        # Saves every page's HTML and JSON payloads under this directory for offline replay
+        self.fixture_recorder = FixtureRecorder(record_fixtures) if record_fixtures else None
+        # Reuses the extracted records of pages whose listing cards have not changed since the last run
+        self.page_cache = page_cache or (PageCache() if cache_pages else None)
+        # Incremental crawls emit only new or re-priced listings and stop at the first fully known page
+        self.listing_index = listing_index or (ListingIndex() if incremental else None)
+        # Records page progress so an interrupted crawl resumes where it stopped (jsonl output only,
+        # since a killed run loses the Parquet writer's unwritten row groups)
+        self.checkpoint = checkpoint or (CrawlCheckpoint() if resume else None)
+        # Last results page of the current crawl, once a 404 or a missing next button has shown it
+        self.results_end: Optional[int] = None
+        # 'jsonl' streams each page to an NDJSON file, 'parquet' into the columnar property store,
+        # 'json' writes one pretty-printed file at the end
+        self.output_format = output_format
+        # Waits on card count / response signals instead of fixed sleeps, with upper bounds
+        self.wait_stats = WaitStats(wait_config)
+        # 'payload' maps listings from SSR state / API JSON and only falls back to the DOM when that finds nothing
+        self.extraction_mode = extraction_mode
+        self.payload_timeout = payload_timeout
+        # Blocks images, fonts and trackers on every page we borrow
+        self.request_filter = request_filter or RequestFilter()
+        # Clicks known modal close buttons in the background as soon as they render
+        self.modal_watcher = ModalWatcher(self.MODAL_CLOSE_SELECTORS)
+        # Pages are borrowed from a shared pool; a private one is created when none is given
+        self.browser_pool = browser_pool
+        self.owns_browser_pool = False
         
         # Random viewport size within common desktop resolutions
         viewport_width = random.choice([1366, 1440, 1536, 1920])
         viewport_height = random.choice([768, 900, 864, 1080])
         
-        self.browser = await playwright.chromium.launch(
-            headless=False,
-            slow_mo=random.randint(50, 150),  # Random delay between actions
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--disable-features=IsolateOrigins,site-per-process',
-                '--disable-site-isolation-trials',
-                '--disable-web-security',
-                '--disable-features=BlockInsecurePrivateNetworkRequests',
+        self.launch_options = {
+            'headless': False,
+            'slow_mo': random.randint(50, 150),  # Random delay between actions
+            'args': DEFAULT_LAUNCH_ARGS + [
                 '--no-sandbox',
                 '--disable-setuid-sandbox',
                 '--disable-dev-shm-usage',
                 '--disable-accelerated-2d-canvas',
                 '--disable-gpu',
-                f'--window-size={viewport_width},{viewport_height}',
-                '--disable-blink-features=AutomationControlled',
-                '--disable-features=IsolateOrigins,site-per-process',
-                '--disable-site-isolation-trials',
-                '--disable-web-security',
-                '--disable-features=BlockInsecurePrivateNetworkRequests'
+                f'--window-size={viewport_width},{viewport_height}'
             ]
-        )
+        }
         
-        # Create a new context with more realistic settings
-        self.context = await self.browser.new_context(
-            viewport={'width': viewport_width, 'height': viewport_height},
-            user_agent=user_agent,
-            locale='he-IL',
-            timezone_id='Asia/Jerusalem',
-            geolocation={'latitude': 31.7683, 'longitude': 35.2137},
-            permissions=['geolocation'],
-            java_script_enabled=True,
-            has_touch=False,
-            is_mobile=False,
-            color_scheme='light',
-            reduced_motion='no-preference',
-            forced_colors='none'
+        # Context settings with more realistic browser fingerprint
+        self.context_profile = ContextProfile(
+            'madlan',
+            context_options={
+                'viewport': {'width': viewport_width, 'height': viewport_height},
+                'user_agent': DEFAULT_USER_AGENT,
+                'locale': 'he-IL',
+                'timezone_id': 'Asia/Jerusalem',
+                'geolocation': {'latitude': 31.7683, 'longitude': 35.2137},
+                'permissions': ['geolocation'],
+                'java_script_enabled': True,
+                'has_touch': False,
+                'is_mobile': False,
+                'color_scheme': 'light',
+                'reduced_motion': 'no-preference',
+                'forced_colors': 'none'
+            },
+            # Additional headers to appear more like a real browser
+            extra_http_headers={
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+                'Accept-Language': 'he-IL,he;q=0.9,en-US;q=0.8,en;q=0.7',
+                'Accept-Encoding': 'gzip, deflate, br',
+                'Connection': 'keep-alive',
+                'Upgrade-Insecure-Requests': '1',
+                'Sec-Fetch-Dest': 'document',
+                'Sec-Fetch-Mode': 'navigate',
+                'Sec-Fetch-Site': 'none',
+                'Sec-Fetch-User': '?1',
+                'Cache-Control': 'max-age=0',
+                'DNT': '1'
+            },
+            # More sophisticated anti-bot detection scripts
+            init_scripts=["""
+                // Override navigator properties
+                Object.defineProperty(navigator, 'webdriver', {
+                    get: () => undefined
+                });
+                
+                // Add realistic plugins
+                Object.defineProperty(navigator, 'plugins', {
+                    get: () => [
+                        { name: 'Chrome PDF Plugin', filename: 'internal-pdf-viewer' },
+                        { name: 'Chrome PDF Viewer', filename: 'mhjfbmdgcfjbbpaeojofohoefgiehjai' },
+                        { name: 'Native Client', filename: 'internal-nacl-plugin' }
+                    ]
+                });
+                
+                // Add realistic languages
+                Object.defineProperty(navigator, 'languages', {
+                    get: () => ['he-IL', 'he', 'en-US', 'en']
+                });
+                
+                // Add realistic platform
+                Object.defineProperty(navigator, 'platform', {
+                    get: () => 'MacIntel'
+                });
+                
+                // Add realistic hardware concurrency
+                Object.defineProperty(navigator, 'hardwareConcurrency', {
+                    get: () => 8
+                });
+                
+                // Add realistic device memory
+                Object.defineProperty(navigator, 'deviceMemory', {
+                    get: () => 8
+                });
+                
+                // Add realistic screen properties
+                Object.defineProperty(window, 'screen', {
+                    get: () => ({
+                        width: """ + str(viewport_width) + """,
+                        height: """ + str(viewport_height) + """,
+                        colorDepth: 24,
+                        pixelDepth: 24
+                    })
+                });
+            """],
+            default_timeout=30000
         )
+        self.browser: Browser = None
+        self.context: BrowserContext = None
+        self.page: Page = None
+        self.properties: List[Dict[str, Any]] = []
+        # Round trips and pages per extraction path for the current run
+        self.extraction_stats = {'pages': 0, 'round_trips': 0, 'in_page_pages': 0, 'per_element_pages': 0, 'payload_pages': 0,
+                                 'cached_pages': 0}
+        # Create data directory structure
+        self.data_dir = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', 'data')
+        self.search_data_dir = os.path.join(self.data_dir, 'search_data')
+        self.madlan_data_dir = os.path.join(self.search_data_dir, 'madlan')
+        os.makedirs(self.madlan_data_dir, exist_ok=True)
+
+    async def setup_browser(self):
+        """Borrow a page with human-like settings from the browser pool"""
+        print("Setting up browser...")
+        if self.browser_pool is None:
+            self.browser_pool = BrowserPool(max_browsers=1, contexts_per_browser=1, launch_options=self.launch_options)
+            self.owns_browser_pool = True
         
-        # Add additional headers to appear more like a real browser
-        await self.context.set_extra_http_headers({
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'he-IL,he;q=0.9,en-US;q=0.8,en;q=0.7',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Sec-Fetch-User': '?1',
-            'Cache-Control': 'max-age=0',
-            'DNT': '1'
-        })
-        
-        # Add more sophisticated anti-bot detection scripts
-        await self.context.add_init_script("""
-            // Override navigator properties
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined
-            });
-            
-            // Add realistic plugins
-            Object.defineProperty(navigator, 'plugins', {
-                get: () => [
-                    { name: 'Chrome PDF Plugin', filename: 'internal-pdf-viewer' },
-                    { name: 'Chrome PDF Viewer', filename: 'mhjfbmdgcfjbbpaeojofohoefgiehjai' },
-                    { name: 'Native Client', filename: 'internal-nacl-plugin' }
-                ]
-            });
-            
-            // Add realistic languages
-            Object.defineProperty(navigator, 'languages', {
-                get: () => ['he-IL', 'he', 'en-US', 'en']
-            });
-            
-            // Add realistic platform
-            Object.defineProperty(navigator, 'platform', {
-                get: () => 'MacIntel'
-            });
-            
-            // Add realistic hardware concurrency
-            Object.defineProperty(navigator, 'hardwareConcurrency', {
-                get: () => 8
-            });
-            
-            // Add realistic device memory
-            Object.defineProperty(navigator, 'deviceMemory', {
-                get: () => 8
-            });
-            
-            // Add realistic screen properties
-            Object.defineProperty(window, 'screen', {
-                get: () => ({
-                    width: """ + str(viewport_width) + """,
-                    height: """ + str(viewport_height) + """,
-                    colorDepth: 24,
-                    pixelDepth: 24
-                })
-            });
-        """)
-        
-        self.page = await self.context.new_page()
-        
-        # Set default timeout
-        self.page.set_default_timeout(30000)
-        
-        # Enable JavaScript
-        await self.page.set_extra_http_headers({
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'he-IL,he;q=0.9,en-US;q=0.8,en;q=0.7'
-        })
-        
+        self.page = await self.browser_pool.acquire_page(self.context_profile)
+        await self.request_filter.attach(self.page)
+        await self.modal_watcher.attach(self.page)
+        self.context = self.page.context
+        self.browser = self.context.browser
         print("Browser setup complete")
 
+    async def close_browser(self):
+        """Return the page to the pool and shut the pool down if we created it"""
+        if self.owns_http_fetcher:
+            await self.http_fetcher.close()
+            self.http_fetcher = None
+            self.owns_http_fetcher = False
+        if self.owns_pipeline_executor:
+            self.pipeline_executor.shutdown(cancel_futures=True)
+            self.pipeline_executor = None
+            self.owns_pipeline_executor = False
+        print(self.request_filter.summary())
+        print(self.modal_watcher.summary())
+        print(handle_stats_summary())
+        if self.page:
+            await self.browser_pool.release_page(self.page)
+            self.page = None
+        if self.owns_browser_pool and self.browser_pool:
+            await self.browser_pool.close()
+            self.browser_pool = None
+            self.owns_browser_pool = False
+
     async def handle_modals(self):
         """Handle modal dialogs and popups"""
         try:
-            close_button_selectors = [
-                'button[aria-label="סגור"]',
-                'button[aria-label="סגירה"]',
-                '.close-button',
-                '.modal-close'
-            ]
-            
-            for selector in close_button_selectors:
-                try:
-                    button = await self.page.wait_for_selector(selector, timeout=5000)
-                    if button and await button.is_visible():
-                        print(f"Found close button with selector: {selector}")
-                        await button.click()
-                        await self.human_like_delay(0.2, 0.5)
-                        return True
-                except Exception as e:
-                    print(f"Close button selector {selector} failed: {str(e)}")
-                    continue
-            
+            # The watcher closes modals as they appear; this only catches one it has not handled yet
+            if await self.modal_watcher.dismiss_now(self.page):
+                await self.human_like_delay(0.2, 0.5)
+                return True
             return False
                     
         except Exception as e:
@@ -204,13 +309,14 @@ class MadlanDirectService:
             if random.random() < 0.2:
                 await self.human_like_delay(0.5, 1.5)
 
-    async def scroll_to_bottom(self):
+    async def scroll_to_bottom(self, page: Page = None):
         """Scroll to the bottom of the page quickly"""
         print("Scrolling to bottom of page...")
+        page = page or self.page
         
         # Get the total height of the page
-        total_height = await self.page.evaluate("document.body.scrollHeight")
-        viewport_height = await self.page.evaluate("window.innerHeight")
+        total_height = await page.evaluate("document.body.scrollHeight")
+        viewport_height = await page.evaluate("window.innerHeight")
         
         # Scroll in larger steps (3/4 of viewport height at a time)
         scroll_step = (viewport_height * 3) // 4
@@ -218,7 +324,7 @@ class MadlanDirectService:
         
         while current_position < total_height:
             # Scroll by the step amount
-            await self.page.evaluate(f"window.scrollTo(0, {current_position})")
+            await page.evaluate(f"window.scrollTo(0, {current_position})")
             
             # Add minimal delay between scrolls
             await self.human_like_delay(0.1, 0.2)
@@ -227,241 +333,555 @@ class MadlanDirectService:
             current_position += scroll_step
         
         # Final scroll to ensure we're at the bottom
-        await self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
         await self.human_like_delay(0.2, 0.3)
 
-    async def scrape_properties(self, city: str) -> List[Dict[str, Any]]:
-        """Scrape properties from Madlan for a specific city"""
+    def build_property(self, fields: Dict[str, Optional[str]], city: str) -> Dict[str, Any]:
+        """Turn the raw text of a listing card's fields into a property record"""
+        return build_property(fields, city)
+
+    async def extract_listings_in_page(self, page: Page, city: str) -> Optional[List[Dict[str, Any]]]:
+        """Extract every card on the page with a single page.evaluate round trip
+        
+        Returns None when the in-page script fails so the caller can fall back
+        to the per-element path.
+        """
         try:
-            print("Starting browser...")
-            await self.setup_browser()
+            cards = await page.evaluate(EXTRACT_CARDS_SCRIPT, {
+                'cardSelectors': LISTING_SELECTORS,
+                'fieldSelectors': CARD_FIELD_SELECTORS
+            })
+        except Exception as e:
+            print(f"In-page extraction failed, falling back to per-element extraction: {str(e)}")
+            return None
+        
+        properties = []
+        for fields in cards:
+            try:
+                properties.append(self.build_property(fields, city))
+            except Exception as e:
+                print(f"Error processing property listing: {str(e)}")
+                continue
+        return properties
+
+    async def extract_listings(self, listings, city: str, scope: HandleScope) -> Tuple[List[Dict[str, Any]], int]:
+        """Extract property details element by element (fallback path)
+        
+        Returns the properties and the number of driver round trips it took.
+        The field handles are registered with scope, which disposes them.
+        """
+        properties = []
+        round_trips = 0
+        for listing in listings:
+            try:
+                fields = {}
+                for field, selector in CARD_FIELD_SELECTORS.items():
+                    elem = scope.track(await listing.query_selector(selector))
+                    round_trips += 1
+                    if elem:
+                        fields[field] = await elem.text_content()
+                        round_trips += 1
+                fields['link'] = await listing.evaluate(CARD_LINK_SCRIPT)
+                round_trips += 1
+                
+                property_data = self.build_property(fields, city)
+                properties.append(property_data)
+                print(f"Added property: {property_data.get('street', 'Unknown address')}")
+                
+            except Exception as e:
+                print(f"Error processing property listing: {str(e)}")
+                continue
+        
+        return properties, round_trips
+
+    async def extract_page(self, page: Page, city: str, page_number: int, spans: PageSpans) -> List[Dict[str, Any]]:
+        """Extract the page's listings, preferring the single round trip path"""
+        started = time.perf_counter()
+        cards_hash = None
+        if self.page_cache:
+            with spans.span('cache'):
+                cards_hash = await fragment_hash(page, LISTING_SELECTORS)
+            cached = self.page_cache.get(page.url, cards_hash) if cards_hash else None
+            if cached is not None:
+                self.extraction_stats['cached_pages'] += 1
+                print(f"Listing cards unchanged, reusing {len(cached)} cached listings for page {page_number}")
+                return cached
+        
+        path = 'in_page'
+        round_trips = 1
+        with spans.span('extract'):
+            properties = await self.extract_listings_in_page(page, city)
             
-            print(f"Navigating to Madlan for {city}...")
-            base_url = "https://www.madlan.co.il/for-sale/חיפה-ישראל"
+            if properties is None:
+                path = 'per_element'
+                # Card and field handles are released with the page's extraction, not when the page closes
+                async with HandleScope() as scope:
+                    listings, lookups = await self.find_listings(page, scope)
+                    properties, card_round_trips = await self.extract_listings(listings, city, scope)
+                round_trips += lookups + card_round_trips
+        
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.extraction_stats['pages'] += 1
+        self.extraction_stats['round_trips'] += round_trips
+        self.extraction_stats[f'{path}_pages'] += 1
+        print(f"Extracted {len(properties)} listings on page {page_number} via {path} path: "
+              f"{round_trips} round trips, {elapsed_ms:.0f} ms")
+        if cards_hash and properties:
+            self.page_cache.put(page.url, cards_hash, properties)
+        return properties
+
+    async def scrape_page(self, page: Page, page_url: str, page_number: int, city: str,
+                          spans: PageSpans = None) -> Optional[Dict[str, Any]]:
+        """Load one results page exactly once and extract its listings
+        
+        Returns None when the page is past the end of the results (404),
+        {'error': ...} when loading it failed or it showed no listings,
+        otherwise a dict with the page's properties and whether a next page
+        exists.
+        """
+        print(f"Navigating to: {page_url}")
+        spans = spans or self.timings.begin_page(f"Madlan {city} page {page_number}")
+        waits = self.wait_stats.begin_page(f"Madlan {city} page {page_number}", spans)
+        capture = None
+        if self.extraction_mode == 'payload':
+            capture = PayloadCapture(API_URL_PATTERNS)
+            capture.attach(page)
+        try:
+            with spans.span('navigate'):
+                response = await page.goto(page_url, wait_until="domcontentloaded", timeout=30000)
             
-            all_properties = []
-            current_page = 1
-            max_pages = 1000  # Increased maximum pages
+            # Check if we got a 404
+            if response and response.status == 404:
+                print(f"Reached the last page (404) at page {page_number}")
+                self.mark_results_end(page_number - 1)
+                return None
             
-            while current_page <= max_pages:
-                print(f"\nProcessing page {current_page}...")
-                
-                # Navigate to the current page
-                page_url = f"{base_url}?page={current_page}" if current_page > 1 else base_url
-                print(f"Navigating to: {page_url}")
-                
-                try:
-                    # Try to load the page
-                    response = await self.page.goto(page_url, wait_until="domcontentloaded", timeout=30000)
-                    
-                    # Check if we got a 404
-                    if response.status == 404:
-                        print("Reached the last page (404)")
-                        break
-                    
-                    # Quick scroll to bottom
-                    await self.scroll_to_bottom()
-                    
-                    # Wait briefly for any dynamic content
-                    await self.human_like_delay(0.5, 1)
-                    
-                    # Check for property listings
-                    listings = await self.page.query_selector_all('[data-auto="listed-bulletin-clickable"]')
-                    if not listings:
-                        # Try alternative selector
-                        listings = await self.page.query_selector_all('.bulletin-card')
-                    
-                    print(f"Found {len(listings)} property listings")
-                    
-                    if not listings:
-                        print("No listings found, assuming end of results")
-                        break
-                    
-                    # Process the listings
-                    for listing in listings:
-                        try:
-                            property_data = {}
-                            
-                            # Extract price
-                            price_elem = await listing.query_selector('[data-auto="property-price"]')
-                            if price_elem:
-                                price_text = await price_elem.text_content()
-                                price = ''.join(filter(str.isdigit, price_text))
-                                property_data['price'] = int(price) if price else None
-                            
-                            # Extract rooms
-                            rooms_elem = await listing.query_selector('[data-auto="property-rooms"]')
-                            if rooms_elem:
-                                rooms_text = await rooms_elem.text_content()
-                                rooms = ''.join(filter(str.isdigit, rooms_text))
-                                property_data['rooms'] = float(rooms) if rooms else None
-                            
-                            # Extract size
-                            size_elem = await listing.query_selector('[data-auto="property-size"]')
-                            if size_elem:
-                                size_text = await size_elem.text_content()
-                                size = ''.join(filter(str.isdigit, size_text))
-                                property_data['size'] = int(size) if size else None
-                            
-                            # Extract floor
-                            floor_elem = await listing.query_selector('[data-auto="property-floor"]')
-                            if floor_elem:
-                                floor_text = await floor_elem.text_content()
-                                if 'קומת קרקע' in floor_text:
-                                    floor = 0
-                                else:
-                                    floor = ''.join(filter(str.isdigit, floor_text))
-                                property_data['floor'] = int(floor) if floor else None
-                            
-                            # Extract address
-                            address_elem = await listing.query_selector('[data-auto="property-address"]')
-                            if address_elem:
-                                address_text = await address_elem.text_content()
-                                address_parts = address_text.split(',')
-                                if len(address_parts) >= 3:
-                                    property_data['property_type'] = address_parts[0].strip()
-                                    property_data['street'] = address_parts[1].strip()
-                                    property_data['neighborhood'] = address_parts[2].strip()
-                                elif len(address_parts) == 2:
-                                    property_data['property_type'] = address_parts[0].strip()
-                                    property_data['address'] = address_parts[1].strip()
-                                else:
-                                    property_data['address'] = address_text
-                            
-                            property_data['city'] = city
-                            property_data['scraped_at'] = datetime.now().isoformat()
-                            
-                            all_properties.append(property_data)
-                            
-                        except Exception as e:
-                            print(f"Error processing property listing: {str(e)}")
-                            continue
-                    
-                    await self.page.goto(page_url, wait_until="domcontentloaded", timeout=60000)
-                    print("Page loaded successfully")
-                except Exception as e:
-                    print(f"Error loading page: {str(e)}")
-                    # Take a screenshot for debugging
-                    await self.page.screenshot(path=f"madlan_page_load_error_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-                    break
-                
-                await self.human_like_delay(2, 4)
+            properties = []
+            payloads = [] if self.fixture_recorder else None
+            mode = 'payload'
+            if capture:
+                with spans.span('extract'):
+                    properties = await self.extract_page_payload(page, capture, waits, city, page_number, payloads)
+            
+            if not properties:
+                mode = 'dom'
+                # DOM path: quick scroll to bottom to trigger lazy loaded cards
+                with spans.span('scroll'):
+                    await self.scroll_to_bottom(page)
                 
-                # Scroll to the bottom gradually
-                await self.scroll_to_bottom()
+                # Wait until the card count stops changing
+                await waits.listings_settled(page, LISTING_SELECTOR)
                 
-                # Wait for content to load after scrolling
+                properties = await self.extract_page(page, city, page_number, spans)
+            if not properties:
+                # Cards not rendered yet - give them one longer, bounded chance before giving up
                 print("Waiting for content to load...")
-                try:
-                    await self.page.wait_for_load_state("networkidle", timeout=30000)
+                count = await waits.listings_settled(page, LISTING_SELECTOR, timeout=waits.config.response_timeout)
+                if count:
                     print("Content loaded successfully")
-                except Exception as e:
-                    print(f"Timeout waiting for content to load: {str(e)}")
+                    properties = await self.extract_page(page, city, page_number, spans)
+                else:
+                    print("Timeout waiting for content to load")
                     # Take a screenshot for debugging
-                    await self.page.screenshot(path=f"madlan_content_load_error_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-                
-                # Check for property listings
-                print("Checking for property listings...")
-                listings = await self.page.query_selector_all('[data-auto="listed-bulletin-clickable"]')
-                print(f"Found {len(listings)} property listings on page {current_page}")
-                
-                if not listings:
-                    print("No listings found, taking screenshot for debugging...")
-                    await self.page.screenshot(path=f"madlan_no_listings_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-                    
-                    # Try alternative selector
-                    print("Trying alternative selector...")
-                    listings = await self.page.query_selector_all('.bulletin-card')
-                    print(f"Found {len(listings)} listings with alternative selector")
-                    
-                    if not listings:
-                        has_more_pages = False
-                        break
-                
-                # Process the listings
-                for listing in listings:
-                    try:
-                        # Extract property details
-                        property_data = {}
-                        
-                        # Extract price
-                        price_elem = await listing.query_selector('[data-auto="property-price"]')
-                        if price_elem:
-                            price_text = await price_elem.text_content()
-                            price = ''.join(filter(str.isdigit, price_text))
-                            property_data['price'] = int(price) if price else None
-                        
-                        # Extract rooms
-                        rooms_elem = await listing.query_selector('[data-auto="property-rooms"]')
-                        if rooms_elem:
-                            rooms_text = await rooms_elem.text_content()
-                            rooms = ''.join(filter(str.isdigit, rooms_text))
-                            property_data['rooms'] = float(rooms) if rooms else None
-                        
-                        # Extract size
-                        size_elem = await listing.query_selector('[data-auto="property-size"]')
-                        if size_elem:
-                            size_text = await size_elem.text_content()
-                            size = ''.join(filter(str.isdigit, size_text))
-                            property_data['size'] = int(size) if size else None
-                        
-                        # Extract floor
-                        floor_elem = await listing.query_selector('[data-auto="property-floor"]')
-                        if floor_elem:
-                            floor_text = await floor_elem.text_content()
-                            if 'קומת קרקע' in floor_text:
-                                floor = 0
-                            else:
-                                floor = ''.join(filter(str.isdigit, floor_text))
-                            property_data['floor'] = int(floor) if floor else None
-                        
-                        # Extract address
-                        address_elem = await listing.query_selector('[data-auto="property-address"]')
-                        if address_elem:
-                            address_text = await address_elem.text_content()
-                            address_parts = address_text.split(',')
-                            if len(address_parts) >= 3:
-                                property_data['property_type'] = address_parts[0].strip()
-                                property_data['street'] = address_parts[1].strip()
-                                property_data['neighborhood'] = address_parts[2].strip()
-                            elif len(address_parts) == 2:
-                                property_data['property_type'] = address_parts[0].strip()
-                                property_data['address'] = address_parts[1].strip()
-                            else:
-                                property_data['address'] = address_text
-                        
-                        # Add city
-                        property_data['city'] = city
-                        
-                        # Add timestamp
-                        property_data['scraped_at'] = datetime.now().isoformat()
-                        
-                        all_properties.append(property_data)
-                        print(f"Added property: {property_data.get('street', 'Unknown address')}")
-                        
-                    except Exception as e:
-                        print(f"Error processing property listing: {str(e)}")
-                        continue
-                
-                # Check if there are more pages by looking at the next page button
-                print("Checking for next page button...")
-                next_button = await self.page.query_selector('[data-auto="bulletins-pagination-2"]')
+                    await page.screenshot(path=f"madlan_content_load_error_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
+            
+            print(f"Found {len(properties)} property listings on page {page_number}")
+            if not properties:
+                print("No listings found, taking screenshot for debugging...")
+                await page.screenshot(path=f"madlan_no_listings_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
+                # A bot check or a slow render, not the end of the results: that is a 404 or a missing next button
+                return {'error': 'no listings'}
+            self.fetch_paths['browser'] += 1
+            if self.fixture_recorder:
+                with spans.span('write'):
+                    self.fixture_recorder.record('madlan', city, page_number, page.url, await page.content(),
+                                                 payloads, len(properties), mode)
+            
+            # Check if there are more pages by looking at the next page button
+            print("Checking for next page button...")
+            with spans.span('extract'):
+                next_button = await match_state(page, NEXT_PAGE_SELECTOR)
                 if next_button:
-                    is_visible = await next_button.is_visible()
-                    print(f"Next button found, visible: {is_visible}")
-                    has_more_pages = is_visible
+                    has_more_pages = next_button['visible']
+                    print(f"Next button found, visible: {has_more_pages}")
                 else:
                     print("Next button not found")
                     has_more_pages = False
+            if not has_more_pages:
+                self.mark_results_end(page_number)
+            
+            return {'properties': properties, 'has_more_pages': has_more_pages, 'timings': spans.finish(len(properties))}
+        
+        except Exception as e:
+            print(f"Error loading page: {str(e)}")
+            # Take a screenshot for debugging
+            try:
+                await page.screenshot(path=f"madlan_page_load_error_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
+            except Exception:
+                pass
+            return {'error': str(e)}
+        
+        finally:
+            if capture:
+                capture.detach(page)
+            waits.finish()
+            spans.finish()
+
+    def report_truncated(self, city: str, page_number: int, error: str):
+        print(f"WARNING: page {page_number} of {city} failed {PAGE_ERROR_RETRIES + 1} times ({error}), "
+              f"the city is truncated after page {page_number - 1}")
+
+    def mark_results_end(self, page_number: int):
+        if self.results_end is None or page_number < self.results_end:
+            self.results_end = page_number
+
+    async def extract_page_payload(self, page: Page, capture: PayloadCapture, waits: PageWaits, city: str, page_number: int,
+                                   keep_payloads: List[Any] = None) -> List[Dict[str, Any]]:
+        """Map listings from the SSR state and captured API responses, no scrolling or DOM parsing"""
+        payloads = await read_embedded_state(page, STATE_GLOBALS)
+        properties = map_bulletin_payloads(payloads, city)
+        if not properties:
+            # Listings not in the initial HTML - give the search API a moment to answer
+            started = time.perf_counter()
+            await capture.wait_for_payload(self.payload_timeout)
+            waits.add_wait('response', time.perf_counter() - started)
+            payloads = capture.drain()
+            properties = map_bulletin_payloads(payloads, city)
+        if keep_payloads is not None:
+            keep_payloads.extend(payloads)
+        
+        if properties:
+            self.extraction_stats['payload_pages'] += 1
+            print(f"Mapped {len(properties)} listings on page {page_number} from JSON payloads")
+        else:
+            print(f"No listings in JSON payloads on page {page_number}, falling back to DOM extraction")
+        return properties
+
+    def use_http(self) -> bool:
+        """Whether to try the next page over plain HTTP; stops after repeated pages without listings"""
+        return self.http_fetcher is not None and self.http_misses < HTTP_FALLBACK_LIMIT
+
+    def parse_executor(self) -> Executor:
+        """Worker processes that parse page HTML off the event loop, started on first use"""
+        if self.pipeline_executor is None:
+            self.pipeline_executor = ProcessPoolExecutor(max_workers=self.pipeline_workers or 1)
+            self.owns_pipeline_executor = True
+        return self.pipeline_executor
+
+    async def parse_in_worker(self, parse: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.parse_executor(), parse, *args)
+
+    async def fetch_page_http(self, page_url: str, page_number: int, city: str, spans: PageSpans) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Fetch and parse one results page without the browser
+        
+        Returns whether the HTTP path served the page, and the same result
+        scrape_page would give. Pages it did not serve are left to the browser
+        with their spans still open.
+        """
+        if not self.use_http():
+            return False, None
+        with spans.span('navigate'):
+            fetched = await self.http_fetcher.fetch(page_url)
+        if fetched and fetched.status == 404:
+            print(f"Reached the last page (404) at page {page_number}")
+            self.mark_results_end(page_number - 1)
+            spans.finish()
+            return True, None
+        properties = []
+        has_more_pages = False
+        if fetched and fetched.status == 200:
+            with spans.span('parse'):
+                properties, has_more_pages = await self.parse_in_worker(parse_results_html, fetched.html, city, self.html_parser.name)
+        if not properties:
+            self.http_misses += 1
+            self.fetch_paths['fallback'] += 1
+            status = f"{fetched.status}, {fetched.size_bytes} bytes" if fetched else "request failed"
+            print(f"No listings in the HTML of page {page_number} ({status}), using the browser")
+            if self.http_misses >= HTTP_FALLBACK_LIMIT:
+                print(f"{self.http_misses} pages without listings over HTTP, using the browser for the rest of the run")
+            return False, None
+        
+        self.http_misses = 0
+        self.fetch_paths['http'] += 1
+        print(f"Fetched {len(properties)} listings on page {page_number} over {fetched.http_version} in {fetched.seconds * 1000:.0f} ms")
+        if self.fixture_recorder:
+            with spans.span('write'):
+                self.fixture_recorder.record('madlan', city, page_number, page_url, fetched.html, None, len(properties), 'payload')
+        if not has_more_pages:
+            self.mark_results_end(page_number)
+        return True, {'properties': properties, 'has_more_pages': has_more_pages, 'timings': spans.finish(len(properties))}
+
+    async def find_listings(self, page: Page, scope: HandleScope) -> Tuple[list, int]:
+        """Find the listing cards on the page, trying the alternative selectors in order"""
+        lookups = 0
+        listings = []
+        for selector in LISTING_SELECTORS:
+            listings = scope.track(await page.query_selector_all(selector))
+            lookups += 1
+            if listings:
+                break
+        return listings, lookups
+
+    async def prefetch_page(self, page_url: str, page_number: int, city: str) -> Optional[Dict[str, Any]]:
+        """Scrape one page on its own pooled page so several pages can load at once"""
+        spans = self.timings.begin_page(f"Madlan {city} page {page_number}")
+        served, result = await self.fetch_page_http(page_url, page_number, city, spans)
+        if served:
+            return result
+        page = await self.browser_pool.acquire_page(self.context_profile)
+        try:
+            await self.request_filter.attach(page)
+            await self.modal_watcher.attach(page)
+            return await self.scrape_page(page, page_url, page_number, city, spans)
+        finally:
+            await self.browser_pool.release_page(page)
+
+    def page_url(self, base_url: str, page_number: int) -> str:
+        return f"{base_url}?page={page_number}" if page_number > 1 else base_url
+
+    async def scrape_pages_sequential(self, base_url: str, city: str, max_pages: int, on_page: Callable[[int, List[Dict[str, Any]]], None],
+                                      start_page: int = 1) -> int:
+        """Walk the results pages one by one on the service page
+        
+        Each page's properties are handed to on_page as soon as it is scraped;
+        on_page returning False stops the walk. Returns the number of pages scraped.
+        """
+        current_page = start_page
+        pages_done = 0
+        attempts = 0
+        while current_page <= max_pages:
+            print(f"\nProcessing page {current_page}...")
+            page_url = self.page_url(base_url, current_page)
+            spans = self.timings.begin_page(f"Madlan {city} page {current_page}")
+            served, result = await self.fetch_page_http(page_url, current_page, city, spans)
+            if not served:
+                if self.page is None:
+                    await self.setup_browser()
+                result = await self.scrape_page(self.page, page_url, current_page, city, spans)
+            if result is not None and 'error' in result:
+                attempts += 1
+                if attempts > PAGE_ERROR_RETRIES:
+                    self.report_truncated(city, current_page, result['error'])
+                    break
+                print(f"Page {current_page} failed, retrying")
+                await self.human_like_delay(2, 4)
+                continue
+            attempts = 0
+            if result is None:
+                break
+            started = time.perf_counter()
+            keep_going = on_page(current_page, result['properties'])
+            self.timings.add_to_page(result['timings'], 'write', time.perf_counter() - started)
+            pages_done += 1
+            if keep_going is False:
+                break
+            
+            if not result['has_more_pages']:
+                print("\nNo more pages to scrape")
+                break
+            
+            current_page += 1
+            print(f"Moving to page {current_page}")
+            # Add a small delay before moving to the next page
+            await self.human_like_delay(1, 2)
+        return pages_done
+
+    async def scrape_pages_prefetch(self, base_url: str, city: str, max_pages: int, window: int,
+                                    on_page: Callable[[int, List[Dict[str, Any]]], None], start_page: int = 1) -> int:
+        """Keep a sliding window of pages in flight, each on its own pooled page
+        
+        Finished pages are buffered until every earlier page is done, then
+        handed to on_page in page order; on_page returning False stops the
+        walk after that page. Returns the number of pages emitted.
+        """
+        buffered = {}
+        last_page = max_pages
+        next_page = start_page
+        next_to_emit = start_page
+        in_flight = {}
+        attempts = {}
+        # Pages that failed every attempt; a later page may fail only because it is past the end
+        failures = {}
+        stopped = False
+        
+        try:
+            while in_flight or next_page <= last_page:
+                # Top up the window with the next page numbers
+                while len(in_flight) < window and next_page <= last_page:
+                    page_url = self.page_url(base_url, next_page)
+                    task = asyncio.create_task(self.prefetch_page(page_url, next_page, city))
+                    in_flight[task] = next_page
+                    next_page += 1
+                    # Stagger navigations slightly so they do not hit the site at the same instant
+                    await self.human_like_delay(0.2, 0.5)
+                
+                done, _ = await asyncio.wait(in_flight.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    page_number = in_flight.pop(task)
+                    result = task.result()
+                    if result is not None and 'error' in result:
+                        if page_number > last_page:
+                            continue
+                        attempts[page_number] = attempts.get(page_number, 0) + 1
+                        if attempts[page_number] <= PAGE_ERROR_RETRIES:
+                            print(f"Page {page_number} failed, retrying")
+                            page_url = self.page_url(base_url, page_number)
+                            in_flight[asyncio.create_task(self.prefetch_page(page_url, page_number, city))] = page_number
+                        else:
+                            failures[page_number] = result['error']
+                            last_page = page_number - 1
+                    elif result is None:
+                        last_page = min(last_page, page_number - 1)
+                    else:
+                        buffered[page_number] = result
+                        if not result['has_more_pages']:
+                            last_page = min(last_page, page_number)
                 
-                if has_more_pages:
-                    current_page += 1
-                    print(f"Moving to page {current_page}")
-                    # Add a small delay before moving to the next page
-                    await self.human_like_delay(1, 2)
+                # Emit every page that is now contiguous with what was already emitted
+                while next_to_emit <= last_page and next_to_emit in buffered:
+                    result = buffered.pop(next_to_emit)
+                    started = time.perf_counter()
+                    keep_going = on_page(next_to_emit, result['properties'])
+                    self.timings.add_to_page(result['timings'], 'write', time.perf_counter() - started)
+                    if keep_going is False:
+                        last_page = next_to_emit
+                        stopped = True
+                    next_to_emit += 1
+                
+                # Drop pages that turned out to be past the end
+                dropped = [task for task, page_number in in_flight.items() if page_number > last_page]
+                for task in dropped:
+                    in_flight.pop(task)
+                await self.cancel_prefetches(dropped)
+        finally:
+            await self.cancel_prefetches(list(in_flight))
+        
+        # The walk ended on a failed page rather than on the last page of the results
+        reached_end = self.results_end is not None and self.results_end <= last_page
+        if last_page + 1 in failures and not stopped and not reached_end:
+            self.report_truncated(city, last_page + 1, failures[last_page + 1])
+        return next_to_emit - start_page
+
+    async def cancel_prefetches(self, tasks: List[asyncio.Task]):
+        """Cancel page tasks and wait for them, so their pages are back in the pool before it closes"""
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def scrape_pages_pipeline(self, base_url: str, city: str, max_pages: int, on_page: Callable[[int, List[Dict[str, Any]]], bool],
+                                    start_page: int = 1) -> Optional[int]:
+        """Fetch, parse and save pages over HTTP as overlapping pipeline stages
+        
+        Returns the page the browser walkers have to continue from, or None
+        when the pipeline got through the results. Pages on this path are not
+        recorded as fixtures.
+        """
+        print(f"Running pages through the pipeline with {self.pipeline_workers} parse workers")
+        pipeline = ScrapePipeline(f"Madlan {city}", self.http_fetcher, lambda page_number: self.page_url(base_url, page_number),
+                                  parse_results_html, (city, self.html_parser.name),
+                                  parse_workers=self.pipeline_workers, timings=self.timings, executor=self.parse_executor())
+        resume_page = await pipeline.run(start_page, max_pages, on_page)
+        self.fetch_paths['http'] += pipeline.pages_written
+        if pipeline.results_end is not None:
+            self.mark_results_end(pipeline.results_end)
+        print(pipeline.summary())
+        return resume_page
+
+    async def scrape_properties(self, city: str, prefetch_window: int = 1) -> List[Dict[str, Any]]:
+        """Scrape properties from Madlan for a specific city
+        
+        With prefetch_window > 1 up to that many result pages are loaded
+        concurrently and their results are re-ordered by page number.
+        """
+        sink = None
+        try:
+            if self.browser_pool is None and prefetch_window > 1:
+                self.browser_pool = BrowserPool(max_browsers=1, contexts_per_browser=prefetch_window + 1, launch_options=self.launch_options)
+                self.owns_browser_pool = True
+            if self.fetch_mode == 'http' and self.http_fetcher is None:
+                self.http_fetcher = HttpFetcher()
+                self.owns_http_fetcher = True
+            if not self.http_fetcher:
+                # Over HTTP the browser is only started for the first page that needs it
+                print("Starting browser...")
+                await self.setup_browser()
+            
+            print(f"Navigating to Madlan for {city}...")
+            base_url = f"https://www.madlan.co.il/for-sale/{city}-ישראל"
+            max_pages = 1000  # Increased maximum pages
+            
+            all_properties = []
+            if self.output_format == 'jsonl':
+                # Stream every page to disk instead of holding the whole crawl in memory
+                sink = JsonlSink(self.madlan_data_dir, 'madlan_properties')
+            elif self.output_format == 'parquet':
+                # Imported here so pyarrow is only needed when writing to the store
+                from propertyStore import ParquetSink
+                sink = ParquetSink('madlan', city)
+            # Pages already saved by an interrupted run are not fetched again
+            progress = CrawlProgress(self.checkpoint if self.output_format == 'jsonl' else None, 'madlan', city)
+            self.results_end = None
+            last_saved_page = progress.start_page - 1
+            stopped_on_known_page = False
+            
+            def save_page(page_number: int, page_properties: List[Dict[str, Any]]) -> bool:
+                nonlocal last_saved_page, stopped_on_known_page
+                page_properties = progress.new_records(page_properties)
+                delta = None
+                if self.listing_index:
+                    delta = self.listing_index.update_page('madlan', city, page_properties)
+                    print(f"Page {page_number} against the listing index: {delta}")
+                    page_properties = delta.records
+                if sink:
+                    sink.write_page(page_properties)
                 else:
-                    print("\nNo more pages to scrape")
-                    break
+                    all_properties.extend(page_properties)
+                progress.page_done(page_number, self.page_url(base_url, page_number + 1), page_properties)
+                last_saved_page = page_number
+                if delta and delta.fully_known:
+                    print("\nEvery listing on this page is already known and unchanged, stopping")
+                    stopped_on_known_page = True
+                    return False
+                return True
+            
+            start_page = progress.start_page
+            if self.pipeline_workers and self.use_http():
+                # The browser walkers only pick up from the first page the pipeline could not serve
+                start_page = await self.scrape_pages_pipeline(base_url, city, max_pages, save_page, start_page=start_page)
+            if start_page is not None and prefetch_window > 1:
+                print(f"Prefetching up to {prefetch_window} pages at a time")
+                await self.scrape_pages_prefetch(base_url, city, max_pages, prefetch_window, save_page, start_page=start_page)
+            elif start_page is not None:
+                await self.scrape_pages_sequential(base_url, city, max_pages, save_page, start_page=start_page)
+            
+            # Keep the checkpoint when the crawl stopped early on an error or a blocked page
+            if stopped_on_known_page or last_saved_page >= max_pages or (self.results_end is not None and last_saved_page >= self.results_end):
+                progress.finish()
+            
+            print(f"Wait summary: {self.wait_stats.summary()}")
+            if self.listing_index:
+                print(f"Listing index: {self.listing_index.stats}")
+            if self.page_cache:
+                print(self.page_cache.summary())
+            if self.http_fetcher:
+                print(self.http_fetcher.summary())
+                print(fetch_paths_summary(self.fetch_paths))
+            if self.owns_timings:
+                self.timings.write()
+            
+            if self.extraction_stats['pages']:
+                print(f"Extraction round trips per page: {self.extraction_stats['round_trips'] / self.extraction_stats['pages']:.1f} ({self.extraction_stats})")
+            elif self.extraction_stats['payload_pages']:
+                print(f"All {self.extraction_stats['payload_pages']} pages extracted from JSON payloads")
+            
+            if sink:
+                sink.close()
+                if sink.records_written:
+                    print(f"\nSaved {sink.records_written} properties to {', '.join(sink.files)}")
+                else:
+                    print("\nNo properties found")
+                return sink.records()
             
             if all_properties:
                 # Save all properties to a single JSON file
@@ -483,9 +903,10 @@ class MadlanDirectService:
             return []
         
         finally:
+            if sink:
+                sink.close()
             print("Closing browser...")
-            if self.browser:
-                await self.browser.close()
+            await self.close_browser()
             print("Browser closed")
 
 async def main():
@@ -0,0 +1,84 @@
+import os
+import sys
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from payloadCapture import find_objects
+
+# Madlan's GraphQL search endpoint
+API_URL_PATTERNS = [r'madlan\.co\.il/api2']
+
+# Server-side rendered state Madlan hydrates its search pages from
+STATE_GLOBALS = ['__SSR_HYDRATED_CONTEXT__', '__INITIAL_STATE__']
+
+# Building classes as shown on the listing cards
+BUILDING_CLASS_NAMES = {
+    'flat': 'דירה',
+    'apartment': 'דירה',
+    'gardenApartment': 'דירת גן',
+    'penthouse': 'פנטהאוז',
+    'roofFlat': 'דירת גג',
+    'duplex': 'דופלקס',
+    'cottage': 'קוטג׳',
+    'privateHouse': 'בית פרטי',
+    'studio': 'סטודיו'
+}
+
+
+def is_bulletin(node: Dict[str, Any]) -> bool:
+    """Bulletins carry an id, a price and room or area details"""
+    return 'id' in node and 'price' in node and ('beds' in node or 'area' in node)
+
+
+def _to_int(value: Any) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def map_bulletin(bulletin: Dict[str, Any], city: str) -> Dict[str, Any]:
+    """Map a Madlan bulletin to the same record shape the card extraction produces"""
+    details = bulletin.get('addressDetails') or {}
+    property_data = {
+        'bulletin_id': bulletin['id'],
+        'price': _to_int(bulletin.get('price')),
+        'rooms': float(bulletin['beds']) if bulletin.get('beds') is not None else None,
+        'size': _to_int(bulletin.get('area')),
+        'floor': _to_int(bulletin.get('floor'))
+    }
+
+    building_class = bulletin.get('buildingClass')
+    if building_class:
+        property_data['property_type'] = BUILDING_CLASS_NAMES.get(building_class, building_class)
+
+    street = details.get('streetName')
+    if street:
+        street_number = details.get('streetNumber')
+        property_data['street'] = f"{street} {street_number}" if street_number else street
+    elif bulletin.get('address'):
+        property_data['address'] = bulletin['address']
+
+    if details.get('neighbourhood'):
+        property_data['neighborhood'] = details['neighbourhood']
+
+    property_data['city'] = city
+    property_data['scraped_at'] = datetime.now().isoformat()
+    return property_data
+
+
+def map_bulletin_payloads(payloads: List[Any], city: str) -> List[Dict[str, Any]]:
+    """Find every bulletin in the captured payloads, once per bulletin id"""
+    properties = []
+    seen_ids = set()
+    for payload in payloads:
+        for bulletin in find_objects(payload, is_bulletin):
+            if bulletin['id'] in seen_ids:
+                continue
+            seen_ids.add(bulletin['id'])
+            try:
+                properties.append(map_bulletin(bulletin, city))
+            except Exception as e:
+                print(f"Error mapping bulletin {bulletin.get('id')}: {str(e)}")
+    return properties
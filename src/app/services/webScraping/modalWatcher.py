@@ -0,0 +1,112 @@
+import json
+import time
+from typing import List, Dict, Any
+
+from playwright.async_api import Page
+
+# How long each close button probe used to wait before moving on to the next selector
+PROBE_TIMEOUT_SECONDS = 5.0
+
+# Installed in every document of a watched page. dismiss() clicks the visible close buttons and
+# returns the selectors that matched; DOM mutation bursts are coalesced into one scan.
+WATCHER_SCRIPT = """
+(selectors) => {
+    if (window.__modalWatcher) return;
+    // A button is not clicked again while its modal is still animating out
+    const clicked = new WeakMap();
+    const dismiss = () => {
+        const found = [];
+        for (const selector of selectors) {
+            for (const button of document.querySelectorAll(selector)) {
+                const last = clicked.get(button);
+                if ((last && Date.now() - last < 1000) || !button.getClientRects().length) continue;
+                clicked.set(button, Date.now());
+                button.click();
+                found.push(selector);
+            }
+        }
+        return found;
+    };
+    let scheduled = false;
+    new MutationObserver(() => {
+        if (scheduled) return;
+        scheduled = true;
+        setTimeout(() => {
+            scheduled = false;
+            const found = dismiss();
+            if (found.length && window.__modalDismissed) window.__modalDismissed(found);
+        }, 50);
+    }).observe(document, {childList: true, subtree: true});
+    window.__modalWatcher = {dismiss};
+}
+"""
+
+
+class ModalWatcher:
+    """Dismisses known modals in the background the moment they are added to a page
+
+    A MutationObserver installed as an init script clicks visible close
+    buttons whenever the DOM changes, so no scraping step has to wait for a
+    modal that is usually not there.
+    """
+
+    def __init__(self, close_selectors: List[str], enabled: bool = True):
+        self.close_selectors = list(close_selectors)
+        self.enabled = enabled
+        self.script = f"({WATCHER_SCRIPT})({json.dumps(self.close_selectors)})"
+        self.stats: Dict[str, Any] = {
+            'modals_dismissed': 0,
+            'dismissed_in_background': 0,
+            'dismissed_by_selector': {},
+            'checks': 0,
+            'estimated_seconds_saved': 0.0
+        }
+
+    def count(self, found: List[str]):
+        self.stats['modals_dismissed'] += len(found)
+        by_selector = self.stats['dismissed_by_selector']
+        for selector in found:
+            by_selector[selector] = by_selector.get(selector, 0) + 1
+
+    def on_dismissed(self, source, found: List[str]):
+        """Called from the page whenever the observer closed something"""
+        self.stats['dismissed_in_background'] += len(found)
+        self.count(found)
+
+    async def attach(self, page: Page):
+        """Install the watcher on a page, for the current document and every later navigation"""
+        if not self.enabled:
+            return
+        try:
+            await page.expose_binding('__modalDismissed', self.on_dismissed)
+            await page.add_init_script(self.script)
+            await page.evaluate(self.script)
+        except Exception as e:
+            print(f"Could not install the modal watcher: {str(e)}")
+
+    async def dismiss_now(self, page: Page) -> bool:
+        """Close any known modal that is showing right now, without waiting for one to appear
+
+        Stands in for the sequential wait_for_selector probes, which cost
+        PROBE_TIMEOUT_SECONDS for every selector that had no modal behind it.
+        """
+        self.stats['checks'] += 1
+        started = time.perf_counter()
+        try:
+            # Installs the watcher first if the page was never attached (or the watcher is disabled)
+            found = await page.evaluate(f"{self.script}, window.__modalWatcher.dismiss()")
+        except Exception as e:
+            print(f"Error dismissing modals: {str(e)}")
+            return False
+        self.count(found)
+        # The probes stopped at the first selector that matched, otherwise they tried them all
+        probes = min(self.close_selectors.index(s) for s in found) + 1 if found else len(self.close_selectors)
+        self.stats['estimated_seconds_saved'] += max(probes * PROBE_TIMEOUT_SECONDS - (time.perf_counter() - started), 0.0)
+        if found:
+            print(f"Dismissed modal with selector: {found[0]}")
+        return bool(found)
+
+    def summary(self) -> str:
+        return (f"Modal watcher: dismissed {self.stats['modals_dismissed']} modals "
+                f"({self.stats['dismissed_in_background']} in the background), {self.stats['checks']} checks, "
+                f"~{self.stats['estimated_seconds_saved']:.0f}s of probe timeouts saved, by selector {self.stats['dismissed_by_selector']}")
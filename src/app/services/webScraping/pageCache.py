@@ -0,0 +1,128 @@
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from playwright.async_api import Page
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data', 'page_cache.sqlite')
+
+# Hashes the outerHTML of every element matching the first selector that matches anything.
+# Runs in the page so only the digest crosses the wire; volatile cache-busting query
+# parameters (?t=1745569398472) are dropped first so they do not change the hash.
+FRAGMENT_HASH_SCRIPT = """
+    async (selectors) => {
+        for (const selector of selectors) {
+            const elements = Array.from(document.querySelectorAll(selector));
+            if (!elements.length) continue;
+            const html = elements.map(e => e.outerHTML).join('\\n').replace(/([?&])t=\\d+/g, '$1');
+            const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(html));
+            const hex = Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+            return { hash: hex, length: html.length };
+        }
+        return null;
+    }
+"""
+
+
+async def fragment_hash(page: Page, selectors: List[str]) -> Optional[str]:
+    """SHA-256 of the page's listing fragment, or None when it is missing or cannot be hashed"""
+    try:
+        result = await page.evaluate(FRAGMENT_HASH_SCRIPT, selectors)
+        return result['hash'] if result else None
+    except Exception as e:
+        print(f"Could not hash page fragment: {str(e)}")
+        return None
+
+
+class PageCache:
+    """Parsed records of listing pages, keyed by URL and the hash of the page's listing fragment
+
+    When a page's fragment hash matches the stored one, its records are
+    reused instead of parsing the page again. Entries are evicted least
+    recently used first once max_entries or max_bytes is exceeded.
+    """
+
+    def __init__(self, path: str = None, max_entries: int = 5000, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path or DEFAULT_CACHE_PATH
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS page_cache (
+                url TEXT PRIMARY KEY,
+                fragment_hash TEXT NOT NULL,
+                records TEXT NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute('CREATE INDEX IF NOT EXISTS page_cache_last_used ON page_cache (last_used)')
+        self.conn.commit()
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'stores': 0, 'evictions': 0, 'records_reused': 0}
+
+    def get(self, url: str, fragment_hash: str) -> Optional[List[Dict[str, Any]]]:
+        """Cached records of the page if its fragment is unchanged, else None"""
+        row = self.conn.execute('SELECT fragment_hash, records FROM page_cache WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            self.stats['misses'] += 1
+            return None
+        if row[0] != fragment_hash:
+            self.stats['stale'] += 1
+            self.stats['misses'] += 1
+            return None
+
+        with self.conn:
+            self.conn.execute('UPDATE page_cache SET last_used = ? WHERE url = ?', (time.time(), url))
+        records = json.loads(row[1])
+        # The listings are unchanged, but they were seen again now
+        scraped_at = datetime.now().isoformat()
+        for record in records:
+            if 'scraped_at' in record:
+                record['scraped_at'] = scraped_at
+        self.stats['hits'] += 1
+        self.stats['records_reused'] += len(records)
+        return records
+
+    def put(self, url: str, fragment_hash: str, records: List[Dict[str, Any]]):
+        payload = json.dumps(records, ensure_ascii=False)
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO page_cache (url, fragment_hash, records, size_bytes, last_used) VALUES (?, ?, ?, ?, ?)',
+                (url, fragment_hash, payload, len(payload.encode('utf-8')), time.time()))
+        self.stats['stores'] += 1
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until both limits hold"""
+        count, total_bytes = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM page_cache').fetchone()
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+        evicted = 0
+        with self.conn:
+            rows = self.conn.execute('SELECT url, size_bytes FROM page_cache ORDER BY last_used').fetchall()
+            for url, size_bytes in rows:
+                if count <= self.max_entries and total_bytes <= self.max_bytes:
+                    break
+                self.conn.execute('DELETE FROM page_cache WHERE url = ?', (url,))
+                count -= 1
+                total_bytes -= size_bytes
+                evicted += 1
+        self.stats['evictions'] += evicted
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / lookups if lookups else 0.0
+
+    def summary(self) -> str:
+        return (f"Page cache: {self.stats['hits']} hits, {self.stats['misses']} misses "
+                f"({self.hit_rate:.0%} hit rate, {self.stats['stale']} changed pages), "
+                f"{self.stats['records_reused']} records reused, {self.stats['evictions']} evicted")
+
+    def close(self):
+        self.conn.close()
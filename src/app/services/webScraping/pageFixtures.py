@@ -0,0 +1,114 @@
+import glob
+import json
+import os
+import re
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from payloadCapture import embedded_state_from_html
+
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data', 'page_fixtures')
+MANIFEST_NAME = 'manifest.jsonl'
+
+UNSAFE_NAME_CHARS = re.compile(r'[^\w-]+')
+
+
+class FixtureRecorder:
+    """Saves the HTML and captured JSON payloads of every scraped page for offline replay
+
+    Layout: <root>/<source>/<label>_p<page>.html, an optional
+    .payloads.json next to it and one manifest.jsonl line per page with
+    the URL and the number of records the live run extracted.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = root or DEFAULT_FIXTURES_DIR
+        self.pages_recorded = 0
+
+    def record(self, source: str, label: str, page_number: int, url: str, html: str,
+               payloads: List[Any] = None, records: int = None, mode: str = None):
+        directory = os.path.join(self.root, source)
+        os.makedirs(directory, exist_ok=True)
+        name = f"{UNSAFE_NAME_CHARS.sub('_', label)}_p{page_number:03d}"
+        with open(os.path.join(directory, f'{name}.html'), 'w', encoding='utf-8') as f:
+            f.write(html)
+        if payloads:
+            with open(os.path.join(directory, f'{name}.payloads.json'), 'w', encoding='utf-8') as f:
+                json.dump(payloads, f, ensure_ascii=False)
+
+        entry = {
+            'file': f'{name}.html',
+            'payloads': f'{name}.payloads.json' if payloads else None,
+            'source': source,
+            'label': label,
+            'page_number': page_number,
+            'url': url,
+            'mode': mode,
+            'records': records,
+            'recorded_at': datetime.now().isoformat()
+        }
+        with open(os.path.join(directory, MANIFEST_NAME), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self.pages_recorded += 1
+
+
+class Fixture:
+    """One recorded page, loaded lazily"""
+
+    def __init__(self, directory: str, entry: Dict[str, Any]):
+        self.directory = directory
+        self.entry = entry
+        self.content: Optional[str] = None
+
+    @property
+    def source(self) -> str:
+        return self.entry['source']
+
+    @property
+    def label(self) -> str:
+        return self.entry['label']
+
+    @property
+    def expected_records(self) -> Optional[int]:
+        return self.entry.get('records')
+
+    def html(self) -> str:
+        if self.content is not None:
+            return self.content
+        with open(os.path.join(self.directory, self.entry['file']), 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def preload(self):
+        """Keep the HTML in memory, so repeated replays time extraction rather than disk reads"""
+        self.content = None
+        self.content = self.html()
+
+    def payloads(self, global_names: List[str] = None) -> List[Any]:
+        """Recorded payloads, or the state embedded in the HTML when none were captured"""
+        if self.entry.get('payloads'):
+            with open(os.path.join(self.directory, self.entry['payloads']), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return embedded_state_from_html(self.html(), global_names)
+
+
+def load_fixtures(source: str, root: str = None) -> List[Fixture]:
+    """Recorded pages of a source, in recording order
+
+    HTML files saved by hand (no manifest line) are included too, labelled
+    after their file name.
+    """
+    directory = os.path.join(root or DEFAULT_FIXTURES_DIR, source)
+    fixtures = {}
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    # A re-recorded page replaces the earlier manifest line
+                    fixtures[entry['file']] = Fixture(directory, entry)
+    for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+        name = os.path.basename(path)
+        if name not in fixtures:
+            fixtures[name] = Fixture(directory, {'file': name, 'source': source, 'label': name.rsplit('_p', 1)[0]})
+    return list(fixtures.values())
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import re
+from typing import List, Dict, Any, Callable, Iterator
+
+from playwright.async_api import Page, Response
+
+# Reads the Next.js bootstrap payload and any extra state globals in one round trip
+READ_EMBEDDED_STATE_SCRIPT = """
+    (globalNames) => {
+        const payloads = [];
+        const nextData = document.getElementById('__NEXT_DATA__');
+        if (nextData) {
+            try { payloads.push(JSON.parse(nextData.textContent)); } catch (e) {}
+        }
+        for (const name of globalNames) {
+            if (window[name]) {
+                try { payloads.push(JSON.parse(JSON.stringify(window[name]))); } catch (e) {}
+            }
+        }
+        return payloads;
+    }
+"""
+
+# The same state in server-rendered HTML, for pages fetched without a browser
+NEXT_DATA_TAG = re.compile(r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.S)
+GLOBAL_ASSIGNMENT = r'window(?:\.{name}|\[["\']{name}["\']\])\s*=\s*'
+
+
+class PayloadCapture:
+    """Collects JSON API responses of a page whose URL matches one of the patterns"""
+
+    def __init__(self, url_patterns: List[str]):
+        self.url_patterns = [re.compile(p) for p in url_patterns]
+        self.payloads: List[Any] = []
+        self.responses_seen = 0
+        self._arrived = asyncio.Event()
+
+    def matches(self, url: str) -> bool:
+        return any(p.search(url) for p in self.url_patterns)
+
+    async def handle_response(self, response: Response):
+        if not self.matches(response.url):
+            return
+        content_type = response.headers.get('content-type', '')
+        if 'json' not in content_type:
+            return
+        try:
+            self.payloads.append(await response.json())
+            self.responses_seen += 1
+            self._arrived.set()
+        except Exception as e:
+            print(f"Could not read JSON payload from {response.url}: {str(e)}")
+
+    def attach(self, page: Page):
+        """Start listening to the page's responses"""
+        page.on("response", self.handle_response)
+
+    def detach(self, page: Page):
+        """Stop listening to the page's responses"""
+        page.remove_listener("response", self.handle_response)
+
+    def drain(self) -> List[Any]:
+        """Return and forget the payloads captured so far"""
+        payloads, self.payloads = self.payloads, []
+        self._arrived.clear()
+        return payloads
+
+    async def wait_for_payload(self, timeout: float) -> bool:
+        """Wait until at least one matching payload has arrived"""
+        if self.payloads:
+            return True
+        try:
+            await asyncio.wait_for(self._arrived.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+async def read_embedded_state(page: Page, global_names: List[str] = None) -> List[Any]:
+    """Read __NEXT_DATA__ and the given window globals from the page"""
+    try:
+        return await page.evaluate(READ_EMBEDDED_STATE_SCRIPT, global_names or [])
+    except Exception as e:
+        print(f"Could not read embedded page state: {str(e)}")
+        return []
+
+
+def embedded_state_from_html(html: str, global_names: List[str] = None) -> List[Any]:
+    """Parse __NEXT_DATA__ and `window.<name> = {...}` assignments out of raw HTML
+
+    The HTML counterpart of read_embedded_state; globals assigned anything
+    but a JSON literal are skipped.
+    """
+    payloads = []
+    match = NEXT_DATA_TAG.search(html)
+    if match:
+        try:
+            payloads.append(json.loads(match.group(1)))
+        except ValueError:
+            pass
+    decoder = json.JSONDecoder()
+    for name in global_names or []:
+        assignment = re.search(GLOBAL_ASSIGNMENT.format(name=re.escape(name)), html)
+        if not assignment:
+            continue
+        try:
+            payloads.append(decoder.raw_decode(html, assignment.end())[0])
+        except ValueError:
+            pass
+    return payloads
+
+
+def find_objects(payload: Any, predicate: Callable[[Dict[str, Any]], bool]) -> Iterator[Dict[str, Any]]:
+    """Walk a JSON payload and yield every dict the predicate accepts
+
+    Accepted dicts are not searched further, so nested copies of the same
+    listing are not reported twice.
+    """
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if predicate(node):
+                yield node
+                continue
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
@@ -0,0 +1,120 @@
+from typing import List, Dict, Any, Iterable
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from crawlCheckpoint import listing_id
+
+# Placeholders the scrapers write when a field is missing
+SENTINELS = ['', 'N/A', 'Price not available', 'Location not available', 'No title', 'None', 'null']
+
+# Raw fields as scraped, everything read as text before it is parsed
+RAW_FIELDS = ['title', 'price', 'rooms', 'size', 'floor', 'property_type', 'street', 'address', 'neighborhood',
+              'location', 'city', 'broker', 'image', 'link', 'change', 'previous_price', 'scraped_at']
+
+TEXT_FIELDS = ['title', 'property_type', 'street', 'address', 'neighborhood', 'location', 'broker', 'image', 'link', 'change']
+
+# Typed output of the normalizer; the property store drops city since it is a partition key there
+NORMALIZED_SCHEMA = pa.schema([
+    ('listing_id', pa.string()),
+    ('title', pa.string()),
+    ('price', pa.int64()),
+    ('rooms', pa.float32()),
+    ('size', pa.float32()),
+    ('floor', pa.int16()),
+    ('property_type', pa.string()),
+    ('street', pa.string()),
+    ('address', pa.string()),
+    ('neighborhood', pa.string()),
+    ('location', pa.string()),
+    ('city', pa.string()),
+    ('broker', pa.string()),
+    ('image', pa.string()),
+    ('link', pa.string()),
+    ('change', pa.string()),
+    ('previous_price', pa.int64()),
+    ('scraped_at', pa.timestamp('us')),
+])
+
+GROUND_FLOOR_WORDS = ['קרקע', 'ground']
+ISO_TIMESTAMP = r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d{1,6})?$'
+NUMBER = r'(?P<number>\d+(?:\.\d+)?)'
+
+
+def raw_table(records: Iterable[Dict[str, Any]]) -> pa.Table:
+    """Column-wise text table of scraped records plus their listing ids
+
+    Scrapers disagree on types (Yad2 prices are strings, Madlan's are ints),
+    so every raw value is read as text and parsed in normalize_table.
+    """
+    records = list(records)
+    columns = {'listing_id': pa.array([listing_id(r) for r in records], pa.string())}
+    for field in RAW_FIELDS:
+        values = [r.get(field) for r in records]
+        columns[field] = pa.array([None if v is None else str(v) for v in values], pa.string())
+    return pa.table(columns)
+
+
+def clean_text(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Trim whitespace and turn sentinel placeholders into nulls"""
+    column = pc.utf8_trim_whitespace(column)
+    return pc.if_else(pc.is_in(column, value_set=pa.array(SENTINELS)), None, column)
+
+
+def parse_integer(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Keep only the digits: "₪4,150,000" -> 4150000; text without digits -> null"""
+    digits = pc.replace_substring_regex(clean_text(column), pattern=r'[^0-9]', replacement='')
+    digits = pc.if_else(pc.equal(digits, ''), None, digits)
+    return pc.cast(digits, pa.int64())
+
+
+def parse_number(column: pa.ChunkedArray, type_: pa.DataType) -> pa.ChunkedArray:
+    """First decimal number in the text: "3.5 חדרים" -> 3.5"""
+    column = pc.replace_substring(clean_text(column), pattern=',', replacement='')
+    matched = pc.match_substring_regex(column, NUMBER)
+    numbers = pc.struct_field(pc.extract_regex(column, NUMBER), [0])
+    return pc.cast(pc.if_else(matched, numbers, None), type_)
+
+
+def parse_floor(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Floor number; ground floor words become 0 and basement floors stay negative"""
+    column = clean_text(column)
+    ground = pc.match_substring_regex(column, '|'.join(GROUND_FLOOR_WORDS))
+    pattern = r'(?P<floor>-?\d+)'
+    matched = pc.match_substring_regex(column, pattern)
+    floors = pc.struct_field(pc.extract_regex(column, pattern), [0])
+    floors = pc.if_else(matched, floors, None)
+    floors = pc.if_else(ground, '0', floors)
+    return pc.cast(floors, pa.int16())
+
+
+def parse_timestamp(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    column = clean_text(column)
+    valid = pc.match_substring_regex(column, ISO_TIMESTAMP)
+    return pc.cast(pc.if_else(valid, column, None), pa.timestamp('us'))
+
+
+def normalize_table(raw: pa.Table) -> pa.Table:
+    """Parse a raw_table into NORMALIZED_SCHEMA, one vectorized pass per column"""
+    columns = {'listing_id': raw['listing_id']}
+    for field in TEXT_FIELDS:
+        columns[field] = clean_text(raw[field])
+    columns['price'] = parse_integer(raw['price'])
+    columns['previous_price'] = parse_integer(raw['previous_price'])
+    columns['rooms'] = parse_number(raw['rooms'], pa.float32())
+    columns['size'] = parse_number(raw['size'], pa.float32())
+    columns['floor'] = parse_floor(raw['floor'])
+    # Yad2 only knows the city as the last part of the location line ("דירה, סנסן, צור הדסה")
+    location_city = pc.replace_substring_regex(columns['location'], pattern=r'^.*,\s*', replacement='')
+    columns['city'] = pc.coalesce(clean_text(raw['city']), location_city)
+    columns['scraped_at'] = parse_timestamp(raw['scraped_at'])
+    return pa.table([columns[field.name] for field in NORMALIZED_SCHEMA], schema=NORMALIZED_SCHEMA)
+
+
+def normalize_records(records: Iterable[Dict[str, Any]]) -> pa.Table:
+    return normalize_table(raw_table(records))
+
+
+def null_counts(table: pa.Table, fields: List[str] = None) -> Dict[str, int]:
+    """Nulls per column, to see how much each parse left empty"""
+    return {field: table[field].null_count for field in (fields or table.column_names)}
@@ -0,0 +1,153 @@
+import os
+import re
+import uuid
+from datetime import datetime, date
+from typing import List, Dict, Any, Optional, Iterator
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from propertyNormalizer import NORMALIZED_SCHEMA, normalize_records
+
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data', 'property_store')
+
+# Store schema; city is not stored in the files since it is a partition key
+PROPERTY_SCHEMA = pa.schema([field for field in NORMALIZED_SCHEMA if field.name != 'city'])
+
+# Hive style directories: source=yad2/city=חיפה/date=2025-04-25/
+PARTITIONING = ds.partitioning(
+    pa.schema([('source', pa.string()), ('city', pa.string()), ('date', pa.string())]),
+    flavor='hive'
+)
+
+
+def to_table(records: List[Dict[str, Any]]) -> pa.Table:
+    """Normalize scraped records into the store schema"""
+    return normalize_records(records).drop_columns(['city'])
+
+
+def city_key(city: str) -> str:
+    """The city's partition name, the same for every source
+
+    Madlan writes city slugs ("תל-אביב-יפו") and Yad2 names ("תל אביב - יפו"),
+    so hyphens and runs of whitespace are folded into single spaces.
+    """
+    return re.sub(r'[\s\-]+', ' ', city).strip()
+
+
+def partition_dir(root: str, source: str, city: str, day: str) -> str:
+    return os.path.join(root, f'source={source}', f'city={city_key(city)}', f'date={day}')
+
+
+class ParquetSink:
+    """Writes scraped pages into the columnar store, one Parquet file per crawl
+
+    Same interface as JsonlSink so the scrapers can stream into either.
+    Records are buffered and normalized into a row group every row_group_size records.
+    """
+
+    def __init__(self, source: str, city: str, root: str = None, row_group_size: int = 5000, day: str = None):
+        self.root = root or DEFAULT_STORE_DIR
+        self.source = source
+        self.city = city_key(city)
+        self.row_group_size = row_group_size
+        self.directory = partition_dir(self.root, source, city, day or date.today().isoformat())
+        self.files: List[str] = []
+        self.records_written = 0
+        self.pages_written = 0
+        self.first_record: Optional[Dict[str, Any]] = None
+        self._buffer: List[Dict[str, Any]] = []
+        self._writer: pq.ParquetWriter = None
+
+    def write_page(self, records: List[Dict[str, Any]]):
+        """Append one page of records"""
+        if not records:
+            return
+        if self.first_record is None:
+            self.first_record = records[0]
+        self._buffer.extend(records)
+        self.records_written += len(records)
+        self.pages_written += 1
+        if len(self._buffer) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        if self._writer is None:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f'part-{datetime.now().strftime("%H%M%S")}-{uuid.uuid4().hex[:8]}.parquet')
+            self._writer = pq.ParquetWriter(path, PROPERTY_SCHEMA, compression='zstd')
+            self.files.append(path)
+        self._writer.write_table(to_table(self._buffer))
+        self._buffer = []
+
+    def close(self):
+        self._flush()
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+
+    def records(self) -> 'StoredRecords':
+        """Lazy view of everything this sink has written"""
+        return StoredRecords(list(self.files), self.records_written)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class StoredRecords:
+    """List-like handle on Parquet files written by a crawl: len() and iteration by row group"""
+
+    def __init__(self, files: List[str], count: int):
+        self.files = files
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for path in self.files:
+            for batch in pq.ParquetFile(path).iter_batches():
+                yield from batch.to_pylist()
+
+
+def write_records(records: List[Dict[str, Any]], source: str, city: str, day: str, root: str = None) -> str:
+    """Write one batch of records into its partition and return the file path"""
+    directory = partition_dir(root or DEFAULT_STORE_DIR, source, city, day)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'part-{uuid.uuid4().hex[:12]}.parquet')
+    pq.write_table(to_table(records), path, compression='zstd')
+    return path
+
+
+def open_store(root: str = None) -> ds.Dataset:
+    """The whole store as a dataset; source, city and date come from the directory names"""
+    return ds.dataset(root or DEFAULT_STORE_DIR, format='parquet', partitioning=PARTITIONING)
+
+
+def load_table(columns: List[str] = None, source: str = None, city: str = None,
+               since: str = None, root: str = None) -> pa.Table:
+    """Read only the requested columns of the matching partitions
+
+    since is an ISO date; partitions before it are skipped without being opened.
+    """
+    dataset = open_store(root)
+    conditions = []
+    if source:
+        conditions.append(ds.field('source') == source)
+    if city:
+        conditions.append(ds.field('city') == city_key(city))
+    if since:
+        conditions.append(ds.field('date') >= since)
+    filter_expr = None
+    for condition in conditions:
+        filter_expr = condition if filter_expr is None else filter_expr & condition
+    return dataset.to_table(columns=columns, filter=filter_expr)
@@ -0,0 +1,32 @@
+import asyncio
+import time
+from typing import Dict
+from urllib.parse import urlparse
+
+
+class HostRateLimiter:
+    """Spaces out navigations so each host sees at most N requests per second"""
+
+    def __init__(self, requests_per_second: float = 0.5, per_host: Dict[str, float] = None):
+        self.requests_per_second = requests_per_second
+        self.per_host = per_host or {}
+        self._next_slot: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.waited_seconds = 0.0
+
+    def _interval(self, host: str) -> float:
+        rate = self.per_host.get(host, self.requests_per_second)
+        return 1.0 / rate if rate > 0 else 0.0
+
+    async def wait(self, url: str):
+        """Block until the host of the given url may be requested again"""
+        host = urlparse(url).netloc
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            slot = self._next_slot.get(host, now)
+            if slot > now:
+                self.waited_seconds += slot - now
+                await asyncio.sleep(slot - now)
+                now = slot
+            self._next_slot[host] = now + self._interval(host)
@@ -0,0 +1,102 @@
+from typing import List, Dict, Any
+from urllib.parse import urlparse
+
+from playwright.async_api import Page, Route
+
+# Resource types the scrapers never need - we only store image URLs, not the images
+DEFAULT_BLOCKED_RESOURCE_TYPES = ['image', 'media', 'font']
+
+# Ad, analytics and tracking hosts seen on Yad2 and Madlan
+DEFAULT_BLOCKED_DOMAINS = [
+    'google-analytics.com',
+    'googletagmanager.com',
+    'googlesyndication.com',
+    'googleadservices.com',
+    'doubleclick.net',
+    'adservice.google.com',
+    'facebook.net',
+    'facebook.com',
+    'hotjar.com',
+    'clarity.ms',
+    'taboola.com',
+    'outbrain.com',
+    'criteo.com',
+    'bizibly.com',
+    'tiktok.com',
+    'newrelic.com',
+    'nr-data.net',
+    'sentry.io'
+]
+
+# Rough transfer size per blocked request, used to estimate the bytes saved
+ESTIMATED_BYTES_PER_TYPE = {
+    'image': 60 * 1024,
+    'media': 500 * 1024,
+    'font': 40 * 1024,
+    'script': 50 * 1024,
+    'stylesheet': 20 * 1024,
+    'xhr': 5 * 1024,
+    'fetch': 5 * 1024
+}
+DEFAULT_ESTIMATED_BYTES = 10 * 1024
+
+
+class RequestFilter:
+    """Aborts requests for resource types and domains the scrapers do not need"""
+
+    def __init__(self, blocked_resource_types: List[str] = None, blocked_domains: List[str] = None,
+                 allowed_domains: List[str] = None, enabled: bool = True):
+        self.blocked_resource_types = set(DEFAULT_BLOCKED_RESOURCE_TYPES if blocked_resource_types is None else blocked_resource_types)
+        self.blocked_domains = list(DEFAULT_BLOCKED_DOMAINS if blocked_domains is None else blocked_domains)
+        self.allowed_domains = list(allowed_domains or [])
+        self.enabled = enabled
+        self.stats: Dict[str, Any] = {
+            'requests_allowed': 0,
+            'requests_blocked': 0,
+            'estimated_bytes_saved': 0,
+            'blocked_by_type': {},
+            'blocked_by_domain': {}
+        }
+
+    def _matches(self, host: str, domains: List[str]) -> bool:
+        return any(host == domain or host.endswith('.' + domain) for domain in domains)
+
+    def should_block(self, url: str, resource_type: str) -> str:
+        """Return the reason to block the request, or an empty string to let it through"""
+        host = urlparse(url).hostname or ''
+        if self._matches(host, self.allowed_domains):
+            return ''
+        if resource_type in self.blocked_resource_types:
+            return 'type'
+        if self._matches(host, self.blocked_domains):
+            return 'domain'
+        return ''
+
+    async def handle_route(self, route: Route):
+        request = route.request
+        reason = self.should_block(request.url, request.resource_type)
+        if not reason:
+            self.stats['requests_allowed'] += 1
+            await route.continue_()
+            return
+
+        self.stats['requests_blocked'] += 1
+        self.stats['estimated_bytes_saved'] += ESTIMATED_BYTES_PER_TYPE.get(request.resource_type, DEFAULT_ESTIMATED_BYTES)
+        by_type = self.stats['blocked_by_type']
+        by_type[request.resource_type] = by_type.get(request.resource_type, 0) + 1
+        if reason == 'domain':
+            host = urlparse(request.url).hostname or ''
+            by_domain = self.stats['blocked_by_domain']
+            by_domain[host] = by_domain.get(host, 0) + 1
+        await route.abort()
+
+    async def attach(self, page: Page):
+        """Install the filter on a page"""
+        if self.enabled:
+            await page.route("**/*", self.handle_route)
+
+    def summary(self) -> str:
+        total = self.stats['requests_allowed'] + self.stats['requests_blocked']
+        saved_mb = self.stats['estimated_bytes_saved'] / 1024 / 1024
+        return (f"Request filter: blocked {self.stats['requests_blocked']} of {total} requests, "
+                f"~{saved_mb:.1f} MB saved, by type {self.stats['blocked_by_type']}")
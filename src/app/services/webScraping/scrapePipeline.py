@@ -0,0 +1,217 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+from httpFetcher import HttpFetcher
+from stageTimings import RunTimings, PageSpans
+
+PIPELINE_STAGES = ['fetch', 'parse', 'sink']
+
+
+class PipelinePage:
+    """One results page on its way through the pipeline stages"""
+
+    def __init__(self, page_number: int, url: str, spans: PageSpans):
+        self.page_number = page_number
+        self.url = url
+        self.spans = spans
+        self.status: Optional[int] = None
+        self.html: Optional[str] = None
+        self.properties: Optional[List[Dict[str, Any]]] = None
+        self.has_more_pages = False
+
+
+class ScrapePipeline:
+    """Fetches, parses and saves results pages as concurrent stages
+
+    The stages are joined by bounded queues: a full queue makes the stage
+    before it wait instead of letting fetched pages pile up in memory. Pages
+    are fetched by several tasks on the event loop and parsed in worker
+    processes, so network waits and CPU work overlap. Records reach on_page
+    as parsed, like on the browser path; the Parquet sink normalizes them
+    when it writes. The
+    sink gets the pages in page order and the run stops at the first page the
+    HTTP path could not serve, so the caller can go on from there with the browser.
+
+    parse is called as parse(html, *parse_args) in a worker process and returns
+    the page's records and a truthy value when a next page exists; it has to be
+    a module level function so it can be pickled. on_page(page_number, records)
+    returns False to stop the run.
+    """
+
+    def __init__(self, label: str, fetcher: HttpFetcher, page_url: Callable[[int], str],
+                 parse: Callable[..., Tuple[Optional[List[Dict[str, Any]]], Any]], parse_args: tuple = (),
+                 fetch_concurrency: int = 4, parse_workers: int = None, queue_size: int = 4,
+                 timings: RunTimings = None, executor: Executor = None):
+        self.label = label
+        self.fetcher = fetcher
+        self.page_url = page_url
+        self.parse = parse
+        self.parse_args = parse_args
+        self.fetch_concurrency = fetch_concurrency
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.timings = timings
+        # A shared pool (e.g. one per crawl) saves starting worker processes for every city
+        self.executor = executor
+        self.stats = {stage: {'pages': 0, 'seconds': 0.0} for stage in PIPELINE_STAGES}
+        self.queue_peaks: Dict[str, int] = {}
+        self.pages_written = 0
+        self.records_written = 0
+        # Last page of the results once a 404 or a page without a next page link was seen
+        self.results_end: Optional[int] = None
+        # First page the HTTP path could not serve
+        self.resume_page: Optional[int] = None
+        self.wall_seconds = 0.0
+
+    def end_at(self, page_number: int):
+        """Fetch nothing past this page; pages already in flight beyond it are dropped"""
+        self.last_page = min(self.last_page, page_number)
+
+    def record(self, stage: str, page: PipelinePage, span: str, started: float):
+        elapsed = time.perf_counter() - started
+        self.stats[stage]['pages'] += 1
+        self.stats[stage]['seconds'] += elapsed
+        page.spans.add(span, elapsed)
+
+    async def put(self, name: str, queue: asyncio.Queue, page: PipelinePage):
+        await queue.put(page)
+        self.queue_peaks[name] = max(self.queue_peaks.get(name, 0), queue.qsize())
+
+    async def fetch_stage(self, parse_queue: asyncio.Queue):
+        while self.next_page <= self.last_page:
+            page_number = self.next_page
+            self.next_page += 1
+            page = PipelinePage(page_number, self.page_url(page_number), PageSpans(f"{self.label} page {page_number}"))
+            started = time.perf_counter()
+            fetched = await self.fetcher.fetch(page.url)
+            self.record('fetch', page, 'navigate', started)
+            if fetched:
+                page.status = fetched.status
+                if fetched.status == 200:
+                    page.html = fetched.html
+                elif fetched.status == 404:
+                    self.end_at(page_number)
+            await self.put('parse', parse_queue, page)
+
+    async def parse_stage(self, parse_queue: asyncio.Queue, sink_queue: asyncio.Queue, executor: Executor):
+        loop = asyncio.get_running_loop()
+        while True:
+            page = await parse_queue.get()
+            if page is None:
+                return
+            if page.html is not None and page.page_number <= self.last_page:
+                started = time.perf_counter()
+                try:
+                    page.properties, next_page = await loop.run_in_executor(executor, self.parse, page.html, *self.parse_args)
+                    page.has_more_pages = bool(next_page)
+                except Exception as e:
+                    print(f"Error parsing page {page.page_number}: {str(e)}")
+                self.record('parse', page, 'parse', started)
+                # The HTML is not needed past this point
+                page.html = None
+                if not page.properties or not page.has_more_pages:
+                    self.end_at(page.page_number)
+            elif page.status != 404:
+                self.end_at(page.page_number)
+            await self.put('sink', sink_queue, page)
+
+    async def sink_stage(self, sink_queue: asyncio.Queue, start_page: int, on_page: Callable[[int, List[Dict[str, Any]]], bool]):
+        # Pages finish out of order; they are handed on strictly by page number
+        pending: Dict[int, PipelinePage] = {}
+        next_to_write = start_page
+        while True:
+            page = await sink_queue.get()
+            if page is None:
+                return
+            pending[page.page_number] = page
+            while next_to_write in pending and next_to_write <= self.last_page:
+                page = pending.pop(next_to_write)
+                self.write_page(page, on_page)
+                next_to_write += 1
+            # Anything past the end is dropped
+            for page_number in [n for n in pending if n > self.last_page]:
+                del pending[page_number]
+
+    def write_page(self, page: PipelinePage, on_page: Callable[[int, List[Dict[str, Any]]], bool]):
+        page_number = page.page_number
+        if page.status == 404:
+            print(f"Reached the last page (404) at page {page_number}")
+            self.results_end = page_number - 1
+            self.end_at(page_number - 1)
+            return
+        if not page.properties:
+            status = page.status if page.status is not None else "request failed"
+            print(f"No listings in the HTML of page {page_number} ({status}), stopping the pipeline there")
+            self.resume_page = page_number
+            self.end_at(page_number - 1)
+            return
+        started = time.perf_counter()
+        with page.spans.span('write'):
+            keep_going = on_page(page_number, page.properties)
+        self.stats['sink']['pages'] += 1
+        self.stats['sink']['seconds'] += time.perf_counter() - started
+        self.pages_written += 1
+        self.records_written += len(page.properties)
+        summary = page.spans.finish(len(page.properties))
+        if self.timings:
+            self.timings.add_page(summary)
+        if not page.has_more_pages:
+            self.results_end = page_number
+        if not keep_going or not page.has_more_pages:
+            self.end_at(page_number)
+
+    async def close_stages(self, fetchers: List[asyncio.Task], parsers: List[asyncio.Task], sink: asyncio.Task,
+                           parse_queue: asyncio.Queue, sink_queue: asyncio.Queue):
+        """Close each stage with one end marker per consumer once the stage before it is done"""
+        await asyncio.gather(*fetchers)
+        for _ in parsers:
+            await parse_queue.put(None)
+        await asyncio.gather(*parsers)
+        await sink_queue.put(None)
+        await sink
+
+    async def run(self, start_page: int, max_pages: int, on_page: Callable[[int, List[Dict[str, Any]]], bool]) -> Optional[int]:
+        """Push pages from start_page through the stages
+
+        Returns the page to continue from with the browser, or None when the
+        results ended, on_page stopped the run or max_pages was reached.
+        """
+        self.next_page = start_page
+        self.last_page = max_pages
+        started = time.perf_counter()
+        executor = self.executor or ProcessPoolExecutor(max_workers=self.parse_workers)
+        parse_queue = asyncio.Queue(self.queue_size)
+        sink_queue = asyncio.Queue(self.queue_size)
+
+        fetchers = [asyncio.create_task(self.fetch_stage(parse_queue)) for _ in range(self.fetch_concurrency)]
+        parsers = [asyncio.create_task(self.parse_stage(parse_queue, sink_queue, executor)) for _ in range(self.parse_workers)]
+        sink = asyncio.create_task(self.sink_stage(sink_queue, start_page, on_page))
+        closer = asyncio.create_task(self.close_stages(fetchers, parsers, sink, parse_queue, sink_queue))
+        tasks = fetchers + parsers + [sink, closer]
+        try:
+            # A stage that raises (e.g. on_page failing to write) would leave the others blocked on full queues
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if not task.cancelled() and task.exception():
+                    raise task.exception()
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            if self.executor is None:
+                executor.shutdown(cancel_futures=True)
+            self.wall_seconds = time.perf_counter() - started
+        return self.resume_page
+
+    def summary(self) -> str:
+        stages = ', '.join(f"{stage} {entry['seconds']:.1f}s/{entry['pages']}" for stage, entry in self.stats.items())
+        peaks = ', '.join(f"{name} {depth}" for name, depth in self.queue_peaks.items())
+        rate = self.records_written / self.wall_seconds if self.wall_seconds else 0.0
+        return (f"Pipeline {self.label}: {self.pages_written} pages, {self.records_written} records in "
+                f"{self.wall_seconds:.1f}s ({rate:.0f} records/s, {self.parse_workers} parse workers); "
+                f"stage time {stages}; peak queue depth {peaks}")
@@ -0,0 +1,176 @@
+import json
+import os
+from typing import List, Dict, Any, Optional, Tuple
+
+DEFAULT_SELECTOR_STATS_PATH = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data', 'selector_stats.json')
+
+# Lookups without a single hit after which a selector is reported as dead
+DEAD_AFTER_MISSES = 100
+
+
+class SelectorChain:
+    """Fallback selectors for one element, tried in order of how often they hit
+
+    The chain starts in the order of the hits persisted by earlier runs and
+    re-sorts itself on this run's hits, so a selector that stops matching
+    after a site change drops back within a few lookups.
+    """
+
+    def __init__(self, name: str, selectors: List[str], counts: Dict[str, Dict[str, int]] = None):
+        self.name = name
+        self.selectors = list(selectors)
+        counts = counts or {}
+        self.counts = {s: {'hits': counts.get(s, {}).get('hits', 0), 'misses': counts.get(s, {}).get('misses', 0)}
+                       for s in self.selectors}
+        # Lifetime hits decide the starting order, the declared order breaks ties
+        self.rank = {s: i for i, s in enumerate(sorted(self.selectors, key=lambda s: -self.counts[s]['hits']))}
+        self.run_hits = dict.fromkeys(self.selectors, 0)
+        self.last_hit: Optional[str] = None
+        self.order = sorted(self.selectors, key=self.rank.get)
+
+    def ordered(self) -> List[str]:
+        return self.order
+
+    def record(self, missed: List[str], hit: Optional[str]):
+        """Count one lookup: the selectors tried without a match and the one that matched"""
+        for selector in missed:
+            self.counts[selector]['misses'] += 1
+        self.last_hit = hit
+        if hit is None:
+            return
+        self.counts[hit]['hits'] += 1
+        self.run_hits[hit] += 1
+        # Only a hit behind a miss can change the order
+        if missed:
+            self.reorder()
+
+    def reorder(self):
+        self.order = sorted(self.selectors, key=lambda s: (-self.run_hits[s], self.rank[s]))
+
+    def merge(self, counts: Dict[str, Dict[str, int]]):
+        """Add lookups counted by the same chain in another process (a parse worker)"""
+        for selector, c in counts.items():
+            if selector not in self.counts:
+                continue
+            self.counts[selector]['hits'] += c['hits']
+            self.counts[selector]['misses'] += c['misses']
+            self.run_hits[selector] += c['hits']
+        self.reorder()
+
+    def first_match(self, node):
+        """select_one down the chain on a parsed document (htmlParsers.HtmlNode)"""
+        missed = []
+        for selector in self.order:
+            found = node.select_one(selector)
+            if found is not None:
+                self.record(missed, selector)
+                return found
+            missed.append(selector)
+        self.record(missed, None)
+        return None
+
+    def first_select(self, node) -> Tuple[list, Optional[str]]:
+        """select down the chain until a selector finds elements, with the selector that found them"""
+        missed = []
+        for selector in self.order:
+            found = node.select(selector)
+            if found:
+                self.record(missed, selector)
+                return found, selector
+            missed.append(selector)
+        self.record(missed, None)
+        return [], None
+
+    async def wait_for_first(self, page, timeout: float = 5000, **options) -> Tuple[Any, Optional[str]]:
+        """Wait down the chain on a Playwright page, returning a locator for the element and the selector
+
+        A locator rather than an element handle, so nothing has to be disposed afterwards.
+        """
+        missed = []
+        for selector in self.order:
+            element = page.locator(selector).first
+            try:
+                await element.wait_for(timeout=timeout, **options)
+            except Exception as e:
+                print(f"Selector {selector} failed: {str(e)}")
+                element = None
+            if element:
+                self.record(missed, selector)
+                return element, selector
+            missed.append(selector)
+        self.record(missed, None)
+        return None, None
+
+
+class SelectorStats:
+    """The selector chains of one site and their hit counts, persisted between runs as JSON"""
+
+    def __init__(self, site: str, path: str = None):
+        self.site = site
+        self.path = path or DEFAULT_SELECTOR_STATS_PATH
+        self.chains: Dict[str, SelectorChain] = {}
+        self.saved = self.load_file()
+
+    def load_file(self) -> Dict[str, Any]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Could not read selector stats from {self.path}: {str(e)}")
+            return {}
+
+    def chain(self, name: str, selectors: List[str]) -> SelectorChain:
+        if name not in self.chains:
+            self.chains[name] = SelectorChain(name, selectors, self.saved.get(self.site, {}).get(name))
+        return self.chains[name]
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        return {name: {s: dict(c) for s, c in chain.counts.items()} for name, chain in self.chains.items()}
+
+    def counts_since(self, snapshot: Dict[str, Dict[str, Dict[str, int]]]) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Lookups counted since snapshot(), per chain and selector"""
+        delta = {}
+        for name, chain in self.chains.items():
+            before = snapshot.get(name, {})
+            delta[name] = {s: {k: c[k] - before.get(s, {}).get(k, 0) for k in ('hits', 'misses')}
+                           for s, c in chain.counts.items()}
+        return delta
+
+    def merge(self, counts: Dict[str, Dict[str, Dict[str, int]]]):
+        """Fold in counts_since() deltas from a parse worker process"""
+        for name, chain_counts in counts.items():
+            if name in self.chains:
+                self.chains[name].merge(chain_counts)
+
+    def save(self):
+        """Write this site's counts, keeping whatever other sites and chains the file holds"""
+        data = self.load_file()
+        site = data.setdefault(self.site, {})
+        for name, chain in self.chains.items():
+            site[name] = chain.counts
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Could not save selector stats to {self.path}: {str(e)}")
+
+    def summary(self) -> str:
+        dead = [f"{name}: {selector}" for name, chain in self.chains.items()
+                for selector in dead_selectors(chain.counts)]
+        order = {name: chain.ordered()[0] for name, chain in self.chains.items()}
+        return f"Selector chains ({self.site}): leading {order}, dead {dead or 'none'}"
+
+
+def dead_selectors(counts: Dict[str, Dict[str, int]], min_misses: int = DEAD_AFTER_MISSES) -> List[str]:
+    """Selectors that never matched in at least min_misses lookups"""
+    return [selector for selector, c in counts.items() if c['hits'] == 0 and c['misses'] >= min_misses]
+
+
+def hit_rates(counts: Dict[str, Dict[str, int]]) -> Dict[str, Optional[float]]:
+    return {selector: c['hits'] / (c['hits'] + c['misses']) if c['hits'] + c['misses'] else None
+            for selector, c in counts.items()}
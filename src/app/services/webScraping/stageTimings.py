@@ -0,0 +1,179 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+DEFAULT_TIMINGS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data', 'timings')
+
+# Stages the services time; anything else on a page ends up in 'other'
+STAGES = ['navigate', 'modals', 'wait', 'scroll', 'serialize', 'parse', 'extract', 'write']
+
+# Upper bounds (seconds) of the page duration histogram in the Prometheus output
+PAGE_SECONDS_BUCKETS = [1, 2, 5, 10, 20, 30, 60, 120]
+
+
+class PageSpans:
+    """Exclusive wall time per stage for one page
+
+    Spans may nest; a nested span's time is taken out of the enclosing one,
+    so the stages of a page add up to its total instead of double counting.
+    """
+
+    def __init__(self, label: str, timings: 'RunTimings' = None):
+        self.label = label
+        self.timings = timings
+        self.records: Optional[int] = None
+        self.summary: Optional[Dict[str, Any]] = None
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        # Open spans as [stage, started, seconds spent in nested spans]
+        self.open_spans: List[list] = []
+
+    @contextmanager
+    def span(self, stage: str):
+        frame = [stage, time.perf_counter(), 0.0]
+        self.open_spans.append(frame)
+        try:
+            yield
+        finally:
+            self.open_spans.remove(frame)
+            elapsed = time.perf_counter() - frame[1]
+            self.record(stage, elapsed - frame[2])
+            if self.open_spans:
+                self.open_spans[-1][2] += elapsed
+
+    def add(self, stage: str, seconds: float):
+        """Time measured elsewhere (PageWaits), taken out of the currently open span"""
+        self.record(stage, seconds)
+        if self.open_spans:
+            self.open_spans[-1][2] += seconds
+
+    def record(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + max(seconds, 0.0)
+        self.calls[stage] = self.calls.get(stage, 0) + 1
+
+    def finish(self, records: int = None) -> Dict[str, Any]:
+        """Close the page and hand its summary to the run; later calls return the same summary"""
+        if self.summary is not None:
+            return self.summary
+        records = records if records is not None else self.records
+        total = time.perf_counter() - self.started
+        stages = dict(self.stages)
+        stages['other'] = max(total - sum(stages.values()), 0.0)
+        summary = self.summary = {
+            'page': self.label,
+            'total_seconds': round(total, 3),
+            'records': records,
+            'stages': {stage: round(seconds, 3) for stage, seconds in stages.items()},
+            'calls': dict(self.calls)
+        }
+        if self.timings:
+            self.timings.add_page(summary)
+        return summary
+
+
+class RunTimings:
+    """Collects the page spans of a scraper run and reports them as JSON or Prometheus text"""
+
+    def __init__(self, service: str, output_dir: str = None, prometheus: bool = False, print_pages: bool = True):
+        self.service = service
+        self.output_dir = output_dir or DEFAULT_TIMINGS_DIR
+        self.prometheus = prometheus
+        self.print_pages = print_pages
+        self.started_at = datetime.now()
+        self.started = time.perf_counter()
+        self.pages: List[Dict[str, Any]] = []
+
+    def begin_page(self, label: str) -> PageSpans:
+        return PageSpans(label, self)
+
+    def add_page(self, summary: Dict[str, Any]):
+        self.pages.append(summary)
+        if self.print_pages:
+            print(f"Timings: {json.dumps(summary, ensure_ascii=False)}")
+
+    def add_to_page(self, page: Dict[str, Any], stage: str, seconds: float):
+        """Time spent on a page after its spans finished, e.g. writing pages that were prefetched out of order"""
+        page['stages'][stage] = round(page['stages'].get(stage, 0.0) + seconds, 3)
+        page['calls'][stage] = page['calls'].get(stage, 0) + 1
+        page['total_seconds'] = round(page['total_seconds'] + seconds, 3)
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-stage totals, share of page time and the mean and max per page"""
+        page_seconds = sum(p['total_seconds'] for p in self.pages)
+        records = sum(p['records'] or 0 for p in self.pages)
+        # Known stages first, then any a service timed outside STAGES
+        names = STAGES + ['other']
+        for page in self.pages:
+            names += [stage for stage in page['stages'] if stage not in names]
+        stages = {}
+        for stage in names:
+            values = [p['stages'][stage] for p in self.pages if stage in p['stages']]
+            if not values:
+                continue
+            total = sum(values)
+            stages[stage] = {
+                'seconds': round(total, 3),
+                'share': round(total / page_seconds, 3) if page_seconds else 0.0,
+                'mean_per_page': round(total / len(self.pages), 3),
+                'max_per_page': round(max(values), 3),
+                'calls': sum(p['calls'].get(stage, 0) for p in self.pages)
+            }
+        return {
+            'service': self.service,
+            'started_at': self.started_at.isoformat(),
+            'wall_seconds': round(time.perf_counter() - self.started, 3),
+            'pages': len(self.pages),
+            'page_seconds': round(page_seconds, 3),
+            'records': records,
+            'records_per_second': round(records / page_seconds, 2) if page_seconds else 0.0,
+            'stages': stages
+        }
+
+    def to_prometheus(self) -> str:
+        """The run summary in the Prometheus text exposition format"""
+        summary = self.summary()
+        service = self.service
+        lines = [
+            '# HELP scraper_stage_seconds_total Wall time spent in each scraper stage.',
+            '# TYPE scraper_stage_seconds_total counter'
+        ]
+        for stage, entry in summary['stages'].items():
+            lines.append(f'scraper_stage_seconds_total{{service="{service}",stage="{stage}"}} {entry["seconds"]}')
+        lines += ['# HELP scraper_stage_calls_total Number of timed spans per stage.',
+                  '# TYPE scraper_stage_calls_total counter']
+        for stage, entry in summary['stages'].items():
+            lines.append(f'scraper_stage_calls_total{{service="{service}",stage="{stage}"}} {entry["calls"]}')
+        lines += ['# HELP scraper_records_total Records extracted.',
+                  '# TYPE scraper_records_total counter',
+                  f'scraper_records_total{{service="{service}"}} {summary["records"]}',
+                  '# HELP scraper_page_seconds Wall time per scraped page.',
+                  '# TYPE scraper_page_seconds histogram']
+        durations = [p['total_seconds'] for p in self.pages]
+        for bound in PAGE_SECONDS_BUCKETS:
+            count = sum(1 for d in durations if d <= bound)
+            lines.append(f'scraper_page_seconds_bucket{{service="{service}",le="{bound}"}} {count}')
+        lines.append(f'scraper_page_seconds_bucket{{service="{service}",le="+Inf"}} {len(durations)}')
+        lines.append(f'scraper_page_seconds_sum{{service="{service}"}} {summary["page_seconds"]}')
+        lines.append(f'scraper_page_seconds_count{{service="{service}"}} {len(durations)}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self) -> Optional[str]:
+        """Write the run's page timings and summary as JSON (and .prom when enabled), returning the JSON path"""
+        if not self.pages:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        name = f"{self.service}_{self.started_at.strftime('%Y%m%d_%H%M%S')}"
+        summary = self.summary()
+        path = os.path.join(self.output_dir, f'{name}.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'summary': summary, 'pages': self.pages}, f, ensure_ascii=False, indent=2)
+        if self.prometheus:
+            with open(os.path.join(self.output_dir, f'{name}.prom'), 'w', encoding='utf-8') as f:
+                f.write(self.to_prometheus())
+        print(f"Run timings: {json.dumps(summary, ensure_ascii=False)}")
+        print(f"Saved timings to {path}")
+        return path
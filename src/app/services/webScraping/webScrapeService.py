@@ -5,79 +5,121 @@ import time
 from datetime import datetime
 from typing import List, Dict, Any
 
-from playwright.async_api import async_playwright, Page, Browser, BrowserContext
+from playwright.async_api import Page, Browser, BrowserContext
 from bs4 import BeautifulSoup
 
+from browserPool import BrowserPool, ContextProfile, DEFAULT_LAUNCH_ARGS, DEFAULT_USER_AGENT
+from requestFilter import RequestFilter
+from modalWatcher import ModalWatcher
+from selectorChains import SelectorStats
+from elementHandles import HandleScope, handle_stats_summary
+from jsonlSink import JsonlSink
+from adaptiveWait import WaitStats, WaitConfig
+from stageTimings import RunTimings
+
 class WebScrapeService:
-    def __init__(self):
+    LAUNCH_OPTIONS = {
+        'headless': False,  # Run in non-headless mode to appear more human
+        'slow_mo': 50,  # Add slight delay between actions
+        'args': DEFAULT_LAUNCH_ARGS
+    }
+
+    # Close buttons of the modals and chat popups the watcher dismisses
+    MODAL_CLOSE_SELECTORS = [
+        'button.bz-close-btn',
+        'button[aria-label="Close Message"]',
+        'button#ipl2',
+        '.bz-close-btn',
+        'button[aria-label="סגור"]',
+        'button[aria-label="סגירה"]'
+    ]
+
+    LISTING_SELECTORS = [
+        'div.feed_item',
+        'div.feed-list-item',
+        'div.property-item',
+        'div.search-result-item',
+        'div.item'
+    ]
+
+    def __init__(self, browser_pool: BrowserPool = None, request_filter: RequestFilter = None, wait_config: WaitConfig = None,
+                 output_format: str = 'jsonl', timings: RunTimings = None, prometheus: bool = False):
+        # Per-stage wall time of the run, written as JSON (and Prometheus text) at the end
+        self.timings = timings or RunTimings('yad2-search', prometheus=prometheus)
+        # A shared RunTimings is written by its owner (e.g. the city crawler) once the whole run is done
+        self.owns_timings = timings is None
+        # 'jsonl' writes NDJSON like the other scrapers, 'json' keeps the pretty-printed file
+        self.output_format = output_format
+        # Waits on page signals instead of fixed sleeps, with upper bounds
+        self.wait_stats = WaitStats(wait_config)
+        # Blocks images, fonts and trackers on every page we borrow
+        self.request_filter = request_filter or RequestFilter()
+        # Clicks known modal close buttons in the background as soon as they render
+        self.modal_watcher = ModalWatcher(self.MODAL_CLOSE_SELECTORS)
+        # Fallback selector chains that try the selector that matched in earlier runs first
+        self.selector_stats = SelectorStats('yad2-search')
+        # Pages are borrowed from a shared pool; a private one is created when none is given
+        self.browser_pool = browser_pool
+        self.owns_browser_pool = False
+        self.context_profile = ContextProfile(
+            'yad2-search',
+            context_options={
+                'viewport': {'width': 1400, 'height': 700},
+                'user_agent': DEFAULT_USER_AGENT,
+                'locale': 'he-IL',
+                'timezone_id': 'Asia/Jerusalem',
+                'geolocation': {'latitude': 31.7683, 'longitude': 35.2137},  # Jerusalem coordinates
+                'permissions': ['geolocation']
+            },
+            init_scripts=["""
+                Object.defineProperty(navigator, 'webdriver', {
+                    get: () => undefined
+                });
+            """]
+        )
         self.browser: Browser = None
         self.context: BrowserContext = None
         self.page: Page = None
         self.properties: List[Dict[str, Any]] = []
 
     async def setup_browser(self):
-        """Set up browser with human-like settings"""
+        """Borrow a page with human-like settings from the browser pool"""
         print("Setting up browser...")
-        playwright = await async_playwright().start()
-        
-        # Use a more realistic user agent
-        user_agent = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        
-        self.browser = await playwright.chromium.launch(
-            headless=False,  # Run in non-headless mode to appear more human
-            slow_mo=50,  # Add slight delay between actions
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--disable-features=IsolateOrigins,site-per-process',
-                '--disable-site-isolation-trials',
-                '--disable-web-security',
-                '--disable-features=BlockInsecurePrivateNetworkRequests'
-            ]
-        )
-        
-        self.context = await self.browser.new_context(
-            viewport={'width': 1400, 'height': 700},
-            user_agent=user_agent,
-            locale='he-IL',
-            timezone_id='Asia/Jerusalem',
-            geolocation={'latitude': 31.7683, 'longitude': 35.2137},  # Jerusalem coordinates
-            permissions=['geolocation']
-        )
-        
-        # Add human-like mouse movements
-        await self.context.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined
-            });
-        """)
+        if self.browser_pool is None:
+            self.browser_pool = BrowserPool(max_browsers=1, contexts_per_browser=1, launch_options=self.LAUNCH_OPTIONS)
+            self.owns_browser_pool = True
         
-        self.page = await self.context.new_page()
+        self.page = await self.browser_pool.acquire_page(self.context_profile)
+        await self.request_filter.attach(self.page)
+        await self.modal_watcher.attach(self.page)
+        self.context = self.page.context
+        self.browser = self.context.browser
         print("Browser setup complete")
 
+    async def close_browser(self):
+        """Return the page to the pool and shut the pool down if we created it"""
+        print(self.request_filter.summary())
+        print(self.modal_watcher.summary())
+        print(handle_stats_summary())
+        self.selector_stats.save()
+        print(self.selector_stats.summary())
+        if self.page:
+            await self.browser_pool.release_page(self.page)
+            self.page = None
+        if self.owns_browser_pool and self.browser_pool:
+            await self.browser_pool.close()
+            self.browser_pool = None
+            self.owns_browser_pool = False
+
     async def handle_modals(self):
         """Handle modal dialogs and popups"""
+        # Modal and button handles found while probing are disposed however the probing ends
+        scope = HandleScope()
         try:
-            # First try to find and click the specific close button
-            close_button_selectors = [
-                'button.bz-close-btn',
-                'button[aria-label="Close Message"]',
-                'button#ipl2',
-                '.bz-close-btn',
-                'button[aria-label="סגור"]',
-                'button[aria-label="סגירה"]'
-            ]
-            
-            for selector in close_button_selectors:
-                try:
-                    button = await self.page.wait_for_selector(selector, timeout=5000)
-                    if button and await button.is_visible():
-                        print(f"Found close button with selector: {selector}")
-                        await button.click()
-                        await self.human_like_delay(0.2, 0.5)  # Reduced delay
-                        return True
-                except Exception as e:
-                    print(f"Close button selector {selector} failed: {str(e)}")
-                    continue
+            # The watcher closes modals as they appear; this only catches one it has not handled yet
+            if await self.modal_watcher.dismiss_now(self.page):
+                await self.human_like_delay(0.2, 0.5)  # Reduced delay
+                return True
             
             # If specific close button not found, try other modal handling
             modal_selectors = [
@@ -92,15 +134,15 @@ class WebScrapeService:
             
             for modal_selector in modal_selectors:
                 try:
-                    modals = await self.page.query_selector_all(modal_selector)
+                    modals = scope.track(await self.page.query_selector_all(modal_selector))
                     for modal in modals:
                         if await modal.is_visible():
                             print(f"Found modal with selector: {modal_selector}")
                             
                             # Try to find and click close buttons within the modal
-                            for close_selector in close_button_selectors:
+                            for close_selector in self.MODAL_CLOSE_SELECTORS:
                                 try:
-                                    close_buttons = await modal.query_selector_all(close_selector)
+                                    close_buttons = scope.track(await modal.query_selector_all(close_selector))
                                     for button in close_buttons:
                                         if await button.is_visible():
                                             print(f"Found close button with selector: {close_selector}")
@@ -128,9 +170,12 @@ class WebScrapeService:
         except Exception as e:
             print(f"Error in handle_modals: {str(e)}")
             return False
+        finally:
+            await scope.dispose()
 
     async def handle_ads_and_popups(self):
         """Handle ads, popups, and other overlays"""
+        scope = HandleScope()
         try:
             # First try to handle any modals
             if await self.handle_modals():
@@ -147,7 +192,7 @@ class WebScrapeService:
             # Try to close any visible ads or popups
             for selector in ad_selectors:
                 try:
-                    elements = await self.page.query_selector_all(selector)
+                    elements = scope.track(await self.page.query_selector_all(selector))
                     for element in elements:
                         if await element.is_visible():
                             print(f"Found and closing element with selector: {selector}")
@@ -162,7 +207,7 @@ class WebScrapeService:
             for frame in frames:
                 try:
                     # Try to find and click close buttons in iframes
-                    close_buttons = await frame.query_selector_all('button.close, .close-button, .x-button')
+                    close_buttons = scope.track(await frame.query_selector_all('button.close, .close-button, .x-button'))
                     for button in close_buttons:
                         if await button.is_visible():
                             await button.click()
@@ -173,6 +218,8 @@ class WebScrapeService:
                     
         except Exception as e:
             print(f"Error in handle_ads_and_popups: {str(e)}")
+        finally:
+            await scope.dispose()
 
     async def human_like_delay(self, min_seconds: float = 1.0, max_seconds: float = 3.0):
         """Add random delay to simulate human behavior"""
@@ -208,18 +255,16 @@ class WebScrapeService:
             'a:has-text("נדלן")'
         ]
         
-        for selector in selectors:
-            try:
-                link = await self.page.wait_for_selector(selector, timeout=5000)
-                if link:
-                    print(f"Found real estate link with selector: {selector}")
-                    await link.click()
-                    return True
-            except Exception as e:
-                print(f"Selector {selector} failed: {str(e)}")
-                continue
-        
-        return False
+        link, selector = await self.selector_stats.chain('real_estate_link', selectors).wait_for_first(self.page)
+        if not link:
+            return False
+        try:
+            print(f"Found real estate link with selector: {selector}")
+            await link.click()
+            return True
+        except Exception as e:
+            print(f"Error clicking real estate link: {str(e)}")
+            return False
 
     async def find_and_fill_search_input(self):
         """Find and fill the location search input with multiple selector attempts"""
@@ -236,42 +281,38 @@ class WebScrapeService:
             'input.search-input[placeholder*="חיפוש"]'
         ]
         
-        for selector in selectors:
-            try:
-                search_input = await self.page.wait_for_selector(selector, timeout=5000)
-                if search_input:
-                    print(f"Found location search input with selector: {selector}")
-                    # Clear any existing text
-                    await search_input.fill("")
-                    await self.human_like_delay(0.2, 0.5)  # Reduced delay
-                    # Type the location with human-like typing
-                    await search_input.type("צור הדסה", delay=random.uniform(50, 150))  # Reduced delay
-                    
-                    # Wait for dropdown to appear
-                    await self.human_like_delay(0.5, 1.0)  # Reduced delay
-                    
-                    # Try to find and click the city name under the עיר span
-                    try:
-                        # First find the עיר section
-                        city_section = await self.page.wait_for_selector('span.group-list_groupTitle__XSk5p:has-text("עיר")', timeout=5000)
-                        if city_section:
-                            print("Found עיר section")
-                            # Find the city name under the עיר section
-                            city_name = await self.page.wait_for_selector('ul#עיר li.option_option__vHSMz span.highlighted-text_text__SZ7eG:has-text("צור הדסה")', timeout=5000)
-                            if city_name:
-                                print("Found city name under עיר section")
-                                await city_name.click()
-                                await self.human_like_delay(0.2, 0.5)  # Reduced delay
-                                return True
-                    except Exception as e:
-                        print(f"Error finding city name: {str(e)}")
-                    
-                    return True
-            except Exception as e:
-                print(f"Selector {selector} failed: {str(e)}")
-                continue
+        search_input, selector = await self.selector_stats.chain('search_input', selectors).wait_for_first(self.page)
+        if not search_input:
+            return False
+        try:
+            print(f"Found location search input with selector: {selector}")
+            # Clear any existing text
+            await search_input.fill("")
+            await self.human_like_delay(0.2, 0.5)  # Reduced delay
+            # Type the location with human-like typing
+            await search_input.type("צור הדסה", delay=random.uniform(50, 150))  # Reduced delay
+            
+            # Wait for dropdown to appear
+            await self.human_like_delay(0.5, 1.0)  # Reduced delay
+        except Exception as e:
+            print(f"Error filling search input: {str(e)}")
+            return False
         
-        return False
+        # Try to find and click the city name under the עיר span
+        try:
+            # First find the עיר section
+            await self.page.locator('span.group-list_groupTitle__XSk5p:has-text("עיר")').first.wait_for(timeout=5000)
+            print("Found עיר section")
+            # Find the city name under the עיר section
+            city_name = self.page.locator('ul#עיר li.option_option__vHSMz span.highlighted-text_text__SZ7eG:has-text("צור הדסה")').first
+            await city_name.wait_for(timeout=5000)
+            print("Found city name under עיר section")
+            await city_name.click()
+            await self.human_like_delay(0.2, 0.5)  # Reduced delay
+        except Exception as e:
+            print(f"Error finding city name: {str(e)}")
+        
+        return True
 
     async def find_and_click_search_button(self):
         """Find and click the search button with multiple selector attempts"""
@@ -283,30 +324,28 @@ class WebScrapeService:
             'form button'
         ]
         
-        for selector in selectors:
-            try:
-                button = await self.page.wait_for_selector(selector, timeout=5000)
-                if button:
-                    print(f"Found search button with selector: {selector}")
-                    # Add a small delay before clicking to appear more human-like
-                    await self.human_like_delay(0.5, 1.0)
-                    await button.click()
-                    return True
-            except Exception as e:
-                print(f"Selector {selector} failed: {str(e)}")
-                continue
-        
-        return False
+        button, selector = await self.selector_stats.chain('search_button', selectors).wait_for_first(self.page)
+        if not button:
+            return False
+        try:
+            print(f"Found search button with selector: {selector}")
+            # Add a small delay before clicking to appear more human-like
+            await self.human_like_delay(0.5, 1.0)
+            await button.click()
+            return True
+        except Exception as e:
+            print(f"Error clicking search button: {str(e)}")
+            return False
 
     async def click_nadlan_button(self):
         """Click the נדל״ן button"""
         try:
             # Try to find and click the נדל״ן button
-            button = await self.page.wait_for_selector('a:has-text("נדל״ן")', timeout=5000)
-            if button:
-                print("Found נדל״ן button")
-                await button.click()
-                return True
+            button = self.page.locator('a:has-text("נדל״ן")').first
+            await button.wait_for(timeout=5000)
+            print("Found נדל״ן button")
+            await button.click()
+            return True
         except Exception as e:
             print(f"Error clicking נדל״ן button: {str(e)}")
             return False
@@ -322,130 +361,138 @@ class WebScrapeService:
             '.item-list'
         ]
         
-        for selector in selectors:
-            try:
-                print(f"Waiting for results with selector: {selector}")
-                await self.page.wait_for_selector(selector, state="visible", timeout=10000)
-                print(f"Found results with selector: {selector}")
-                return True
-            except Exception as e:
-                print(f"Selector {selector} failed: {str(e)}")
-                continue
-        
+        results, selector = await self.selector_stats.chain('search_results', selectors).wait_for_first(
+            self.page, timeout=10000, state="visible")
+        if results:
+            print(f"Found results with selector: {selector}")
+            return True
         return False
 
+    def parse_listing(self, listing) -> Dict[str, Any]:
+        """Extract property details from one listing element"""
+        title_elem = listing.find(['div', 'h2'], class_=['title', 'item-title'])
+        title = title_elem.text.strip() if title_elem else "No title"
+
+        price_elem = listing.find(['div', 'span'], class_=['price', 'item-price'])
+        price = price_elem.text.strip() if price_elem else "Price not available"
+
+        location_elem = listing.find(['div', 'span'], class_=['location', 'item-location', 'address'])
+        location = location_elem.text.strip() if location_elem else "Location not available"
+
+        details = listing.find_all(['div', 'span'], class_=['data', 'item-data', 'details'])
+        rooms = details[0].text.strip() if len(details) > 0 else "N/A"
+        size = details[1].text.strip() if len(details) > 1 else "N/A"
+
+        image_elem = listing.find('img')
+        image_url = image_elem['src'] if image_elem and 'src' in image_elem.attrs else None
+
+        description_elem = listing.find(['div', 'p'], class_=['description', 'item-description'])
+        description = description_elem.text.strip() if description_elem else "No description"
+
+        link_elem = listing.find('a', href=True)
+        property_link = f"https://www.yad2.co.il{link_elem['href']}" if link_elem else None
+
+        return {
+            'title': title,
+            'price': price,
+            'location': location,
+            'rooms': rooms,
+            'size': size,
+            'image': image_url,
+            'description': description,
+            'link': property_link,
+            'scraped_at': datetime.now().isoformat()
+        }
+
     async def scrape_tzur_hadassah_properties(self) -> List[Dict[str, Any]]:
         """Scrape properties from Yad2 with human-like behavior"""
         try:
             print("Starting browser...")
             await self.setup_browser()
             
+            spans = self.timings.begin_page("Yad2 search flow")
+            waits = self.wait_stats.begin_page("Yad2 search flow", spans)
             print("Navigating to Yad2...")
-            # First go to main page
-            await self.page.goto("https://www.yad2.co.il", wait_until="domcontentloaded")
-            await self.human_like_delay(2, 4)
+            # First go to main page and wait for the navigation menu instead of a fixed pause
+            with spans.span('navigate'):
+                await self.page.goto("https://www.yad2.co.il", wait_until="domcontentloaded")
+            await waits.selector(self.page, 'a:has-text("נדל״ן")')
             
             # Handle any initial ads/popups and modals
-            await self.handle_ads_and_popups()
+            with spans.span('modals'):
+                await self.handle_ads_and_popups()
             
             # Click the נדל״ן button
             print("Looking for נדל״ן button...")
-            if not await self.click_nadlan_button():
-                raise Exception("Could not find נדל״ן button")
-            await self.human_like_delay(2, 4)
+            with spans.span('navigate'):
+                if not await self.click_nadlan_button():
+                    raise Exception("Could not find נדל״ן button")
+            await waits.load_state(self.page, "domcontentloaded")
             
             # Handle any ads/popups and modals after navigation
-            await self.handle_ads_and_popups()
+            with spans.span('modals'):
+                await self.handle_ads_and_popups()
             
             # Find and fill search input
-            if not await self.find_and_fill_search_input():
-                raise Exception("Could not find search input")
-            await self.human_like_delay(1, 2)
+            with spans.span('navigate'):
+                if not await self.find_and_fill_search_input():
+                    raise Exception("Could not find search input")
+            await waits.sleep(0.5, 1)
             
             # Click search button
-            if not await self.find_and_click_search_button():
-                raise Exception("Could not find search button")
-            await self.human_like_delay(2, 4)
+            with spans.span('navigate'):
+                if not await self.find_and_click_search_button():
+                    raise Exception("Could not find search button")
+            await waits.load_state(self.page, "domcontentloaded")
             
             # Handle any ads/popups and modals after search
-            await self.handle_ads_and_popups()
+            with spans.span('modals'):
+                await self.handle_ads_and_popups()
             
             # Wait for results to load
-            if not await self.wait_for_search_results():
-                raise Exception("Could not find search results")
-            await self.human_like_delay(2, 3)
+            with spans.span('wait'):
+                if not await self.wait_for_search_results():
+                    raise Exception("Could not find search results")
+            await waits.listings_settled(self.page, ', '.join(self.LISTING_SELECTORS))
             
             # Scroll through results
-            await self.human_like_scroll()
+            with spans.span('scroll'):
+                await self.human_like_scroll()
             
             # Get page content
-            content = await self.page.content()
-            soup = BeautifulSoup(content, 'html.parser')
-            
-            # Find all property listings with multiple selectors
-            listings = []
-            listing_selectors = [
-                'div.feed_item',
-                'div.feed-list-item',
-                'div.property-item',
-                'div.search-result-item',
-                'div.item'
-            ]
+            with spans.span('serialize'):
+                content = await self.page.content()
+            with spans.span('parse'):
+                soup = BeautifulSoup(content, 'html.parser')
+                
+                # Find all property listings with multiple selectors
+                listings, selector = self.selector_stats.chain('listings', self.LISTING_SELECTORS).first_select(soup)
+                if listings:
+                    print(f"Found {len(listings)} listings with selector: {selector}")
             
-            for selector in listing_selectors:
-                found_listings = soup.select(selector)
-                if found_listings:
-                    print(f"Found {len(found_listings)} listings with selector: {selector}")
-                    listings = found_listings
-                    break
+            with spans.span('extract'):
+                for listing in listings:
+                    try:
+                        self.properties.append(self.parse_listing(listing))
+                    except Exception as e:
+                        print(f"Error processing listing: {str(e)}")
+                        continue
             
-            for listing in listings:
-                try:
-                    # Extract property details with error handling
-                    title_elem = listing.find(['div', 'h2'], class_=['title', 'item-title'])
-                    title = title_elem.text.strip() if title_elem else "No title"
-                    
-                    price_elem = listing.find(['div', 'span'], class_=['price', 'item-price'])
-                    price = price_elem.text.strip() if price_elem else "Price not available"
-                    
-                    location_elem = listing.find(['div', 'span'], class_=['location', 'item-location', 'address'])
-                    location = location_elem.text.strip() if location_elem else "Location not available"
-                    
-                    details = listing.find_all(['div', 'span'], class_=['data', 'item-data', 'details'])
-                    rooms = details[0].text.strip() if len(details) > 0 else "N/A"
-                    size = details[1].text.strip() if len(details) > 1 else "N/A"
-                    
-                    image_elem = listing.find('img')
-                    image_url = image_elem['src'] if image_elem and 'src' in image_elem.attrs else None
-                    
-                    description_elem = listing.find(['div', 'p'], class_=['description', 'item-description'])
-                    description = description_elem.text.strip() if description_elem else "No description"
-                    
-                    link_elem = listing.find('a', href=True)
-                    property_link = f"https://www.yad2.co.il{link_elem['href']}" if link_elem else None
-                    
-                    property_data = {
-                        'title': title,
-                        'price': price,
-                        'location': location,
-                        'rooms': rooms,
-                        'size': size,
-                        'image': image_url,
-                        'description': description,
-                        'link': property_link,
-                        'scraped_at': datetime.now().isoformat()
-                    }
-                    
-                    self.properties.append(property_data)
-                    await self.human_like_delay(0.5, 1.5)  # Pause between processing each property
-                    
-                except Exception as e:
-                    print(f"Error processing listing: {str(e)}")
-                    continue
+            waits.finish()
             
-            # Save results to JSON file
-            with open('tzur_hadassah_properties.json', 'w', encoding='utf-8') as f:
-                json.dump(self.properties, f, ensure_ascii=False, indent=2)
+            with spans.span('write'):
+                if self.output_format == 'jsonl':
+                    # Single results page, so the whole run is one NDJSON page
+                    with JsonlSink('.', 'tzur_hadassah_properties') as sink:
+                        sink.write_page(self.properties)
+                    print(f"Saved {sink.records_written} properties to {', '.join(sink.files)}")
+                else:
+                    # Save results to JSON file
+                    with open('tzur_hadassah_properties.json', 'w', encoding='utf-8') as f:
+                        json.dump(self.properties, f, ensure_ascii=False, indent=2)
+            spans.finish(len(self.properties))
+            if self.owns_timings:
+                self.timings.write()
             
             return self.properties
             
@@ -455,8 +502,7 @@ class WebScrapeService:
         
         finally:
             print("Closing browser...")
-            if self.browser:
-                await self.browser.close()
+            await self.close_browser()
             print("Browser closed")
 
 async def main():
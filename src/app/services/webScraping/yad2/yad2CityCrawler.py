@@ -0,0 +1,179 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from browserPool import BrowserPool
+from rateLimiter import HostRateLimiter
+from requestFilter import RequestFilter
+from crawlCheckpoint import CrawlCheckpoint
+from listingIndex import ListingIndex
+from stageTimings import RunTimings
+from httpFetcher import HttpFetcher
+from yad2DirectService import Yad2DirectService, DEFAULT_CITY_CODES_PATH
+
+
+class CrawlStats:
+    """Aggregated progress and throughput of a multi-city crawl"""
+
+    def __init__(self, total_cities: int):
+        self.total_cities = total_cities
+        self.completed_cities = 0
+        self.failed_cities: List[str] = []
+        self.properties = 0
+        self.pages = 0
+        self.started_at = time.monotonic()
+
+    def record_city(self, city_name: str, properties: int, pages: int, failed: bool = False):
+        self.completed_cities += 1
+        self.properties += properties
+        self.pages += pages
+        if failed:
+            self.failed_cities.append(city_name)
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started_at
+        return {
+            'cities_done': self.completed_cities,
+            'cities_total': self.total_cities,
+            'cities_failed': len(self.failed_cities),
+            'properties': self.properties,
+            'pages': self.pages,
+            'elapsed_seconds': round(elapsed, 1),
+            'pages_per_minute': round(self.pages / elapsed * 60, 2) if elapsed else 0.0,
+            'properties_per_minute': round(self.properties / elapsed * 60, 2) if elapsed else 0.0
+        }
+
+    def progress_line(self) -> str:
+        s = self.summary()
+        return (f"[{s['cities_done']}/{s['cities_total']} cities] {s['properties']} properties, "
+                f"{s['pages']} pages, {s['pages_per_minute']} pages/min, {s['cities_failed']} failed")
+
+
+class Yad2CityCrawler:
+    """Fans Yad2 scraping out across every city in city_codes.json"""
+
+    def __init__(self, concurrency: int = 4, requests_per_second: float = 0.5,
+                 max_browsers: int = 2, city_codes_path: str = None, incremental: bool = False,
+                 prometheus: bool = False, fetch_mode: str = 'browser', pipeline_workers: int = 0):
+        self.concurrency = concurrency
+        self.fetch_mode = fetch_mode
+        self.rate_limiter = HostRateLimiter(requests_per_second=requests_per_second)
+        # One filter for the whole crawl so its counters cover every city
+        self.request_filter = RequestFilter()
+        # One checkpoint store shared by every city so a restarted crawl skips the pages already done
+        self.checkpoint = CrawlCheckpoint()
+        # Shared listing index for daily incremental runs
+        self.listing_index = ListingIndex() if incremental else None
+        # One pooled HTTP client for every city when the feed is fetched without a browser
+        self.http_fetcher = HttpFetcher(self.rate_limiter, max_connections=concurrency) if fetch_mode == 'http' else None
+        self.fetch_paths = {'http': 0, 'browser': 0, 'fallback': 0}
+        # Parse processes shared by every city, for the pipelines and for pages rendered in the browser
+        self.pipeline_workers = pipeline_workers if self.http_fetcher else 0
+        self.pipeline_executor = ProcessPoolExecutor(max_workers=self.pipeline_workers or concurrency)
+        # Page timings of every city, written once at the end of the crawl
+        self.timings = RunTimings('yad2-crawl', prometheus=prometheus, print_pages=False)
+        self.browser_pool = BrowserPool(
+            max_browsers=max_browsers,
+            contexts_per_browser=max(1, -(-concurrency // max_browsers)),
+            launch_options=Yad2DirectService.LAUNCH_OPTIONS
+        )
+        self.city_codes_path = city_codes_path or DEFAULT_CITY_CODES_PATH
+
+    def load_cities(self) -> List[Dict[str, Any]]:
+        """Load the city list produced by scripts/scrape_city_codes.py"""
+        with open(self.city_codes_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    async def crawl_city(self, city: Dict[str, Any], semaphore: asyncio.Semaphore, stats: CrawlStats):
+        async with semaphore:
+            scraper = Yad2DirectService(browser_pool=self.browser_pool, rate_limiter=self.rate_limiter,
+                                        request_filter=self.request_filter, checkpoint=self.checkpoint,
+                                        listing_index=self.listing_index, timings=self.timings,
+                                        fetch_mode=self.fetch_mode, http_fetcher=self.http_fetcher,
+                                        pipeline_workers=self.pipeline_workers, pipeline_executor=self.pipeline_executor)
+            failed = False
+            properties = []
+            try:
+                properties = await scraper.scrape_city_properties(city['code'], city_name=city.get('name'), city_url=city.get('url'))
+            except Exception as e:
+                print(f"Error crawling city {city.get('name')}: {str(e)}")
+                failed = True
+            if scraper.last_error:
+                print(f"City {city.get('name')} failed: {scraper.last_error}")
+                failed = True
+            # A checkpoint left behind means the crawl stopped before the last page
+            elif self.checkpoint and self.checkpoint.load('yad2', city['code']):
+                print(f"City {city.get('name')} stopped before its last page, checkpoint kept for resuming")
+                failed = True
+            for path, pages in scraper.fetch_paths.items():
+                self.fetch_paths[path] += pages
+            stats.record_city(city.get('name', city['code']), len(properties), scraper.pages_scraped, failed=failed)
+            print(stats.progress_line())
+            return properties
+
+    async def crawl(self, cities: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Scrape all cities with bounded concurrency and return the run summary"""
+        if cities is None:
+            cities = self.load_cities()
+        stats = CrawlStats(len(cities))
+        unfinished = [c for c in self.checkpoint.unfinished() if c['source'] == 'yad2']
+        if unfinished:
+            print(f"Resuming {len(unfinished)} unfinished cities from checkpoints")
+        semaphore = asyncio.Semaphore(self.concurrency)
+        try:
+            await asyncio.gather(*(self.crawl_city(city, semaphore, stats) for city in cities))
+        finally:
+            await self.browser_pool.close()
+            self.checkpoint.close()
+            if self.listing_index:
+                self.listing_index.close()
+            if self.http_fetcher:
+                await self.http_fetcher.close()
+            if self.pipeline_executor:
+                self.pipeline_executor.shutdown(cancel_futures=True)
+            self.timings.write()
+
+        summary = stats.summary()
+        summary['failed_city_names'] = stats.failed_cities
+        summary['rate_limit_wait_seconds'] = round(self.rate_limiter.waited_seconds, 1)
+        summary['requests_blocked'] = self.request_filter.stats['requests_blocked']
+        summary['estimated_bytes_saved'] = self.request_filter.stats['estimated_bytes_saved']
+        if self.listing_index:
+            summary['listing_changes'] = self.listing_index.stats
+        summary['pages_served'] = self.fetch_paths
+        if self.http_fetcher:
+            summary['http_fetcher'] = self.http_fetcher.stats
+        print(f"\nCrawl finished: {json.dumps(summary, ensure_ascii=False)}")
+        return summary
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Crawl Yad2 for every city in city_codes.json")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rps', type=float, default=0.5, help="Navigations per second per host")
+    parser.add_argument('--browsers', type=int, default=2)
+    parser.add_argument('--limit', type=int, default=None, help="Only crawl the first N cities")
+    parser.add_argument('--incremental', action='store_true', help="Only emit new or re-priced listings and stop at known pages")
+    parser.add_argument('--prometheus', action='store_true', help="Also write the stage timings in Prometheus text format")
+    parser.add_argument('--fetch-mode', choices=['browser', 'http'], default='browser',
+                        help="'http' fetches the server-rendered feed without a browser, rendering only pages without listings")
+    parser.add_argument('--pipeline-workers', type=int, default=0,
+                        help="With --fetch-mode http, parse pages in this many processes while the next ones are fetched")
+    args = parser.parse_args()
+
+    crawler = Yad2CityCrawler(concurrency=args.concurrency, requests_per_second=args.rps, max_browsers=args.browsers,
+                              incremental=args.incremental, prometheus=args.prometheus, fetch_mode=args.fetch_mode,
+                              pipeline_workers=args.pipeline_workers)
+    cities = crawler.load_cities()
+    if args.limit:
+        cities = cities[:args.limit]
+    await crawler.crawl(cities)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,14 +3,143 @@ import json
 import random
 import time
 import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, Callable
+
+from playwright.async_api import Page, Browser, BrowserContext
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from browserPool import BrowserPool, ContextProfile, DEFAULT_LAUNCH_ARGS, DEFAULT_USER_AGENT
+from requestFilter import RequestFilter
+from modalWatcher import ModalWatcher
+from rateLimiter import HostRateLimiter
+from htmlParsers import get_parser_backend
+from yad2FeedParser import parse_feed_page_html, parse_feed_html, save_selector_stats, merge_selector_counts, FEED_ITEM_SELECTOR, FEED_LIST_CHAIN, NEXT_PAGE_SELECTOR
+from jsonlSink import JsonlSink
+from crawlCheckpoint import CrawlCheckpoint, CrawlProgress
+from listingIndex import ListingIndex
+from pageCache import PageCache, fragment_hash
+from pageFixtures import FixtureRecorder
+from httpFetcher import HttpFetcher, HTTP_FALLBACK_LIMIT, fetch_paths_summary
+from scrapePipeline import ScrapePipeline
+from adaptiveWait import WaitStats, WaitConfig, PageWaits
+from stageTimings import RunTimings, PageSpans
+from payloadCapture import PayloadCapture, read_embedded_state
+from elementHandles import match_state
+from yad2PayloadMapper import API_URL_PATTERNS, map_feed_payloads
+
+# City list written by scripts/scrape_city_codes.py: [{"name", "code", "url"}]
+DEFAULT_CITY_CODES_PATH = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', 'data', 'city_codes.json')
+
+
+def city_name_for_code(city_code: str, path: str = None) -> Optional[str]:
+    """Hebrew name of a Yad2 city code, the key the property store partitions by"""
+    path = path or DEFAULT_CITY_CODES_PATH
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cities = json.load(f)
+    except Exception as e:
+        print(f"Could not read city codes from {path}: {str(e)}")
+        return None
+    return next((c['name'] for c in cities if str(c.get('code')) == str(city_code)), None)
 
-from playwright.async_api import async_playwright, Page, Browser, BrowserContext
-from bs4 import BeautifulSoup
 
 class Yad2DirectService:
-    def __init__(self):
+    # Close buttons of the modals and chat popups the watcher dismisses
+    MODAL_CLOSE_SELECTORS = [
+        'button.bz-close-btn',
+        'button[aria-label="Close Message"]',
+        'button#ipl2',
+        '.bz-close-btn',
+        'button[aria-label="סגור"]',
+        'button[aria-label="סגירה"]'
+    ]
+
+    LAUNCH_OPTIONS = {
+        'headless': True,  # Run in headless mode for speed
+        'slow_mo': 0,  # Remove delay between actions
+        'args': DEFAULT_LAUNCH_ARGS
+    }
+
+    def __init__(self, browser_pool: BrowserPool = None, rate_limiter: HostRateLimiter = None, html_parser: str = None,
+                 request_filter: RequestFilter = None, extraction_mode: str = 'dom', wait_config: WaitConfig = None,
+                 scroll_settle_timeout: float = 2.0, output_format: str = 'jsonl', checkpoint: CrawlCheckpoint = None,
+                 resume: bool = True, incremental: bool = False, listing_index: ListingIndex = None,
+                 cache_pages: bool = False, page_cache: PageCache = None, record_fixtures: str = None,
+                 timings: RunTimings = None, prometheus: bool = False, debug: bool = False,
+                 fetch_mode: str = 'browser', http_fetcher: HttpFetcher = None, pipeline_workers: int = 0,
+                 pipeline_executor: Executor = None):
+        # 'http' fetches the server-rendered feed without a browser and only renders pages whose HTML has no listings
+        self.fetch_mode = fetch_mode
+        self.http_fetcher = http_fetcher
+        self.owns_http_fetcher = False
+        self.http_misses = 0
+        self.fetch_paths = {'http': 0, 'browser': 0, 'fallback': 0}
+        # With fetch_mode 'http', run the pages through the staged pipeline with this many parse processes
+        # (the city crawler shares one process pool between its cities)
+        self.pipeline_workers = pipeline_workers
+        # Also parses the HTML of browser-rendered pages; started per run when none is shared
+        self.pipeline_executor = pipeline_executor
+        self.owns_pipeline_executor = False
+        # Per-stage wall time of every page, written as JSON (and Prometheus text) at the end of a run
+        self.timings = timings or RunTimings('yad2', prometheus=prometheus)
+        # A shared RunTimings is written by its owner (e.g. the city crawler) once the whole run is done
+        self.owns_timings = timings is None
+        # Prints every parsed listing field by field
+        self.debug = debug
+        # Saves every page's HTML and JSON payloads under this directory for offline replay
+        self.fixture_recorder = FixtureRecorder(record_fixtures) if record_fixtures else None
+        # Reuses the parsed records of pages whose feed list HTML has not changed since the last run
+        self.page_cache = page_cache or (PageCache() if cache_pages else None)
+        # Incremental crawls emit only new or re-priced listings and stop at the first fully known page
+        self.listing_index = listing_index or (ListingIndex() if incremental else None)
+        # Records page progress so an interrupted crawl resumes where it stopped (jsonl output only,
+        # since a killed run loses the Parquet writer's unwritten row groups)
+        self.checkpoint = checkpoint or (CrawlCheckpoint() if resume else None)
+        # Error that ended the last scrape_city_properties call, which still returns the pages saved before it
+        self.last_error: Optional[str] = None
+        # 'jsonl' streams each page to an NDJSON file, 'parquet' into the columnar property store,
+        # 'json' writes one pretty-printed file at the end
+        self.output_format = output_format
+        # Waits on listing count / response signals instead of fixed sleeps, with upper bounds
+        self.wait_stats = WaitStats(wait_config)
+        self.scroll_settle_timeout = scroll_settle_timeout
+        # 'payload' maps listings from __NEXT_DATA__ / API JSON and only falls back to the DOM when that finds nothing
+        self.extraction_mode = extraction_mode
+        self.payload_capture: PayloadCapture = None
+        self.payload_pages = 0
+        # Blocks images, fonts and trackers on every page we borrow
+        self.request_filter = request_filter or RequestFilter()
+        # Clicks known modal close buttons in the background as soon as they render
+        self.modal_watcher = ModalWatcher(self.MODAL_CLOSE_SELECTORS)
+        self.rate_limiter = rate_limiter
+        # HTML parser backend (selectolax, lxml or bs4), see htmlParsers.get_parser_backend
+        self.html_parser = get_parser_backend(html_parser)
+        self.pages_scraped = 0
+        # Pages are borrowed from a shared pool; a private one is created when none is given
+        self.browser_pool = browser_pool
+        self.owns_browser_pool = False
+        self.context_profile = ContextProfile(
+            'yad2',
+            context_options={
+                'viewport': {'width': 1400, 'height': 700},
+                'user_agent': DEFAULT_USER_AGENT,
+                'locale': 'he-IL',
+                'timezone_id': 'Asia/Jerusalem',
+                'geolocation': {'latitude': 31.7683, 'longitude': 35.2137},  # Jerusalem coordinates
+                'permissions': ['geolocation']
+            },
+            init_scripts=["""
+                Object.defineProperty(navigator, 'webdriver', {
+                    get: () => undefined
+                });
+            """]
+        )
         self.browser: Browser = None
         self.context: BrowserContext = None
         self.page: Page = None
@@ -22,69 +151,50 @@ class Yad2DirectService:
         os.makedirs(self.yad2_data_dir, exist_ok=True)
 
     async def setup_browser(self):
-        """Set up browser with human-like settings"""
+        """Borrow a page with human-like settings from the browser pool"""
         print("Setting up browser...")
-        playwright = await async_playwright().start()
-        
-        # Use a more realistic user agent
-        user_agent = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        
-        self.browser = await playwright.chromium.launch(
-            headless=True,  # Run in headless mode for speed
-            slow_mo=0,  # Remove delay between actions
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--disable-features=IsolateOrigins,site-per-process',
-                '--disable-site-isolation-trials',
-                '--disable-web-security',
-                '--disable-features=BlockInsecurePrivateNetworkRequests'
-            ]
-        )
-        
-        self.context = await self.browser.new_context(
-            viewport={'width': 1400, 'height': 700},
-            user_agent=user_agent,
-            locale='he-IL',
-            timezone_id='Asia/Jerusalem',
-            geolocation={'latitude': 31.7683, 'longitude': 35.2137},  # Jerusalem coordinates
-            permissions=['geolocation']
-        )
+        if self.browser_pool is None:
+            self.browser_pool = BrowserPool(max_browsers=1, contexts_per_browser=1, launch_options=self.LAUNCH_OPTIONS)
+            self.owns_browser_pool = True
         
-        # Add human-like mouse movements
-        await self.context.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined
-            });
-        """)
-        
-        self.page = await self.context.new_page()
+        self.page = await self.browser_pool.acquire_page(self.context_profile)
+        await self.request_filter.attach(self.page)
+        await self.modal_watcher.attach(self.page)
+        if self.extraction_mode == 'payload':
+            self.payload_capture = PayloadCapture(API_URL_PATTERNS)
+            self.payload_capture.attach(self.page)
+        self.context = self.page.context
+        self.browser = self.context.browser
         print("Browser setup complete")
 
+    async def close_browser(self):
+        """Return the page to the pool and shut the pool down if we created it"""
+        if self.owns_http_fetcher:
+            await self.http_fetcher.close()
+            self.http_fetcher = None
+            self.owns_http_fetcher = False
+        if self.owns_pipeline_executor:
+            self.pipeline_executor.shutdown(cancel_futures=True)
+            self.pipeline_executor = None
+            self.owns_pipeline_executor = False
+        print(self.request_filter.summary())
+        print(self.modal_watcher.summary())
+        save_selector_stats()
+        if self.page:
+            await self.browser_pool.release_page(self.page)
+            self.page = None
+        if self.owns_browser_pool and self.browser_pool:
+            await self.browser_pool.close()
+            self.browser_pool = None
+            self.owns_browser_pool = False
+
     async def handle_modals(self):
         """Handle modal dialogs and popups"""
         try:
-            # First try to find and click the specific close button
-            close_button_selectors = [
-                'button.bz-close-btn',
-                'button[aria-label="Close Message"]',
-                'button#ipl2',
-                '.bz-close-btn',
-                'button[aria-label="סגור"]',
-                'button[aria-label="סגירה"]'
-            ]
-            
-            for selector in close_button_selectors:
-                try:
-                    button = await self.page.wait_for_selector(selector, timeout=5000)
-                    if button and await button.is_visible():
-                        print(f"Found close button with selector: {selector}")
-                        await button.click()
-                        await self.human_like_delay(0.2, 0.5)  # Reduced delay
-                        return True
-                except Exception as e:
-                    print(f"Close button selector {selector} failed: {str(e)}")
-                    continue
-            
+            # The watcher closes modals as they appear; this only catches one it has not handled yet
+            if await self.modal_watcher.dismiss_now(self.page):
+                await self.human_like_delay(0.2, 0.5)  # Reduced delay
+                return True
             return False
                     
         except Exception as e:
@@ -109,267 +219,355 @@ class Yad2DirectService:
         await self.page.evaluate("window.scrollTo(0, 0)")
         await self.human_like_delay(0.1, 0.2)
 
+    async def goto(self, url: str):
+        """Navigate the page, respecting the per-host rate limit when one is set"""
+        if self.rate_limiter:
+            await self.rate_limiter.wait(url)
+        response = await self.page.goto(url, wait_until="domcontentloaded")
+        self.pages_scraped += 1
+        return response
+
+    async def wait_for_feed(self):
+        """Wait until the feed list and its first items are rendered
+        
+        Waits through locators, which unlike wait_for_selector leave no element handle behind.
+        """
+        # Wait for the feed list to be visible
+        print("Waiting for feed list to load...")
+        try:
+            await self.page.locator('ul[data-testid="feed-list"]').first.wait_for(state="visible", timeout=15000)
+        except Exception as e:
+            print(f"Error waiting for feed list: {str(e)}")
+            # Try alternative selector
+            await self.page.locator('.feed-list').first.wait_for(state="visible", timeout=15000)
+        
+        # Wait for at least one property item to be visible
+        print("Waiting for property items to load...")
+        try:
+            # Wait for any of the specific item types
+            await self.page.locator('li[data-testid="king-item"], li[data-testid="platinum-item"], li[data-testid="item-basic"], li[data-testid="agency-item"]').first.wait_for(state="visible", timeout=15000)
+        except Exception as e:
+            print(f"Error waiting for property items: {str(e)}")
+            # Try alternative selectors
+            await self.page.locator('.feed-item, .platinum-item, .basic-item, .agency-item').first.wait_for(state="visible", timeout=15000)
+
+    async def scroll_feed(self, waits: PageWaits):
+        """Scroll the feed until no more properties are lazily loaded"""
+        # Scroll to load more properties on current page
+        print("Scrolling to load more properties...")
+        last_height = await self.page.evaluate("document.body.scrollHeight")
+        last_count = 0
+        scroll_attempts = 0
+        max_scroll_attempts = 10  # Maximum number of scroll attempts
+        no_new_properties_count = 0
+        
+        while scroll_attempts < max_scroll_attempts:
+            # Scroll to bottom and wait until the item count stops changing
+            await self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+            current_count = await waits.listings_settled(self.page, FEED_ITEM_SELECTOR, timeout=self.scroll_settle_timeout)
+            print(f"Currently visible properties: {current_count}")
+            
+            # Calculate new scroll height and compare with last scroll height
+            new_height = await self.page.evaluate("document.body.scrollHeight")
+            
+            if new_height == last_height and current_count == last_count:
+                no_new_properties_count += 1
+                if no_new_properties_count >= 2:  # If no new properties for 2 consecutive scrolls
+                    print("No new properties loaded after scrolling, assuming all properties are loaded")
+                    break
+            else:
+                no_new_properties_count = 0
+            
+            last_height = new_height
+            last_count = current_count
+            scroll_attempts += 1
+            print(f"Scroll attempt {scroll_attempts}: Scrolled to load more properties...")
+
+    async def extract_feed_dom(self, current_page: int, waits: PageWaits, spans: PageSpans,
+                               first_page: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """Scroll the rendered feed and parse its HTML (DOM path)"""
+        if first_page:
+            with spans.span('wait'):
+                await self.wait_for_feed()
+        await waits.listings_settled(self.page, FEED_ITEM_SELECTOR)
+        with spans.span('scroll'):
+            await self.scroll_feed(waits)
+        
+        # Skip parsing when the feed list is identical to the cached one
+        feed_hash = None
+        if self.page_cache:
+            with spans.span('cache'):
+                feed_hash = await fragment_hash(self.page, FEED_LIST_CHAIN.ordered())
+            cached = self.page_cache.get(self.page.url, feed_hash) if feed_hash else None
+            if cached is not None:
+                print(f"\nFeed list unchanged, reusing {len(cached)} cached listings for page {current_page}")
+                return cached
+        
+        # Get page content and parse it with the configured backend
+        with spans.span('serialize'):
+            content = await self.page.content()
+        with spans.span('parse'):
+            page_properties, selector_counts = await self.parse_in_worker(parse_feed_page_html, content, self.html_parser.name, self.debug)
+            merge_selector_counts(selector_counts)
+        if page_properties is not None:
+            print(f"\nFound {len(page_properties)} property listings on page {current_page} ({self.html_parser.name} parser)")
+            if feed_hash and page_properties:
+                self.page_cache.put(self.page.url, feed_hash, page_properties)
+        return page_properties
+
+    async def extract_feed_payload(self, current_page: int, keep_payloads: List[Any] = None) -> List[Dict[str, Any]]:
+        """Map the feed items from __NEXT_DATA__ and captured API responses, no scrolling or DOM parsing"""
+        payloads = await read_embedded_state(self.page)
+        payloads.extend(self.payload_capture.drain())
+        if keep_payloads is not None:
+            keep_payloads.extend(payloads)
+        page_properties = map_feed_payloads(payloads)
+        if page_properties:
+            self.payload_pages += 1
+            print(f"\nMapped {len(page_properties)} property listings on page {current_page} from JSON payloads")
+        else:
+            print(f"No feed items in JSON payloads on page {current_page}, falling back to DOM extraction")
+        return page_properties
+
+    def use_http(self) -> bool:
+        """Whether to try the next page over plain HTTP; stops after repeated pages without listings"""
+        return self.http_fetcher is not None and self.http_misses < HTTP_FALLBACK_LIMIT
+
+    def parse_executor(self) -> Executor:
+        """Worker processes that parse page HTML off the event loop, started on first use"""
+        if self.pipeline_executor is None:
+            self.pipeline_executor = ProcessPoolExecutor(max_workers=self.pipeline_workers or 1)
+            self.owns_pipeline_executor = True
+        return self.pipeline_executor
+
+    async def parse_in_worker(self, parse: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.parse_executor(), parse, *args)
+
+    async def fetch_feed_http(self, url: str, current_page: int, spans: PageSpans) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str], Optional[str]]:
+        """Fetch and parse a feed page without the browser
+        
+        Returns the listings (None when the HTML has none, e.g. a bot check),
+        the next page URL and the HTML.
+        """
+        with spans.span('navigate'):
+            fetched = await self.http_fetcher.fetch(url)
+        if not fetched or fetched.status != 200:
+            self.http_misses += 1
+            return None, None, None
+        self.pages_scraped += 1
+        with spans.span('parse'):
+            page_properties, next_page_url = await self.parse_in_worker(parse_feed_html, fetched.html, self.html_parser.name, self.debug)
+        if not page_properties:
+            self.http_misses += 1
+            print(f"No listings in the HTML of page {current_page} ({fetched.status}, {fetched.size_bytes} bytes), using the browser")
+            if self.http_misses >= HTTP_FALLBACK_LIMIT:
+                print(f"{self.http_misses} pages without listings over HTTP, using the browser for the rest of the run")
+            return None, None, None
+        self.http_misses = 0
+        print(f"\nFetched {len(page_properties)} property listings on page {current_page} over {fetched.http_version} "
+              f"in {fetched.seconds * 1000:.0f} ms")
+        return page_properties, next_page_url, fetched.html
+
+    def feed_page_url(self, city_url: str, page_number: int) -> str:
+        return city_url if page_number == 1 else f"{city_url}&page={page_number}"
+
+    async def scrape_pages_pipeline(self, city_url: str, label: str, max_pages: int,
+                                    on_page: Callable[[int, List[Dict[str, Any]]], bool], start_page: int = 1):
+        """Fetch, parse and save feed pages over HTTP as overlapping pipeline stages
+        
+        Returns the pipeline; its resume_page is where the browser loop has to
+        continue, None when it got through the feed. Pages on this path are
+        not recorded as fixtures.
+        """
+        print(f"Running pages through the pipeline with {self.pipeline_workers} parse workers")
+        pipeline = ScrapePipeline(f"Yad2 {label}", self.http_fetcher, lambda page_number: self.feed_page_url(city_url, page_number),
+                                  parse_feed_html, (self.html_parser.name, self.debug),
+                                  parse_workers=self.pipeline_workers, timings=self.timings, executor=self.parse_executor())
+        await pipeline.run(start_page, max_pages, on_page)
+        self.pages_scraped += pipeline.pages_written
+        self.fetch_paths['http'] += pipeline.pages_written
+        print(pipeline.summary())
+        return pipeline
+
+    async def find_next_page_url(self) -> Optional[str]:
+        """Return the URL behind the next page arrow, or None on the last page"""
+        try:
+            # Visibility and href in one call, without an element handle
+            next_page_button = await match_state(self.page, NEXT_PAGE_SELECTOR, 'href')
+            if next_page_button and next_page_button['visible']:
+                href = next_page_button['attribute']
+                if href:
+                    return f"https://www.yad2.co.il{href}"
+                print("\nNo href found in next page button")
+            else:
+                print("\nNo more pages to scrape")
+        except Exception as e:
+            print(f"Error checking for next page: {str(e)}")
+        return None
+
     async def scrape_tzur_hadassah_properties(self) -> List[Dict[str, Any]]:
         """Scrape properties from Yad2 with direct link"""
+        return await self.scrape_city_properties("4000", city_name="צור הדסה", city_url="https://www.yad2.co.il/realestate/forsale?topArea=25&area=5&city=4000")
+
+    async def scrape_city_properties(self, city_code: str, city_name: str = None, city_url: str = None) -> List[Dict[str, Any]]:
+        """Scrape all for-sale properties of a single Yad2 city"""
+        if not city_url:
+            city_url = f"https://www.yad2.co.il/realestate/forsale?city={city_code}"
+        sink = None
+        all_properties = []
+        self.last_error = None
+        # Files and store partitions are keyed by the city's name, the same key Madlan and the converter use
+        city_name = city_name or city_name_for_code(city_code)
+        if not city_name:
+            print(f"City code {city_code} is not in the city list, keying its output by the code")
+        if self.fetch_mode == 'http' and self.http_fetcher is None:
+            self.http_fetcher = HttpFetcher(self.rate_limiter)
+            self.owns_http_fetcher = True
         try:
-            print("Starting browser...")
-            await self.setup_browser()
+            if not self.http_fetcher:
+                print("Starting browser...")
+                await self.setup_browser()
             
-            print("Navigating to Yad2...")
-            # Go directly to the Tzur Hadassah properties page
-            await self.page.goto("https://www.yad2.co.il/realestate/forsale?topArea=25&area=5&city=4000", wait_until="domcontentloaded")
-            await self.human_like_delay(2, 3)  # Wait for initial load
+            if self.output_format == 'jsonl':
+                # Stream every page to disk instead of holding the whole city in memory
+                sink = JsonlSink(self.yad2_data_dir, f'{city_name or city_code}_properties')
+            elif self.output_format == 'parquet':
+                # Imported here so pyarrow is only needed when writing to the store
+                from propertyStore import ParquetSink
+                sink = ParquetSink('yad2', city_name or city_code)
+            # Pages already saved by an interrupted run are not fetched again
+            progress = CrawlProgress(self.checkpoint if self.output_format == 'jsonl' else None, 'yad2', city_code)
+            start_page = progress.start_page
             
-            # Wait for the feed list to be visible
-            print("Waiting for feed list to load...")
-            try:
-                await self.page.wait_for_selector('ul[data-testid="feed-list"]', state="visible", timeout=15000)
-            except Exception as e:
-                print(f"Error waiting for feed list: {str(e)}")
-                # Try alternative selector
-                await self.page.wait_for_selector('.feed-list', state="visible", timeout=15000)
+            print(f"Navigating to Yad2 city {city_name or city_code}...")
+            # Go directly to the city properties page, or to the page after the checkpoint
+            page_url = progress.next_url or city_url
+            # URL the browser page currently shows; with the HTTP fetcher the browser is only used as a fallback
+            browser_url = None
             
-            # Wait for at least one property item to be visible
-            print("Waiting for property items to load...")
-            try:
-                # Wait for any of the specific item types
-                await self.page.wait_for_selector('li[data-testid="king-item"], li[data-testid="platinum-item"], li[data-testid="item-basic"], li[data-testid="agency-item"]', state="visible", timeout=15000)
-            except Exception as e:
-                print(f"Error waiting for property items: {str(e)}")
-                # Try alternative selectors
-                await self.page.wait_for_selector('.feed-item, .platinum-item, .basic-item, .agency-item', state="visible", timeout=15000)
-            
-            all_properties = []
-            current_page = 1
+            current_page = start_page
             max_pages = 50  # Set a reasonable maximum number of pages to scrape
             
-            while current_page <= max_pages:
-                print(f"\nProcessing page {current_page}...")
-                
-                # Scroll to load more properties on current page
-                print("Scrolling to load more properties...")
-                last_height = await self.page.evaluate("document.body.scrollHeight")
-                scroll_attempts = 0
-                max_scroll_attempts = 10  # Maximum number of scroll attempts
-                no_new_properties_count = 0
-                
-                while scroll_attempts < max_scroll_attempts:
-                    # Scroll to bottom
-                    await self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                    await self.human_like_delay(1, 2)  # Wait for new content to load
-                    
-                    # Calculate new scroll height and compare with last scroll height
-                    new_height = await self.page.evaluate("document.body.scrollHeight")
-                    
-                    # Count current visible properties
-                    current_properties = await self.page.query_selector_all('li[data-testid="king-item"], li[data-testid="platinum-item"], li[data-testid="item-basic"], li[data-testid="agency-item"]')
-                    print(f"Currently visible properties: {len(current_properties)}")
-                    
-                    if new_height == last_height:
-                        no_new_properties_count += 1
-                        if no_new_properties_count >= 2:  # If no new properties for 2 consecutive scrolls
-                            print("No new properties loaded after scrolling, assuming all properties are loaded")
-                            break
+            def save_page(page_number: int, page_properties: List[Dict[str, Any]], next_page_url: Optional[str],
+                          spans: PageSpans = None) -> bool:
+                """Write one page and record the progress; False once the crawl is done"""
+                timed = spans.span if spans else (lambda stage: nullcontext())
+                page_properties = progress.new_records(page_properties)
+                delta = None
+                if self.listing_index:
+                    with timed('index'):
+                        delta = self.listing_index.update_page('yad2', city_code, page_properties)
+                    print(f"Page {page_number} against the listing index: {delta}")
+                    page_properties = delta.records
+                with timed('write'):
+                    if sink:
+                        sink.write_page(page_properties)
                     else:
-                        no_new_properties_count = 0
-                    
-                    last_height = new_height
-                    scroll_attempts += 1
-                    print(f"Scroll attempt {scroll_attempts}: Scrolled to load more properties...")
+                        all_properties.extend(page_properties)
                 
-                # Final wait to ensure all properties are loaded
-                print("Waiting for all properties to be fully loaded...")
-                await self.human_like_delay(2, 3)
+                if delta and delta.fully_known:
+                    print("\nEvery listing on this page is already known and unchanged, stopping")
+                    progress.finish()
+                    return False
                 
-                # Get page content
-                content = await self.page.content()
-                soup = BeautifulSoup(content, 'html.parser')
-                
-                # Try multiple selectors to find the feed list
-                feed_list = None
-                feed_list_selectors = [
-                    ('ul', {'data-testid': 'feed-list'}),
-                    ('ul', {'class_': 'feed-list'}),
-                    ('div', {'class_': 'feed-list'}),
-                    ('div', {'data-testid': 'feed-list'})
-                ]
-                
-                for tag, attrs in feed_list_selectors:
-                    feed_list = soup.find(tag, attrs=attrs)
-                    if feed_list:
-                        print(f"Found feed list with selector: {tag} {attrs}")
-                        break
-                
-                if not feed_list:
-                    print("Could not find feed list with any selector")
-                    break
-                
-                # Find all property listings with specific data-testid values
-                listings = []
-                item_types = ['king-item', 'platinum-item', 'item-basic', 'agency-item']
-                
-                print("\nDEBUG: Starting property search...")
-                # Find all items of each type
-                for item_type in item_types:
-                    print(f"\nDEBUG: Searching for {item_type}...")
-                    # Use find_all with exact data-testid matching
-                    found_listings = feed_list.find_all('li', attrs={'data-testid': item_type})
-                    if found_listings:
-                        print(f"Found {len(found_listings)} {item_type} listings")
-                        print(f"DEBUG: First {item_type} data-testid: {found_listings[0].get('data-testid')}")
-                        listings.extend(found_listings)
-                    else:
-                        print(f"DEBUG: No {item_type} found")
-                
-                print(f"\nDEBUG: Total found {len(listings)} property listings on page {current_page}")
-                
-                # Process properties from current page
-                for i, listing in enumerate(listings, 1):
-                    try:
-                        print(f"\nDEBUG: Processing property {i} of {len(listings)}")
-                        print(f"DEBUG: Property data-testid: {listing.get('data-testid')}")
-                        
-                        # Try multiple selectors for each property detail
-                        title_selectors = [
-                            'span.item-data-content_heading__tphH4',
-                            'span.feed-item-title',
-                            'h2.feed-item-title',
-                            'div.feed-item-title'
-                        ]
-                        
-                        price_selectors = [
-                            'span.feed-item-price_price__ygoeF',
-                            'span.feed-item-price',
-                            'div.feed-item-price'
-                        ]
-                        
-                        location_selectors = [
-                            'span.item-data-content_itemInfoLine__AeoPP',
-                            'span.feed-item-location',
-                            'div.feed-item-location'
-                        ]
-                        
-                        # Find title
-                        title = "No title"
-                        for selector in title_selectors:
-                            title_elem = listing.select_one(selector)
-                            if title_elem:
-                                title = title_elem.text.strip()
-                                print(f"DEBUG: Found title with selector {selector}: {title}")
-                                break
-                        
-                        # Find price
-                        price = "Price not available"
-                        for selector in price_selectors:
-                            price_elem = listing.select_one(selector)
-                            if price_elem:
-                                price_text = price_elem.text.strip()
-                                # Extract only the numeric value from the price
-                                # Remove currency symbol (₪) and any commas
-                                price = ''.join(filter(str.isdigit, price_text))
-                                print(f"DEBUG: Found price with selector {selector}: {price}")
-                                break
-                        
-                        # Find location
-                        location = "Location not available"
-                        for selector in location_selectors:
-                            location_elem = listing.select_one(selector)
-                            if location_elem:
-                                location = location_elem.text.strip()
-                                # Extract the city name from the location string
-                                # The city is usually the last part after the last comma
-                                location_parts = location.split(',')
-                                if location_parts:
-                                    # Get the last part and strip whitespace
-                                    location = location_parts[-1].strip()
-                                print(f"DEBUG: Found location with selector {selector}: {location}")
-                                break
-                        
-                        # Extract rooms and size
-                        info_lines = listing.find_all(['span', 'div'], class_=lambda x: x and ('itemInfoLine' in x or 'feed-item-info' in x))
-                        rooms_size = info_lines[1].text.strip() if len(info_lines) > 1 else "N/A"
-                        print(f"DEBUG: Found rooms_size: {rooms_size}")
-                        
-                        rooms = "N/A"
-                        size = "N/A"
-                        if rooms_size != "N/A":
-                            parts = rooms_size.split('•')
-                            if len(parts) >= 3:
-                                # Extract just the number from rooms
-                                rooms = parts[0].strip().split()[0]
-                                # Extract just the number from size
-                                size = parts[2].strip().split()[0]
-                                print(f"DEBUG: Parsed rooms: {rooms}, size: {size}")
-                        
-                        # Find image
-                        image_url = None
-                        image_elem = listing.find('img')
-                        if image_elem and 'src' in image_elem.attrs:
-                            image_url = image_elem['src']
-                            print(f"DEBUG: Found image URL: {image_url}")
-                        
-                        # Find link
-                        property_link = None
-                        link_elem = listing.find('a', href=True)
-                        if link_elem:
-                            property_link = link_elem['href']
-                            if not property_link.startswith('http'):
-                                property_link = f"https://www.yad2.co.il{property_link}"
-                            print(f"DEBUG: Found property link: {property_link}")
-                        
-                        # Find broker
-                        broker = "N/A"
-                        broker_elem = listing.find(['span', 'div'], class_=lambda x: x and ('abovePrice' in x or 'broker' in x))
-                        if broker_elem:
-                            broker = broker_elem.text.strip()
-                            print(f"DEBUG: Found broker: {broker}")
-                        
-                        property_data = {
-                            'title': title,
-                            'price': price,
-                            'location': location,
-                            'rooms': rooms,
-                            'size': size,
-                            'image': image_url,
-                            'broker': broker,
-                            'link': property_link,
-                            'scraped_at': datetime.now().isoformat()
-                        }
-                        
-                        all_properties.append(property_data)
-                        print(f"Added property: {title}")
-                        
-                    except Exception as e:
-                        print(f"Error processing listing: {str(e)}")
-                        continue
-                
-                # Check for next page button
+                with timed('write'):
+                    progress.page_done(page_number, next_page_url, page_properties)
+                if not next_page_url:
+                    progress.finish()
+                    return False
+                return True
+            
+            if self.pipeline_workers and self.use_http():
+                # The checkpoint's next URL is the page after each saved one
+                pipeline = await self.scrape_pages_pipeline(
+                    city_url, city_name or city_code, max_pages,
+                    lambda page_number, page_properties: save_page(page_number, page_properties, self.feed_page_url(city_url, page_number + 1)),
+                    start_page=start_page)
+                if pipeline.resume_page is None:
+                    # The feed ended, a known page stopped the crawl or max_pages was reached: nothing left for the browser
+                    current_page = max_pages + 1
+                else:
+                    current_page = pipeline.resume_page
+                    page_url = self.feed_page_url(city_url, current_page)
+            
+            while current_page <= max_pages:
+                print(f"\nProcessing page {current_page}...")
+                # Each page's spans start with the navigation to it
+                spans = self.timings.begin_page(f"Yad2 {city_name or city_code} page {current_page}")
+                waits = self.wait_stats.begin_page(f"Yad2 {city_name or city_code} page {current_page}", spans)
                 try:
-                    next_page_button = await self.page.query_selector('a.pagination-arrow_button__ayr9j[aria-label="עמוד הבא"]')
-                    if next_page_button and await next_page_button.is_visible():
-                        print(f"\nFound next page button, moving to page {current_page + 1}")
-                        # Get the href attribute
-                        href = await next_page_button.get_attribute('href')
-                        if href:
-                            # Navigate to the next page URL
-                            next_page_url = f"https://www.yad2.co.il{href}"
-                            print(f"Navigating to next page: {next_page_url}")
-                            await self.page.goto(next_page_url, wait_until="domcontentloaded")
-                            await self.human_like_delay(2, 3)  # Wait for next page to load
-                            current_page += 1
-                        else:
-                            print("\nNo href found in next page button")
+                    page_properties = None
+                    next_page_url = None
+                    html = None
+                    payloads = [] if self.fixture_recorder else None
+                    mode = 'http'
+                    tried_http = self.use_http()
+                    if tried_http:
+                        page_properties, next_page_url, html = await self.fetch_feed_http(page_url, current_page, spans)
+                    if not page_properties:
+                        if tried_http:
+                            self.fetch_paths['fallback'] += 1
+                        if not self.page:
+                            await self.setup_browser()
+                        first_browser_page = browser_url is None
+                        if browser_url != page_url:
+                            with spans.span('navigate'):
+                                await self.goto(page_url)
+                            browser_url = page_url
+                        
+                        mode = 'payload'
+                        if self.payload_capture:
+                            with spans.span('extract'):
+                                page_properties = await self.extract_feed_payload(current_page, payloads)
+                        if not page_properties:
+                            mode = 'dom'
+                            page_properties = await self.extract_feed_dom(current_page, waits, spans, first_page=first_browser_page)
+                        if page_properties is None:
                             break
-                    else:
-                        print("\nNo more pages to scrape")
+                        with spans.span('extract'):
+                            next_page_url = await self.find_next_page_url()
+                    self.fetch_paths['http' if mode == 'http' else 'browser'] += 1
+                    spans.records = len(page_properties)
+                    if self.fixture_recorder:
+                        with spans.span('write'):
+                            self.fixture_recorder.record('yad2', city_name or city_code, current_page, page_url,
+                                                         html or await self.page.content(), payloads, len(page_properties),
+                                                         'payload' if mode == 'http' else mode)
+                    
+                    if not save_page(current_page, page_properties, next_page_url, spans):
                         break
-                except Exception as e:
-                    print(f"Error checking for next page: {str(e)}")
-                    break
+                    print(f"\nMoving to page {current_page + 1}: {next_page_url}")
+                    page_url = next_page_url
+                    current_page += 1
+                finally:
+                    waits.finish()
+                    spans.finish()
+            if current_page > max_pages:
+                progress.finish()
+            
+            print(f"Wait summary: {self.wait_stats.summary()}")
+            if self.listing_index:
+                print(f"Listing index: {self.listing_index.stats}")
+            if self.page_cache:
+                print(self.page_cache.summary())
+            if self.http_fetcher:
+                print(self.http_fetcher.summary())
+                print(fetch_paths_summary(self.fetch_paths))
+            if self.owns_timings:
+                self.timings.write()
+            
+            if sink:
+                sink.close()
+                if sink.records_written:
+                    print(f"\nSaved {sink.records_written} properties to {', '.join(sink.files)}")
+                else:
+                    print("\nNo properties found")
+                return sink.records()
             
             if all_properties:
-                # Get the city name from the first property
-                city_name = all_properties[0]['location'] if all_properties else 'unknown_city'
+                # Fall back to the city name from the first property
+                if not city_name:
+                    city_name = all_properties[0]['location'] if all_properties else 'unknown_city'
                 # Save all properties to JSON file
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 filename = f'{city_name}_properties_{timestamp}.json'
@@ -386,12 +584,17 @@ class Yad2DirectService:
             
         except Exception as e:
             print(f"Error scraping properties: {str(e)}")
-            return []
+            self.last_error = str(e)
+            if sink:
+                sink.close()
+                return sink.records()
+            return all_properties
         
         finally:
+            if sink:
+                sink.close()
             print("Closing browser...")
-            if self.browser:
-                await self.browser.close()
+            await self.close_browser()
             print("Browser closed")
 
 async def main():
@@ -0,0 +1,223 @@
+import os
+import sys
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from htmlParsers import ParserBackend, HtmlNode, get_parser_backend
+from payloadCapture import embedded_state_from_html
+from selectorChains import SelectorStats
+from yad2PayloadMapper import map_feed_payloads
+
+# Feed list containers, most specific first
+FEED_LIST_SELECTORS = [
+    'ul[data-testid="feed-list"]',
+    'ul.feed-list',
+    'div.feed-list',
+    'div[data-testid="feed-list"]'
+]
+
+ITEM_TYPES = ['king-item', 'platinum-item', 'item-basic', 'agency-item']
+FEED_ITEM_SELECTOR = ', '.join(f'li[data-testid="{item_type}"]' for item_type in ITEM_TYPES)
+
+TITLE_SELECTORS = [
+    'span.item-data-content_heading__tphH4',
+    'span.feed-item-title',
+    'h2.feed-item-title',
+    'div.feed-item-title'
+]
+
+PRICE_SELECTORS = [
+    'span.feed-item-price_price__ygoeF',
+    'span.feed-item-price',
+    'div.feed-item-price'
+]
+
+LOCATION_SELECTORS = [
+    'span.item-data-content_itemInfoLine__AeoPP',
+    'span.feed-item-location',
+    'div.feed-item-location'
+]
+
+INFO_LINE_SELECTOR = ('span[class*="itemInfoLine"], div[class*="itemInfoLine"], '
+                      'span[class*="feed-item-info"], div[class*="feed-item-info"]')
+
+NEXT_PAGE_SELECTOR = 'a.pagination-arrow_button__ayr9j[aria-label="עמוד הבא"]'
+
+BROKER_SELECTOR = ('span[class*="abovePrice"], div[class*="abovePrice"], '
+                   'span[class*="broker"], div[class*="broker"]')
+
+# The fallback chains try the selector that has been matching first; save_selector_stats() persists
+# the hit counts (pipeline worker processes keep theirs to themselves)
+SELECTOR_STATS = SelectorStats('yad2')
+FEED_LIST_CHAIN = SELECTOR_STATS.chain('feed_list', FEED_LIST_SELECTORS)
+TITLE_CHAIN = SELECTOR_STATS.chain('title', TITLE_SELECTORS)
+PRICE_CHAIN = SELECTOR_STATS.chain('price', PRICE_SELECTORS)
+LOCATION_CHAIN = SELECTOR_STATS.chain('location', LOCATION_SELECTORS)
+
+
+def save_selector_stats():
+    SELECTOR_STATS.save()
+    print(SELECTOR_STATS.summary())
+
+
+def merge_selector_counts(counts: Dict[str, Dict[str, Dict[str, int]]]):
+    """Add the selector lookups a parse worker counted to this process's chains"""
+    SELECTOR_STATS.merge(counts)
+
+
+def find_feed_list(root: HtmlNode, debug: bool = False) -> Optional[HtmlNode]:
+    """Find the feed list container trying each known selector"""
+    feed_list = FEED_LIST_CHAIN.first_match(root)
+    if feed_list and debug:
+        print(f"Found feed list with selector: {FEED_LIST_CHAIN.last_hit}")
+    return feed_list
+
+
+def find_listings(feed_list: HtmlNode, debug: bool = False) -> List[HtmlNode]:
+    """Find all property listings grouped by their data-testid item type"""
+    listings = []
+    for item_type in ITEM_TYPES:
+        found_listings = feed_list.select(f'li[data-testid="{item_type}"]')
+        if found_listings:
+            if debug:
+                print(f"Found {len(found_listings)} {item_type} listings")
+            listings.extend(found_listings)
+        elif debug:
+            print(f"DEBUG: No {item_type} found")
+    return listings
+
+
+def extract_listing(listing: HtmlNode, debug: bool = False) -> Dict[str, Any]:
+    """Extract one property record from a feed list item"""
+    # Find title
+    title = "No title"
+    title_elem = TITLE_CHAIN.first_match(listing)
+    if title_elem:
+        title = title_elem.text().strip()
+
+    # Find price
+    price = "Price not available"
+    price_elem = PRICE_CHAIN.first_match(listing)
+    if price_elem:
+        # Extract only the numeric value from the price
+        # Remove currency symbol (₪) and any commas
+        price = ''.join(filter(str.isdigit, price_elem.text().strip()))
+
+    # Find location
+    location = "Location not available"
+    location_elem = LOCATION_CHAIN.first_match(listing)
+    if location_elem:
+        # The city is usually the last part after the last comma
+        location = location_elem.text().strip().split(',')[-1].strip()
+
+    # Extract rooms and size
+    info_lines = listing.select(INFO_LINE_SELECTOR)
+    rooms_size = info_lines[1].text().strip() if len(info_lines) > 1 else "N/A"
+
+    rooms = "N/A"
+    size = "N/A"
+    if rooms_size != "N/A":
+        parts = rooms_size.split('•')
+        if len(parts) >= 3:
+            # Extract just the numbers from rooms and size
+            rooms = parts[0].strip().split()[0]
+            size = parts[2].strip().split()[0]
+
+    # Find image
+    image_url = None
+    image_elem = listing.select_one('img')
+    if image_elem:
+        image_url = image_elem.attr('src')
+
+    # Find link
+    property_link = None
+    link_elem = listing.select_one('a[href]')
+    if link_elem:
+        property_link = link_elem.attr('href')
+        if not property_link.startswith('http'):
+            property_link = f"https://www.yad2.co.il{property_link}"
+
+    # Find broker
+    broker = "N/A"
+    broker_elem = listing.select_one(BROKER_SELECTOR)
+    if broker_elem:
+        broker = broker_elem.text().strip()
+
+    if debug:
+        print(f"DEBUG: title={title} price={price} location={location} rooms={rooms} size={size} broker={broker}")
+
+    return {
+        'title': title,
+        'price': price,
+        'location': location,
+        'rooms': rooms,
+        'size': size,
+        'image': image_url,
+        'broker': broker,
+        'link': property_link,
+        'scraped_at': datetime.now().isoformat()
+    }
+
+
+def parse_feed_page(content: str, parser: ParserBackend = None, debug: bool = False) -> Optional[List[Dict[str, Any]]]:
+    """Parse a serialized Yad2 feed page into property records
+
+    Returns None when the page has no feed list at all.
+    """
+    parser = parser or get_parser_backend()
+    return parse_feed_root(parser.parse(content), debug=debug)
+
+
+def parse_feed_page_html(content: str, parser_name: str = None, debug: bool = False) -> Tuple[Optional[List[Dict[str, Any]]], Dict[str, Any]]:
+    """parse_feed_page for a worker process, taking only picklable arguments
+
+    The selector chains live in the worker, so the lookups this call counted
+    are returned along with the records for merge_selector_counts.
+    """
+    before = SELECTOR_STATS.snapshot()
+    page_properties = parse_feed_page(content, get_parser_backend(parser_name), debug=debug)
+    return page_properties, SELECTOR_STATS.counts_since(before)
+
+
+def parse_feed_root(root: HtmlNode, debug: bool = False) -> Optional[List[Dict[str, Any]]]:
+    """parse_feed_page on an already parsed document"""
+    feed_list = find_feed_list(root, debug=debug)
+    if not feed_list:
+        print("Could not find feed list with any selector")
+        return None
+
+    listings = find_listings(feed_list, debug=debug)
+    if debug:
+        print(f"\nDEBUG: Total found {len(listings)} property listings")
+
+    properties = []
+    for listing in listings:
+        try:
+            properties.append(extract_listing(listing, debug=debug))
+        except Exception as e:
+            print(f"Error processing listing: {str(e)}")
+            continue
+    return properties
+
+
+def find_next_page_href(root: HtmlNode) -> Optional[str]:
+    """Absolute URL behind the next page arrow, or None on the last page"""
+    link = root.select_one(NEXT_PAGE_SELECTOR)
+    href = link.attr('href') if link else None
+    if not href:
+        return None
+    return href if href.startswith('http') else f"https://www.yad2.co.il{href}"
+
+
+def parse_feed_html(content: str, parser_name: str = None, debug: bool = False) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+    """Listings and next page URL of a feed page fetched without the browser
+
+    The dehydrated feed query holds every item of the page; the SSR markup is
+    the fallback. Takes only picklable arguments so it can run in a worker process.
+    """
+    page_properties = map_feed_payloads(embedded_state_from_html(content))
+    root = get_parser_backend(parser_name).parse(content)
+    if not page_properties:
+        page_properties = parse_feed_root(root, debug=debug)
+    return page_properties, find_next_page_href(root)
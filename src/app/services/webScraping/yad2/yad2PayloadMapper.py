@@ -0,0 +1,66 @@
+import os
+import sys
+from datetime import datetime
+from typing import List, Dict, Any
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from payloadCapture import find_objects
+
+# Yad2 feed API responses and the Next.js dehydrated query state
+API_URL_PATTERNS = [r'gw\.yad2\.co\.il/.*(feed|realestate)', r'yad2\.co\.il/api/.*realestate']
+
+
+def is_feed_item(node: Dict[str, Any]) -> bool:
+    """Feed items carry an ad token together with price or address details"""
+    return 'token' in node and ('address' in node or 'additionalDetails' in node) and 'price' in node
+
+
+def _path(node: Any, *keys: str) -> Any:
+    for key in keys:
+        if not isinstance(node, dict):
+            return None
+        node = node.get(key)
+    return node
+
+
+def map_feed_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a Yad2 feed item to the same record shape the DOM parser produces"""
+    street = _path(item, 'address', 'street', 'text')
+    house_number = _path(item, 'address', 'house', 'number')
+    if street and house_number:
+        title = f"{street} {house_number}"
+    else:
+        title = street or "No title"
+
+    price = item.get('price')
+    rooms = _path(item, 'additionalDetails', 'roomsCount')
+    size = _path(item, 'additionalDetails', 'squareMeter')
+    broker = _path(item, 'customer', 'agencyName')
+
+    return {
+        'title': title,
+        'price': str(int(price)) if price else "Price not available",
+        'location': _path(item, 'address', 'city', 'text') or "Location not available",
+        'rooms': f"{rooms:g}" if isinstance(rooms, (int, float)) else "N/A",
+        'size': str(size) if size is not None else "N/A",
+        'image': _path(item, 'metaData', 'coverImage'),
+        'broker': broker or "N/A",
+        'link': f"https://www.yad2.co.il/realestate/item/{item['token']}",
+        'scraped_at': datetime.now().isoformat()
+    }
+
+
+def map_feed_payloads(payloads: List[Any]) -> List[Dict[str, Any]]:
+    """Find every feed item in the captured payloads, once per ad token"""
+    properties = []
+    seen_tokens = set()
+    for payload in payloads:
+        for item in find_objects(payload, is_feed_item):
+            if item['token'] in seen_tokens:
+                continue
+            seen_tokens.add(item['token'])
+            try:
+                properties.append(map_feed_item(item))
+            except Exception as e:
+                print(f"Error mapping feed item {item.get('token')}: {str(e)}")
+    return properties
@@ -0,0 +1,298 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.request
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app', 'services', 'webScraping'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app', 'services', 'webScraping', 'yad2'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app', 'services', 'webScraping', 'madlan'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app', 'services', 'analytics'))
+from htmlParsers import get_parser_backend
+from pageFixtures import DEFAULT_FIXTURES_DIR, load_fixtures
+from yad2FeedParser import parse_feed_page, parse_feed_html
+from madlanCardParser import parse_cards_page
+
+STREETS = ['הרצל', 'בן יהודה', 'ז\'בוטינסקי', 'רוטשילד', 'ויצמן', 'סוקולוב', 'אחד העם', 'הנביאים']
+# Half rooms are common in listings and easy to misparse (3.5 read as 35)
+ROOM_COUNTS = [2, 2.5, 3, 3.5, 4, 4.5, 5, 5.5, 6]
+NEIGHBORHOODS = ['מרכז', 'צפון ישן', 'נווה שאנן', 'רמת אביב', 'פלורנטין']
+# Markup around the listings, so parse time includes a realistically sized document
+PAGE_FILLER = ''.join(f'<div class="nav-item-{i}"><a href="/section/{i}">קישור {i}</a><span>טקסט</span></div>'
+                      for i in range(300))
+
+
+def synthetic_yad2_page(rng, city, listings):
+    items = []
+    for _ in range(listings):
+        token = ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz0123456789') for _ in range(8))
+        rooms = rng.choice([2, 3, 3.5, 4, 4.5, 5])
+        items.append(
+            f'<li data-testid="{rng.choice(["item-basic", "agency-item", "platinum-item"])}">'
+            f'<a href="/realestate/item/{token}"><img src="https://img.yad2.co.il/{token}.jpg?t=1745569398472">'
+            f'<span class="item-data-content_heading__tphH4">{rng.choice(STREETS)} {rng.randint(1, 120)}</span>'
+            f'<span class="feed-item-price_price__ygoeF">₪ {rng.randint(1200, 6000) * 1000:,}</span>'
+            f'<span class="item-data-content_itemInfoLine__AeoPP">דירה, {rng.choice(NEIGHBORHOODS)}, {city}</span>'
+            f'<span class="item-data-content_itemInfoLine__AeoPP">{rooms:g} חדרים • קומה {rng.randint(0, 12)} • {rng.randint(45, 180)} מ״ר</span>'
+            f'<span class="item-layout_abovePrice__x1">תיווך נדל"ן</span></a></li>')
+    return f'<html><body>{PAGE_FILLER}<ul data-testid="feed-list">{"".join(items)}</ul>{PAGE_FILLER}</body></html>'
+
+
+def synthetic_madlan_page(rng, city, listings):
+    cards = []
+    for _ in range(listings):
+        floor = rng.randint(0, 12)
+        cards.append(
+            f'<a href="/listings/{rng.getrandbits(40):x}" data-auto="listed-bulletin-clickable"><div class="card">'
+            f'<div data-auto="property-price">‏{rng.randint(1200, 6000) * 1000:,} ₪</div>'
+            f'<div data-auto="property-rooms">{rng.choice(ROOM_COUNTS)} חד\'</div>'
+            f'<div data-auto="property-size">{rng.randint(45, 180)} מ"ר</div>'
+            f'<div data-auto="property-floor">{"קומת קרקע" if floor == 0 else f"קומה {floor}"}</div>'
+            f'<div data-auto="property-address">דירה, {rng.choice(STREETS)} {rng.randint(1, 120)}, {rng.choice(NEIGHBORHOODS)}</div>'
+            f'</div></a>')
+    return f'<html><body>{PAGE_FILLER}<div class="results">{"".join(cards)}</div>{PAGE_FILLER}</body></html>'
+
+
+def load_pages(args):
+    """(source, label, html) of every page to benchmark: recorded fixtures, or synthetic pages when there are none"""
+    pages = []
+    if not args.synthetic:
+        for source in ['yad2', 'madlan']:
+            for fixture in load_fixtures(source, args.fixtures):
+                pages.append((source, fixture.label, fixture.html()))
+    if not pages:
+        # Seeded so every run benchmarks the same documents
+        rng = random.Random(args.seed)
+        for n in range(args.pages):
+            pages.append(('yad2', 'תל אביב יפו', synthetic_yad2_page(rng, 'תל אביב יפו', args.listings)))
+            pages.append(('madlan', 'תל אביב יפו', synthetic_madlan_page(rng, 'תל אביב יפו', args.listings)))
+    return pages
+
+
+class StandInServer:
+    """Local HTTP server returning the benchmark pages, standing in for the listing sites"""
+
+    def __init__(self, pages, latency: float = 0.0):
+        self.documents = {f'/{source}/{n}': html.encode('utf-8') for n, (source, _, html) in enumerate(pages)}
+        documents = self.documents
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                # Simulated server and network time, so the pipeline has fetch waits to overlap
+                if latency:
+                    time.sleep(latency)
+                body = documents.get(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address
+        return f'http://{host}:{port}'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def parse_feed_all_pages(html, parser_name):
+    """parse_feed_html for the pipeline benchmark: the stand-in pages have no next page links"""
+    properties, _ = parse_feed_html(html, parser_name)
+    return properties, True
+
+
+def run_pipeline(urls, args):
+    """Push the pages through ScrapePipeline once, returning the records written"""
+    # Imported here so httpx is only needed for this stage
+    from httpFetcher import HttpFetcher
+    from scrapePipeline import ScrapePipeline
+
+    async def run():
+        async with HttpFetcher(http2=False) as fetcher:
+            pipeline = ScrapePipeline('benchmark', fetcher, lambda page_number: urls[page_number - 1],
+                                      parse_feed_all_pages, (args.parser,),
+                                      parse_workers=args.pipeline_workers)
+            await pipeline.run(1, len(urls), lambda page_number, records: True)
+            return pipeline.records_written
+    return asyncio.run(run())
+
+
+def measure(name, run, pages, repeat):
+    """Best of `repeat` timed runs, then one run under tracemalloc for the peak memory"""
+    timings = []
+    records = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        records = run()
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(timings)
+    result = {
+        'pages': pages,
+        'records': records,
+        'seconds': best,
+        'ms_per_page': best / pages * 1000 if pages else None,
+        'us_per_record': best / records * 1e6 if records else None,
+        'records_per_second': records / best if best else None,
+        'peak_mb': peak / 1024 / 1024
+    }
+    per_page = f"{result['ms_per_page']:>8.2f} ms/page" if pages else f"{'':>16}"
+    per_record = (f"{result['us_per_record']:>9.1f} us/record {result['records_per_second']:>11.0f} records/s"
+                  if records else f"{'':>41}")
+    print(f"{name:<14} {per_page} {per_record} {result['peak_mb']:>8.1f} MB peak")
+    return result
+
+
+def run_benchmarks(pages, args):
+    html_parser = get_parser_backend(args.parser)
+    yad2_pages = [(label, html) for source, label, html in pages if source == 'yad2']
+    madlan_pages = [(label, html) for source, label, html in pages if source == 'madlan']
+    results = {}
+
+    with StandInServer(pages, args.latency_ms / 1000) as server:
+        urls = [server.base_url + path for path in server.documents]
+
+        def fetch():
+            for url in urls:
+                with urllib.request.urlopen(url) as response:
+                    response.read()
+            return 0
+        results['fetch'] = measure('fetch', fetch, len(urls), args.repeat)
+
+        yad2_urls = [server.base_url + path for path in server.documents if path.startswith('/yad2/')]
+        if yad2_urls and args.pipeline_workers:
+            try:
+                # Fetch and parse in worker processes, overlapping
+                results['pipeline'] = measure('pipeline', lambda: run_pipeline(yad2_urls, args),
+                                              len(yad2_urls), args.repeat)
+            except ImportError as e:
+                print(f"Skipping the pipeline benchmark ({str(e)})")
+
+    parsed = {'yad2': [], 'madlan': []}
+
+    def parse_yad2():
+        parsed['yad2'] = [record for _, html in yad2_pages for record in parse_feed_page(html, html_parser) or []]
+        return len(parsed['yad2'])
+
+    def parse_madlan():
+        parsed['madlan'] = [record for label, html in madlan_pages for record in parse_cards_page(html, label, html_parser)]
+        return len(parsed['madlan'])
+
+    if yad2_pages:
+        results['yad2_parse'] = measure('yad2_parse', parse_yad2, len(yad2_pages), args.repeat)
+    if madlan_pages:
+        results['madlan_parse'] = measure('madlan_parse', parse_madlan, len(madlan_pages), args.repeat)
+
+    try:
+        from propertyNormalizer import normalize_records
+        from listingDedup import DedupEngine
+    except ImportError as e:
+        print(f"Skipping clean-up benchmarks ({str(e)})")
+        return results
+
+    records = [dict(r, source=source) for source in parsed for r in parsed[source]]
+    normalized = {}
+
+    def normalize():
+        normalized['table'] = normalize_records(records)
+        return normalized['table'].num_rows
+    results['normalize'] = measure('normalize', normalize, 0, args.repeat)
+    # Arrow buffers are allocated outside the Python heap, so tracemalloc does not see them
+    results['normalize']['arrow_mb'] = normalized['table'].nbytes / 1024 / 1024
+    print(f"{'':<14} {results['normalize']['arrow_mb']:.1f} MB of Arrow buffers in the normalized table")
+
+    rows = [dict(r, source=s) for r, s in zip(normalized['table'].to_pylist(), (r['source'] for r in records))]
+
+    def dedup():
+        DedupEngine().deduplicate(rows)
+        return len(rows)
+    results['dedup'] = measure('dedup', dedup, 0, args.repeat)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Stages whose time per record (or per page) grew by more than tolerance over the baseline"""
+    regressions = []
+    for stage, result in results.items():
+        before = baseline.get('results', {}).get(stage)
+        if not before:
+            continue
+        metric = 'us_per_record' if result['us_per_record'] and before.get('us_per_record') else 'ms_per_page'
+        if not result.get(metric) or not before.get(metric):
+            continue
+        change = result[metric] / before[metric] - 1
+        status = 'REGRESSION' if change > tolerance else 'ok'
+        print(f"{stage:<14} {metric} {before[metric]:.2f} -> {result[metric]:.2f} ({change:+.0%}) {status}")
+        if change > tolerance:
+            regressions.append(stage)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark page parsing, card extraction and clean-up on saved or synthetic pages")
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES_DIR, help="Recorded pages (see replay_fixtures.py)")
+    parser.add_argument('--synthetic', action='store_true', help="Use generated pages even when fixtures exist")
+    parser.add_argument('--pages', type=int, default=20, help="Synthetic pages per source")
+    parser.add_argument('--listings', type=int, default=40, help="Listings per synthetic page")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--parser', default=None, help="HTML parser backend (selectolax, lxml or bs4)")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Delay the stand-in server adds to every response")
+    parser.add_argument('--pipeline-workers', type=int, default=os.cpu_count(),
+                        help="Parse processes of the fetch/parse pipeline stage (0 skips it)")
+    parser.add_argument('--save', default=None, help="Write the results as a JSON baseline")
+    parser.add_argument('--compare', default=None, help="Baseline JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown before a stage counts as regressed")
+    args = parser.parse_args()
+
+    pages = load_pages(args)
+    total_mb = sum(len(html.encode('utf-8')) for _, _, html in pages) / 1024 / 1024
+    print(f"Benchmarking {len(pages)} pages ({total_mb:.1f} MB), best of {args.repeat} runs\n")
+    results = run_benchmarks(pages, args)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'created_at': datetime.now().isoformat(), 'pages': len(pages), 'results': results}, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare}:")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\nWARNING: {', '.join(regressions)} slower than the baseline by more than {args.tolerance:.0%}")
+            sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
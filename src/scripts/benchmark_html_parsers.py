@@ -0,0 +1,66 @@
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app', 'services', 'webScraping'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app', 'services', 'webScraping', 'yad2'))
+from htmlParsers import BACKENDS
+from yad2FeedParser import parse_feed_page
+
+DEFAULT_PAGES = 'src/data/page_fixtures/yad2/*.html'
+
+
+def benchmark_backend(name, pages, repeat):
+    try:
+        parser = BACKENDS[name]()
+    except ImportError as e:
+        print(f"{name:<11} not installed ({str(e)})")
+        return None
+
+    records = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for content in pages:
+            properties = parse_feed_page(content, parser)
+            records += len(properties or [])
+    elapsed = time.perf_counter() - started
+
+    page_count = len(pages) * repeat
+    print(f"{name:<11} {page_count / elapsed:>10.1f} pages/s {records / elapsed:>12.1f} records/s "
+          f"{elapsed / page_count * 1000:>9.2f} ms/page  ({records // repeat} records per pass)")
+    return records // repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HTML parser backends on saved Yad2 feed pages")
+    parser.add_argument('pages', nargs='*', help=f"Saved feed page HTML files (default: {DEFAULT_PAGES})")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--backends', default=','.join(BACKENDS))
+    args = parser.parse_args()
+
+    paths = args.pages or sorted(glob.glob(DEFAULT_PAGES))
+    if not paths:
+        print("No feed pages to benchmark")
+        sys.exit(1)
+
+    pages = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append(f.read())
+    total_mb = sum(len(p.encode('utf-8')) for p in pages) / 1024 / 1024
+    print(f"Benchmarking {len(pages)} pages ({total_mb:.1f} MB), {args.repeat} passes each\n")
+
+    counts = {}
+    for name in args.backends.split(','):
+        count = benchmark_backend(name, pages, args.repeat)
+        if count is not None:
+            counts[name] = count
+
+    if len(set(counts.values())) > 1:
+        print(f"\nWARNING: backends disagree on record counts: {counts}")
+
+
+if __name__ == '__main__':
+    main()
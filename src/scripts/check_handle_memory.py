@@ -0,0 +1,131 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+
+from playwright.async_api import async_playwright
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app', 'services', 'webScraping'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app', 'services', 'webScraping', 'madlan'))
+from elementHandles import HandleScope, HANDLE_STATS, match_state, count_elements, handle_stats_summary
+from madlanCardParser import LISTING_SELECTOR, NEXT_PAGE_SELECTOR
+from madlanDirectService import MadlanDirectService
+from benchmark_extraction import synthetic_madlan_page
+
+NEXT_BUTTON = f'<a {NEXT_PAGE_SELECTOR[1:-1]} href="?page=2">הבא</a>'
+
+
+def process_tree_rss(pid: int) -> int:
+    """Resident memory in bytes of a process and all of its descendants (driver and browser included)"""
+    try:
+        # Imported here so psutil is only needed where /proc is not available
+        import psutil
+        root = psutil.Process(pid)
+        total = 0
+        for proc in [root] + root.children(recursive=True):
+            try:
+                total += proc.memory_info().rss
+            except psutil.Error:
+                continue
+        return total
+    except ImportError:
+        pass
+
+    children: dict = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                # The command name may contain spaces, the fields after it do not
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+            children.setdefault(ppid, []).append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            with open(f'/proc/{current}/statm', 'r') as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+    return total
+
+
+async def crawl_page(service: MadlanDirectService, page, html: str, dispose: bool):
+    """Extract one synthetic results page the way the per-element path does"""
+    await page.set_content(html)
+    scope = HandleScope()
+    # The service prints a line per card; only the memory numbers matter here
+    with contextlib.redirect_stdout(io.StringIO()):
+        listings, _ = await service.find_listings(page, scope)
+        properties, _ = await service.extract_listings(listings, 'חיפה', scope)
+    if dispose:
+        await scope.dispose()
+    next_button = await match_state(page, NEXT_PAGE_SELECTOR)
+    return len(properties), bool(next_button and next_button['visible'])
+
+
+async def run(args) -> list:
+    rng = random.Random(args.seed)
+    service = MadlanDirectService(resume=False)
+    samples = []
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=True)
+        page = await browser.new_page()
+        # The same page for the whole run, so nothing released on navigation hides a leak
+        for page_number in range(1, args.pages + 1):
+            html = synthetic_madlan_page(rng, 'חיפה', args.listings).replace('</body>', f'{NEXT_BUTTON}</body>')
+            found, has_next = await crawl_page(service, page, html, not args.no_dispose)
+            if found != args.listings or not has_next:
+                print(f"Page {page_number}: expected {args.listings} listings and a next button, got {found} and {has_next}")
+            if page_number % args.sample_every == 0:
+                rss_mb = process_tree_rss(os.getpid()) / 1024 / 1024
+                samples.append({'page': page_number, 'rss_mb': round(rss_mb, 1),
+                                'live_handles': HANDLE_STATS['tracked'] - HANDLE_STATS['disposed'],
+                                'cards_in_dom': await count_elements(page, LISTING_SELECTOR)})
+                print(f"page {page_number:>5}: {rss_mb:8.1f} MB, {samples[-1]['live_handles']} live handles")
+        await browser.close()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a long synthetic Madlan crawl on one browser page and check that memory stays flat")
+    parser.add_argument('--pages', type=int, default=1000, help="Synthetic results pages to extract")
+    parser.add_argument('--listings', type=int, default=40, help="Listing cards per page")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--sample-every', type=int, default=50, help="Pages between memory samples")
+    parser.add_argument('--warmup', type=int, default=100, help="Pages before the baseline sample, while caches fill")
+    parser.add_argument('--max-growth-mb', type=float, default=64.0,
+                        help="Allowed growth of the process tree RSS between the baseline and the last sample")
+    parser.add_argument('--no-dispose', action='store_true', help="Skip disposing handles, to see the leak this guards against")
+    parser.add_argument('--json', action='store_true', help="Print the samples as JSON")
+    args = parser.parse_args()
+
+    samples = asyncio.run(run(args))
+    print(handle_stats_summary())
+    if args.json:
+        print(json.dumps(samples, indent=2))
+
+    baseline = next((s for s in samples if s['page'] >= args.warmup), None)
+    if not baseline or baseline is samples[-1]:
+        print("Not enough samples after the warmup to judge memory growth")
+        sys.exit(1)
+    growth = samples[-1]['rss_mb'] - baseline['rss_mb']
+    print(f"\nRSS grew {growth:.1f} MB from page {baseline['page']} to page {samples[-1]['page']} "
+          f"(limit {args.max_growth_mb:.0f} MB), {samples[-1]['live_handles']} handles left undisposed")
+    if growth > args.max_growth_mb:
+        print("WARNING: memory keeps growing over the crawl, element handles are likely leaking")
+        sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app', 'services', 'webScraping'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app', 'services', 'analytics'))
+from propertyStore import load_table
+from marketAverages import MARKET_LEVELS, enrich, group_stats, to_property_records
+
+DEFAULT_OUTPUT_DIR = 'src/data/market'
+COLUMNS = ['source', 'city', 'listing_id', 'neighborhood', 'property_type', 'rooms', 'size', 'price', 'link', 'scraped_at']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute market price per sqm statistics and enrich listings with pricePerMeterAverage")
+    parser.add_argument('--store', default=None, help="Property store directory (default: src/data/property_store)")
+    parser.add_argument('--city', default=None)
+    parser.add_argument('--since', default=None, help="Only snapshots from this ISO date on")
+    parser.add_argument('--min-samples', type=int, default=5, help="Smallest group used for a market average")
+    parser.add_argument('--trim', type=float, default=0.1, help="Share cut from each tail for the trimmed mean")
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    listings = load_table(COLUMNS, city=args.city, since=args.since, root=args.store).to_pandas()
+    # Latest snapshot of every listing
+    listings = listings.sort_values('scraped_at').drop_duplicates(['source', 'listing_id'], keep='last')
+    loaded = time.perf_counter()
+
+    enriched = enrich(listings, min_samples=args.min_samples, trim=args.trim)
+    computed = time.perf_counter()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for level, keys in MARKET_LEVELS:
+        group_stats(enriched, keys, args.trim).to_parquet(os.path.join(args.output_dir, f'market_stats_{level}.parquet'), index=False)
+    records = to_property_records(enriched)
+    output_path = os.path.join(args.output_dir, 'enriched_properties.json')
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+
+    levels = enriched['marketLevel'].value_counts().to_dict()
+    print(f"Loaded {len(listings)} listings in {loaded - started:.2f}s")
+    print(f"Computed market averages in {computed - loaded:.2f}s "
+          f"({len(listings) / max(computed - loaded, 1e-9):.0f} listings/s)")
+    print(f"Priced {len(records)} listings by level: {json.dumps(levels, ensure_ascii=False)}")
+    print(f"Saved statistics and enriched properties to {args.output_dir}")
+
+
+if __name__ == '__main__':
+    main()
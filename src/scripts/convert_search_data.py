@@ -0,0 +1,104 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app', 'services', 'webScraping'))
+from jsonlSink import iter_jsonl
+from propertyNormalizer import SENTINELS
+from propertyStore import DEFAULT_STORE_DIR, write_records, open_store
+
+DEFAULT_SEARCH_DATA = 'src/data/search_data'
+SOURCES = ['yad2', 'madlan']
+MANIFEST_NAME = '_converted.json'
+
+
+def load_records(path):
+    if path.endswith('.jsonl'):
+        return list(iter_jsonl(path))
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def city_of(record, fallback):
+    for field in ('city', 'location'):
+        value = record.get(field)
+        if value and value not in SENTINELS:
+            # Older Yad2 files hold the whole location line ("דירה, סנסן, צור הדסה")
+            return value.split(',')[-1].strip()
+    return fallback
+
+
+def day_of(record, fallback):
+    scraped_at = record.get('scraped_at')
+    return scraped_at[:10] if scraped_at else fallback
+
+
+def convert_file(path, source, store_dir):
+    """Split one scrape file into its source/city/date partitions"""
+    records = load_records(path)
+    # Files are named <city>_properties_<timestamp>.json(l)
+    fallback_city = os.path.basename(path).split('_properties')[0]
+    fallback_day = datetime.fromtimestamp(os.path.getmtime(path)).date().isoformat()
+
+    groups = defaultdict(list)
+    for record in records:
+        groups[(city_of(record, fallback_city), day_of(record, fallback_day))].append(record)
+
+    for (city, day), group in groups.items():
+        write_records(group, source, city, day, root=store_dir)
+    return len(records), len(groups)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert scraped JSON / NDJSON files into the Parquet property store")
+    parser.add_argument('--input', default=DEFAULT_SEARCH_DATA, help="Directory holding the yad2/ and madlan/ scrape files")
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR)
+    parser.add_argument('--force', action='store_true', help="Convert files again even if the manifest lists them")
+    args = parser.parse_args()
+
+    os.makedirs(args.store, exist_ok=True)
+    manifest_path = os.path.join(args.store, MANIFEST_NAME)
+    converted = {}
+    if os.path.exists(manifest_path) and not args.force:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            converted = json.load(f)
+
+    started = time.perf_counter()
+    total_records = 0
+    total_files = 0
+    input_bytes = 0
+    for source in SOURCES:
+        paths = sorted(glob.glob(os.path.join(args.input, source, '*.json')) + glob.glob(os.path.join(args.input, source, '*.jsonl')))
+        for path in paths:
+            key = os.path.relpath(path, args.input)
+            if key in converted:
+                continue
+            try:
+                records, partitions = convert_file(path, source, args.store)
+            except (OSError, ValueError) as e:
+                print(f"Skipping {path}: {str(e)}")
+                continue
+            converted[key] = {'records': records, 'converted_at': datetime.now().isoformat()}
+            total_records += records
+            total_files += 1
+            input_bytes += os.path.getsize(path)
+            print(f"{key}: {records} records into {partitions} partitions")
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(converted, f, ensure_ascii=False, indent=2)
+
+    elapsed = time.perf_counter() - started
+    print(f"\nConverted {total_files} files, {total_records} records ({input_bytes / 1024:.0f} KB of JSON) in {elapsed:.2f}s")
+    if total_files:
+        dataset = open_store(args.store)
+        store_bytes = sum(os.path.getsize(p) for p in dataset.files)
+        print(f"Store now holds {dataset.count_rows()} rows in {len(dataset.files)} files ({store_bytes / 1024:.0f} KB)")
+
+
+if __name__ == '__main__':
+    main()
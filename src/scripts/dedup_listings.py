@@ -0,0 +1,69 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app', 'services', 'webScraping'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app', 'services', 'analytics'))
+from propertyStore import load_table
+from listingDedup import DedupEngine, DedupConfig
+
+DEFAULT_OUTPUT = 'src/data/canonical_listings.parquet'
+COLUMNS = ['source', 'city', 'listing_id', 'title', 'street', 'neighborhood', 'property_type',
+           'rooms', 'size', 'floor', 'price', 'link', 'scraped_at']
+
+
+def latest_rows(table):
+    """Keep the most recent snapshot of every listing so re-scrapes do not count as duplicates"""
+    rows = sorted(table.to_pylist(), key=lambda r: r['scraped_at'] or 0, reverse=True)
+    seen = set()
+    latest = []
+    for row in rows:
+        key = (row['source'], row['listing_id'])
+        if key in seen:
+            continue
+        seen.add(key)
+        latest.append(row)
+    return latest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge Yad2 and Madlan listings of the same apartment into canonical listings")
+    parser.add_argument('--store', default=None, help="Property store directory (default: src/data/property_store)")
+    parser.add_argument('--city', default=None)
+    parser.add_argument('--since', default=None, help="Only snapshots from this ISO date on")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--price-tolerance', type=float, default=0.05)
+    parser.add_argument('--size-tolerance', type=float, default=0.06)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    table = load_table(COLUMNS, city=args.city, since=args.since, root=args.store)
+    rows = latest_rows(table)
+    loaded = time.perf_counter()
+
+    engine = DedupEngine(DedupConfig(price_tolerance=args.price_tolerance, size_tolerance=args.size_tolerance))
+    canonical = engine.deduplicate(rows)
+    deduplicated = time.perf_counter()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    pq.write_table(pa.Table.from_pylist(canonical), args.output, compression='zstd')
+
+    stats = engine.stats
+    cross_source = sum(1 for c in canonical if len(c['sources']) > 1)
+    naive_pairs = stats['listings'] * (stats['listings'] - 1) // 2
+    print(f"Loaded {table.num_rows} snapshots, {len(rows)} distinct listings in {loaded - started:.2f}s")
+    print(f"Deduplicated into {len(canonical)} canonical listings ({cross_source} listed on both sources) "
+          f"in {deduplicated - loaded:.2f}s")
+    print(f"Compared {stats['pairs_compared']} candidate pairs instead of {naive_pairs} "
+          f"({stats['blocks']} blocks, {stats['pairs_matched']} matches)")
+    print(json.dumps(stats))
+    print(f"Saved canonical listings to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
+
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app', 'services', 'webScraping'))
+from jsonlSink import iter_jsonl
+from propertyNormalizer import NORMALIZED_SCHEMA, normalize_records, null_counts
+
+DEFAULT_INPUT = 'src/data/search_data'
+DEFAULT_OUTPUT = 'src/data/normalized'
+PARSED_FIELDS = ['price', 'rooms', 'size', 'floor', 'city', 'scraped_at']
+
+
+def find_input_files(paths):
+    """Scrape files under the given directories, files or glob patterns"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, '**', '*.json'), recursive=True))
+            files.extend(glob.glob(os.path.join(path, '**', '*.jsonl'), recursive=True))
+        elif glob.has_magic(path):
+            files.extend(glob.glob(path, recursive=True))
+        else:
+            files.append(path)
+    return sorted(set(files))
+
+
+def read_chunks(path, chunk_size):
+    """Yield the file's records chunk by chunk; NDJSON is streamed, JSON arrays are loaded once"""
+    if path.endswith('.jsonl'):
+        records = iter_jsonl(path)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            records = iter(json.load(f))
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def output_path(path, input_root, output_dir, fmt):
+    relative = os.path.relpath(path, input_root) if input_root else os.path.basename(path)
+    if relative.startswith('..'):
+        relative = os.path.basename(path)
+    return os.path.join(output_dir, os.path.splitext(relative)[0] + f'.{fmt}')
+
+
+def normalize_file(path, input_root, output_dir, fmt, chunk_size):
+    """Normalize one file chunk by chunk into Parquet or NDJSON (runs in a worker process)"""
+    started = time.perf_counter()
+    target = output_path(path, input_root, output_dir, fmt)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    records = 0
+    nulls = dict.fromkeys(PARSED_FIELDS, 0)
+
+    writer = None
+    jsonl_file = open(target, 'w', encoding='utf-8') if fmt == 'jsonl' else None
+    try:
+        for chunk in read_chunks(path, chunk_size):
+            table = normalize_records(chunk)
+            records += table.num_rows
+            for field, count in null_counts(table, PARSED_FIELDS).items():
+                nulls[field] += count
+            if jsonl_file:
+                for row in table.to_pylist():
+                    jsonl_file.write(json.dumps(row, ensure_ascii=False, default=str) + '\n')
+            else:
+                if writer is None:
+                    writer = pq.ParquetWriter(target, NORMALIZED_SCHEMA, compression='zstd')
+                writer.write_table(table)
+    finally:
+        if writer:
+            writer.close()
+        if jsonl_file:
+            jsonl_file.close()
+
+    return {
+        'path': path,
+        'output': target,
+        'records': records,
+        'nulls': nulls,
+        'seconds': time.perf_counter() - started
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalize scraped property files into typed columns")
+    parser.add_argument('paths', nargs='*', help=f"Directories, files or glob patterns (default: {DEFAULT_INPUT})")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--format', choices=['parquet', 'jsonl'], default='parquet')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=50000, help="Records normalized per batch")
+    args = parser.parse_args()
+
+    paths = args.paths or [DEFAULT_INPUT]
+    files = find_input_files(paths)
+    if not files:
+        print("No files to normalize")
+        sys.exit(1)
+    input_root = paths[0] if len(paths) == 1 and os.path.isdir(paths[0]) else None
+
+    print(f"Normalizing {len(files)} files with {args.workers} workers")
+    started = time.perf_counter()
+    total_records = 0
+    total_nulls = dict.fromkeys(PARSED_FIELDS, 0)
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(normalize_file, path, input_root, args.output, args.format, args.chunk_size): path
+                   for path in files}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"Error normalizing {futures[future]}: {str(e)}")
+                continue
+            total_records += result['records']
+            for field, count in result['nulls'].items():
+                total_nulls[field] += count
+            rate = result['records'] / result['seconds'] if result['seconds'] else 0.0
+            print(f"{result['path']}: {result['records']} records, {rate:.0f} records/s -> {result['output']}")
+
+    elapsed = time.perf_counter() - started
+    print(f"\nNormalized {total_records} records from {len(files) - failed} files in {elapsed:.2f}s "
+          f"({total_records / elapsed:.0f} records/s, {failed} failed)")
+    print(f"Nulls after parsing: {json.dumps(total_nulls)}")
+
+
+if __name__ == "__main__":
+    main()
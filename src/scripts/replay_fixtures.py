@@ -0,0 +1,105 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app', 'services', 'webScraping'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app', 'services', 'webScraping', 'yad2'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app', 'services', 'webScraping', 'madlan'))
+from htmlParsers import get_parser_backend
+from pageFixtures import DEFAULT_FIXTURES_DIR, load_fixtures
+from yad2FeedParser import parse_feed_page
+from yad2PayloadMapper import map_feed_payloads
+from madlanCardParser import parse_cards_page
+from madlanPayloadMapper import STATE_GLOBALS, map_bulletin_payloads
+
+SOURCES = ['yad2', 'madlan']
+
+
+def extract(fixture, mode, parser):
+    """Run a recorded page through the same extraction the live scraper uses"""
+    if mode == 'auto':
+        mode = fixture.entry.get('mode') or 'dom'
+    properties = None
+    if mode == 'payload':
+        if fixture.source == 'yad2':
+            properties = map_feed_payloads(fixture.payloads())
+        else:
+            properties = map_bulletin_payloads(fixture.payloads(STATE_GLOBALS), fixture.label)
+    if not properties:
+        if fixture.source == 'yad2':
+            properties = parse_feed_page(fixture.html(), parser)
+        else:
+            properties = parse_cards_page(fixture.html(), fixture.label, parser)
+    return properties or []
+
+
+def replay_source(source, args, parser, normalize=None):
+    fixtures = load_fixtures(source, args.fixtures)
+    if not fixtures:
+        return None
+    # Read every file up front so the timing covers extraction only
+    for fixture in fixtures:
+        fixture.preload()
+
+    records = 0
+    mismatches = []
+    started = time.perf_counter()
+    for run in range(args.repeat):
+        for fixture in fixtures:
+            properties = extract(fixture, args.mode, parser)
+            records += len(properties)
+            if normalize:
+                normalize(properties)
+            expected = fixture.expected_records
+            if run == 0 and expected is not None and expected != len(properties):
+                mismatches.append((fixture.entry['file'], expected, len(properties)))
+    elapsed = time.perf_counter() - started
+
+    pages = len(fixtures) * args.repeat
+    print(f"{source:<7} {pages / elapsed:>10.1f} pages/s {records / elapsed:>12.1f} records/s "
+          f"{elapsed / pages * 1000:>9.2f} ms/page  ({records // args.repeat} records from {len(fixtures)} pages per pass)")
+    for name, expected, found in mismatches:
+        print(f"  MISMATCH {name}: recorded {expected} records, replay extracted {found}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded Yad2/Madlan pages through the extractors, no browser needed")
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES_DIR, help="Directory written by record_fixtures")
+    parser.add_argument('--source', choices=SOURCES + ['all'], default='all')
+    parser.add_argument('--mode', choices=['dom', 'payload', 'auto'], default='auto',
+                        help="'auto' replays each page the way it was extracted when recorded")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--parser', default=None, help="HTML parser backend (selectolax, lxml or bs4)")
+    parser.add_argument('--normalize', action='store_true', help="Also run the records through propertyNormalizer")
+    args = parser.parse_args()
+
+    normalize = None
+    if args.normalize:
+        # Imported here so pyarrow is only needed when normalizing
+        from propertyNormalizer import normalize_records as normalize
+
+    html_parser = get_parser_backend(args.parser)
+    print(f"Replaying fixtures from {args.fixtures}, {args.repeat} passes, {html_parser.name} parser, {args.mode} mode\n")
+
+    replayed = 0
+    failed = False
+    for source in SOURCES if args.source == 'all' else [args.source]:
+        mismatches = replay_source(source, args, html_parser, normalize)
+        if mismatches is None:
+            print(f"{source:<7} no fixtures")
+            continue
+        replayed += 1
+        failed = failed or bool(mismatches)
+
+    if not replayed:
+        print("\nNo fixtures to replay, record some with record_fixtures=<dir> on the scraper services")
+        sys.exit(1)
+    if failed:
+        print("\nWARNING: replayed record counts differ from the recorded runs")
+        sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app', 'services', 'webScraping'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app', 'services', 'analytics'))
+from dealScoring import PROFITABILITY_THRESHOLD, score_deals, profitable_deals, to_notifications
+
+DEFAULT_INPUT = 'src/data/market/enriched_properties.json'
+DEFAULT_OUTPUT = 'src/data/market/profitable_deals.json'
+
+
+def load_properties(args):
+    """Enriched properties from compute_market_averages.py, or straight from the property store"""
+    if args.store:
+        from propertyStore import load_table
+        from marketAverages import enrich, to_property_records
+        columns = ['source', 'city', 'listing_id', 'neighborhood', 'property_type', 'rooms', 'size', 'price', 'link', 'scraped_at']
+        listings = load_table(columns, city=args.city, root=args.store).to_pandas()
+        listings = listings.sort_values('scraped_at').drop_duplicates(['source', 'listing_id'], keep='last')
+        return pd.DataFrame(to_property_records(enrich(listings)))
+    with open(args.input, 'r', encoding='utf-8') as f:
+        return pd.DataFrame(json.load(f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a snapshot of properties against the market and keep the profitable deals")
+    parser.add_argument('--input', default=DEFAULT_INPUT, help="Enriched properties JSON")
+    parser.add_argument('--store', default=None, help="Compute market averages from this property store instead")
+    parser.add_argument('--city', default=None)
+    parser.add_argument('--threshold', type=float, default=PROFITABILITY_THRESHOLD)
+    parser.add_argument('--top', type=int, default=None, help="Only keep the N best deals")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    properties = load_properties(args)
+    loaded = time.perf_counter()
+    scored = score_deals(properties, args.threshold)
+    deals = profitable_deals(scored, args.top)
+    scored_at = time.perf_counter()
+
+    notifications = to_notifications(deals)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(notifications, f, ensure_ascii=False, indent=2)
+
+    print(f"Loaded {len(properties)} properties in {loaded - started:.2f}s")
+    print(f"Scored them in {(scored_at - loaded) * 1000:.1f} ms: {int(scored['isProfitable'].sum())} profitable "
+          f"at threshold {args.threshold:+.0%}")
+    for n in notifications[:5]:
+        p = n['property']
+        location = ', '.join(filter(None, [p.get('neighborhood'), p.get('city')]))
+        print(f"  #{n['dealRank']} {location}: ₪{p['requestedPrice']:,.0f}, "
+              f"{abs(n['priceDifferencePercent']):.1%} below market per sqm")
+    print(f"Saved {len(notifications)} deals to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app', 'services', 'webScraping'))
+from selectorChains import DEFAULT_SELECTOR_STATS_PATH, DEAD_AFTER_MISSES, dead_selectors, hit_rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hit rates of the scrapers' fallback selectors, flagging the ones that never match")
+    parser.add_argument('--stats', default=DEFAULT_SELECTOR_STATS_PATH, help="Selector stats written by the scrapers")
+    parser.add_argument('--site', default=None, help="Only report this site (yad2, yad2-search)")
+    parser.add_argument('--min-misses', type=int, default=DEAD_AFTER_MISSES,
+                        help="Lookups without a hit before a selector counts as dead")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.stats):
+        print(f"No selector stats at {args.stats}, run a scraper first")
+        sys.exit(1)
+    with open(args.stats, 'r', encoding='utf-8') as f:
+        stats = json.load(f)
+
+    report = {}
+    for site, chains in stats.items():
+        if args.site and site != args.site:
+            continue
+        for name, counts in chains.items():
+            rates = hit_rates(counts)
+            dead = dead_selectors(counts, args.min_misses)
+            report[f"{site}/{name}"] = [
+                {'selector': selector, **c, 'hit_rate': rates[selector], 'dead': selector in dead}
+                for selector, c in sorted(counts.items(), key=lambda item: -item[1]['hits'])
+            ]
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    dead_total = 0
+    for chain, rows in report.items():
+        print(f"\n{chain}")
+        for row in rows:
+            rate = f"{row['hit_rate']:.0%}" if row['hit_rate'] is not None else 'never tried'
+            flag = '  DEAD' if row['dead'] else ''
+            dead_total += row['dead']
+            print(f"  {row['hits']:>8} hits {row['misses']:>8} misses {rate:>12}  {row['selector']}{flag}")
+    print(f"\n{dead_total} dead selectors")
+
+
+if __name__ == '__main__':
+    main()